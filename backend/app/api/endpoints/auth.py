@@ -1,13 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from datetime import datetime
 
-from app.core.database import get_db
-from app.core.security import verify_token, create_refresh_token
+from app.core.database import get_db, run_db
+from app.core.security import create_refresh_token
 from app.services.auth_service import AuthService
+from app.services.user_cache import user_cache
 from app.schemas.auth import UserCreate, Token, User, RefreshToken
 from app.models.user import User as UserModel
 from app.core.config import settings
@@ -27,7 +25,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    payload = verify_token(token)
+    payload = user_cache.claims(token)
     if payload is None:
         raise credentials_exception
     
@@ -35,16 +33,19 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    user = await user_cache.user(db, user_id)
     if user is None:
         raise credentials_exception
     
     return user
 
-@router.post("/register", response_model=User)
-@limiter.limit(settings.REGISTER_RATE_LIMIT)
+
+@router.post(
+    "/register",
+    response_model=User,
+    dependencies=[Depends(limiter.limit(settings.REGISTER_RATE_LIMIT, "register"))],
+)
 async def register(
-    request: Request,
     user_data: UserCreate,
     db: Session = Depends(get_db)
 ):
@@ -52,22 +53,22 @@ async def register(
     auth_service = AuthService(db)
     return await auth_service.register_user(user_data)
 
-@router.post("/token", response_model=Token)
-@limiter.limit(settings.LOGIN_RATE_LIMIT)
+
+@router.post(
+    "/token",
+    response_model=Token,
+    dependencies=[Depends(limiter.limit(settings.LOGIN_RATE_LIMIT, "token"))],
+)
 async def login(
-    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login to get access token."""
     auth_service = AuthService(db)
     try:
+        # Also records the login time
         user = await auth_service.authenticate_user(form_data)
-        
-        # Update last login timestamp
-        user.last_login = datetime.utcnow()
-        db.commit()
-        
+
         # Generate both access and refresh tokens
         tokens = auth_service.create_user_token(user)
         refresh_token = create_refresh_token({"sub": str(user.id)})
@@ -90,7 +91,7 @@ async def refresh_token(
 ):
     """Get new access token using refresh token."""
     auth_service = AuthService(db)
-    return auth_service.refresh_access_token(refresh_token.refresh_token)
+    return await run_db(auth_service.refresh_access_token, refresh_token.refresh_token)
 
 @router.get("/me", response_model=User)
 async def read_users_me(current_user: UserModel = Depends(get_current_user)):
@@ -98,6 +99,10 @@ async def read_users_me(current_user: UserModel = Depends(get_current_user)):
     return current_user
 
 @router.post("/logout")
-async def logout(current_user: UserModel = Depends(get_current_user)):
+async def logout(
+    token: str = Depends(oauth2_scheme), current_user: UserModel = Depends(get_current_user)
+):
     """Logout user (client should discard tokens)."""
+    user_cache.forget_token(token)
+    user_cache.invalidate_user(current_user.id)
     return {"message": "Successfully logged out"} 
\ No newline at end of file
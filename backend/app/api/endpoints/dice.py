@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.core.database import get_db
-from app.services.dice_service import DiceService
+from app.services.dice_service import AsyncDiceService, DiceService
+from app.services.bot_service import schedule_bot_turn
+from app.services.game_actor import game_actors
 from app.services.game_service import GameService
 from app.schemas.dice import DiceRoll
 
@@ -11,38 +13,48 @@ router = APIRouter()
 
 
 @router.post("/roll", response_model=DiceRoll)
-async def roll_dice(game_id: str, db: Session = Depends(get_db)):
+async def roll_dice(
+    game_id: str,
+    background_tasks: BackgroundTasks,
+    expected_version: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
     """
     Roll two six-sided dice and return their values.
     Args:
         game_id: Identifier for the game this roll belongs to
+        expected_version: Reject the roll with 409 unless the game is at this version
     Returns:
         A DiceRoll object containing the values of both dice and whether they are doubles.
     The roll is automatically stored in the database and updates the game state.
     """
-    # Get the game first
     game_service = GameService(db)
-    game = game_service.get_game(game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-    
-    # Check if it's a valid time to roll
-    state = game.state
-    if state["dice_state"]["values"] is not None and not state["dice_state"]["used_values"]:
-        raise HTTPException(
-            status_code=400, 
-            detail="Cannot roll again until current roll is used or turn is complete"
-        )
-    
-    # Roll the dice
-    dice_service = DiceService(db)
-    dice_values = dice_service.roll_dice(game_id)
-    
-    # Update game state with new roll
-    state["dice_state"]["values"] = dice_values
-    state["dice_state"]["used_values"] = []
-    game_service.update_game_state(game_id, state)
-    
+
+    def roll():
+        # Get the game first
+        game = game_service.get_game(game_id)
+        if not game:
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        if expected_version is not None and game.version != expected_version:
+            raise HTTPException(status_code=409, detail="Game was changed by another request")
+
+        # Roll the dice
+        dice_service = DiceService(db)
+        dice_values = dice_service.roll_dice()
+
+        # Record the roll, passing the turn straight away if it cannot be played;
+        # a roll while the current one is still being played is refused here
+        game = game_service.roll(game_id, dice_values, expected_version)
+        # Only rolls the game accepted belong in the history
+        if game is not None:
+            dice_service.record_roll(dice_values, game_id)
+        return game, dice_values
+
+    # Queued behind any other change to this game, so the version check still holds
+    game, dice_values = await game_actors.run(game_id, roll)
+    await schedule_bot_turn(background_tasks, db, game)
+
     return DiceRoll.from_tuple(dice_values)
 
 
@@ -58,8 +70,8 @@ async def get_roll_history(
     Returns:
         List of dice rolls, ordered by most recent first
     """
-    dice_service = DiceService(db)
-    history = dice_service.get_roll_history(limit, game_id)
+    dice_service = AsyncDiceService(db)
+    history = await dice_service.get_roll_history(limit, game_id)
     return [
         DiceRoll(die1=roll.die1, die2=roll.die2, is_doubles=roll.is_doubles)
         for roll in history
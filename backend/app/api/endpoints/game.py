@@ -1,52 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 from app.core.database import get_db
-from app.services.game_service import GameService
-from app.schemas.game import Game, GameCreate, GameState, MoveRequest
+from app.services.bot_service import schedule_bot_turn
+from app.services.game_actor import game_actors
+from app.services.game_service import AsyncGameService, GameService
+from app.services.http_cache import CACHE_CONTROL, etag_matches, game_etag
+from app.services.rollout_service import RolloutService
+from app.schemas.game import (
+    Game,
+    GameCreate,
+    GameEventRead,
+    GameImport,
+    GameState,
+    LegalPlays,
+    MoveRequest,
+    MoveStep,
+    RolloutResult,
+    TurnRequest,
+)
 from app.constants.game import INITIAL_POSITION
+from app.core.board import point_for_slot
+from app.core.config import settings
+from app.core.moves import remaining_dice
+from app.core.wire import JSON, negotiate, pack_game
 
 router = APIRouter()
 
 
+def wire_format(response: Response, accept: Optional[str] = Header(None)) -> str:
+    """Media type for a game response chosen from the Accept header (see app.core.wire)."""
+    response.headers["Vary"] = "Accept"
+    return negotiate(accept)
+
+
+def game_response(game, media_type: str, headers: Optional[Dict[str, str]] = None):
+    """The game as JSON, or packed when the client asked for it and the state allows."""
+    if media_type != JSON:
+        body = pack_game(game, media_type)
+        if body is not None:
+            headers = {"Vary": "Accept", **(headers or {})}
+            return Response(body, media_type=media_type, headers=headers)
+    return game
+
+
 @router.post("", response_model=Game)
-async def create_game(game_id: Optional[str] = None, db: Session = Depends(get_db)):
+async def create_game(
+    game_id: Optional[str] = None,
+    media_type: str = Depends(wire_format),
+    db: Session = Depends(get_db),
+):
     """Create a new game with initial state."""
-    game_service = GameService(db)
+    game_service = AsyncGameService(db)
     # Convert INITIAL_POSITION to GameState
     initial_state = GameState(**INITIAL_POSITION)
     game_data = GameCreate(state=initial_state)
-    return game_service.create_game(game_data, game_id)
+    return game_response(await game_service.create_game(game_data, game_id), media_type)
+
+
+@router.get("/positions/{position_hash}", response_model=List[str])
+async def find_games_by_position(position_hash: str, db: Session = Depends(get_db)):
+    """List the IDs of all games currently in the given position."""
+    game_service = AsyncGameService(db)
+    return [game.id for game in await game_service.find_games_by_position(position_hash)]
+
+
+@router.post("/import", response_model=Game)
+async def import_game(
+    game_import: GameImport,
+    game_id: Optional[str] = None,
+    media_type: str = Depends(wire_format),
+    db: Session = Depends(get_db),
+):
+    """Create a game from a GNU Backgammon Position ID and Match ID."""
+    game_service = AsyncGameService(db)
+    game = await game_service.create_game_from_ids(
+        game_import.position_id, game_import.match_id, game_id
+    )
+    return game_response(game, media_type)
+
+
+@router.get("/position-ids/{position_id:path}", response_model=List[str])
+async def find_games_by_position_id(position_id: str, db: Session = Depends(get_db)):
+    """List the IDs of all games in the position with the given GNU BG Position ID."""
+    game_service = AsyncGameService(db)
+    return [game.id for game in await game_service.find_games_by_position_id(position_id)]
 
 
 @router.get("/{game_id}", response_model=Game)
-async def get_game(game_id: str, db: Session = Depends(get_db)):
-    """Get a game by its ID."""
-    game_service = GameService(db)
-    game = game_service.get_game(game_id)
+async def get_game(
+    game_id: str,
+    response: Response,
+    media_type: str = Depends(wire_format),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    """Get a game by its ID.
+
+    Responses carry an ETag; a request whose If-None-Match names the current
+    version of an active game gets 304 without a database query.
+    """
+    game = await AsyncGameService(db).get_game(game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
-    return game
+    if game.position_id is None:
+        media_type = JSON  # Only JSON can carry a state that is not a position
+    headers = {"ETag": game_etag(game.version, media_type), "Cache-Control": CACHE_CONTROL}
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers={"Vary": "Accept", **headers})
+    response.headers.update(headers)
+    return game_response(game, media_type, headers)
+
+
+@router.get("/{game_id}/events", response_model=List[GameEventRead])
+async def get_game_events(game_id: str, after: int = 0, db: Session = Depends(get_db)):
+    """The game's rolls, moves and turn changes in order, for replays and analysis."""
+    game_service = AsyncGameService(db)
+    if not await game_service.get_game(game_id):
+        raise HTTPException(status_code=404, detail="Game not found")
+    return await game_service.get_events(game_id, after=after)
+
+
+@router.get("/{game_id}/legal-moves", response_model=LegalPlays)
+async def get_legal_moves(game_id: str, db: Session = Depends(get_db)):
+    """List every legal complete play for the player on roll."""
+    game_service = AsyncGameService(db)
+    game = await game_service.get_game(game_id)
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    # Move generation is CPU-bound; keep it off the event loop
+    legal = await game_service.get_legal_plays(game.state)
+    return LegalPlays(
+        dice=list(remaining_dice(game.state["dice_state"])),
+        max_moves=legal.max_moves,
+        plays=[
+            [
+                MoveStep(from_point=point_for_slot(src), to_point=point_for_slot(dst), die=die)
+                for src, dst, die in play
+            ]
+            for play in legal.plays.values()
+            if play
+        ],
+    )
+
+
+@router.post("/{game_id}/rollout", response_model=RolloutResult)
+async def rollout_position(
+    game_id: str,
+    trials: int = Query(
+        settings.ROLLOUT_DEFAULT_TRIALS, ge=2, le=settings.ROLLOUT_MAX_TRIALS
+    ),
+    db: Session = Depends(get_db),
+):
+    """Estimate the equity of the player on roll by playing the game out many times."""
+    game = await AsyncGameService(db).get_game(game_id)
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return await RolloutService().rollout(game.state, trials)
 
 
 @router.post("/{game_id}/move", response_model=Game)
-async def make_move(game_id: str, move: MoveRequest, db: Session = Depends(get_db)):
-    """Validate and execute a move in the game."""
+async def make_move(
+    game_id: str,
+    move: MoveRequest,
+    background_tasks: BackgroundTasks,
+    expected_version: Optional[int] = None,
+    media_type: str = Depends(wire_format),
+    db: Session = Depends(get_db),
+):
+    """Validate and execute a move in the game.
+
+    With `expected_version`, the move is rejected with 409 if the game has
+    changed since the client read that version.
+    """
     game_service = GameService(db)
-    game = game_service.make_move(game_id, move)
+    game = await game_actors.run(game_id, game_service.make_move, game_id, move, expected_version)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
-    return game
+    await schedule_bot_turn(background_tasks, db, game)
+    return game_response(game, media_type)
+
+
+@router.post("/{game_id}/turn", response_model=Game)
+async def make_turn(
+    game_id: str,
+    turn: TurnRequest,
+    background_tasks: BackgroundTasks,
+    expected_version: Optional[int] = None,
+    media_type: str = Depends(wire_format),
+    db: Session = Depends(get_db),
+):
+    """Validate and execute every checker move of the current roll at once."""
+    game_service = GameService(db)
+    game = await game_actors.run(game_id, game_service.make_turn, game_id, turn, expected_version)
+    if not game:
+        raise HTTPException(status_code=404, detail="Game not found")
+    await schedule_bot_turn(background_tasks, db, game)
+    return game_response(game, media_type)
 
 
 @router.put("/{game_id}/state", response_model=Game)
 async def update_game_state(
-    game_id: str, state: Dict[str, Any], db: Session = Depends(get_db)
+    game_id: str,
+    state: Dict[str, Any],
+    expected_version: Optional[int] = None,
+    media_type: str = Depends(wire_format),
+    db: Session = Depends(get_db),
 ):
     """Update the state of an existing game."""
     game_service = GameService(db)
-    game = game_service.update_game_state(game_id, state)
+    game = await game_actors.run(
+        game_id, game_service.update_game_state, game_id, state, expected_version
+    )
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
-    return game
+    return game_response(game, media_type)
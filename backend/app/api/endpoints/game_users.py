@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.core.database import get_db
 from app.api.endpoints.auth import get_current_user
-from app.services.game_service import GameService
+from app.services.bot_service import BotService, schedule_bot_turn
+from app.services.game_actor import game_actors
+from app.services.game_service import AsyncGameService, GameService
+from app.services.http_cache import CACHE_CONTROL, etag_matches, player_stamps
 from app.models.user import User, PieceColor
 from app.schemas.user import UserRead
 
@@ -18,42 +21,23 @@ async def join_game(
     db: Session = Depends(get_db)
 ):
     """Join a game with specified color."""
-    # Check if game exists
     game_service = GameService(db)
-    game = game_service.get_game(game_id)
-    if not game:
-        raise HTTPException(status_code=404, detail="Game not found")
-
-    # Check if user is already in a game
-    if current_user.current_game_id:
-        raise HTTPException(
-            status_code=400,
-            detail="User is already in a game. Leave current game first."
-        )
+    return await game_actors.run(game_id, game_service.join_game, game_id, current_user, color)
 
-    # Check if color is already taken in this game
-    existing_players = db.query(User).filter(User.current_game_id == game_id).all()
-    for player in existing_players:
-        if player.piece_color == color:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Color {color.value} is already taken in this game"
-            )
 
-    # Check if game is full
-    if len(existing_players) >= 2:
-        raise HTTPException(
-            status_code=400,
-            detail="Game is full"
-        )
-
-    # Join the game
-    current_user.current_game_id = game_id
-    current_user.piece_color = color
-    db.commit()
-    db.refresh(current_user)
-
-    return current_user
+@router.post("/{game_id}/bot", response_model=UserRead)
+async def add_bot(
+    game_id: str,
+    color: PieceColor,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add a computer opponent, with the specified color, to a game you are playing in."""
+    bot_service = BotService(db)
+    bot = await game_actors.run(game_id, bot_service.add_bot, game_id, color, current_user)
+    await schedule_bot_turn(background_tasks, db, await AsyncGameService(db).get_game(game_id))
+    return bot
 
 
 @router.post("/{game_id}/leave", response_model=UserRead)
@@ -62,35 +46,43 @@ async def leave_game(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Leave the current game."""
-    # Check if user is in this game
-    if current_user.current_game_id != game_id:
-        raise HTTPException(
-            status_code=400,
-            detail="User is not in this game"
-        )
+    """Leave the current game; bots are unseated once no human is left in it."""
+    game_service = GameService(db)
 
-    # Leave the game
-    current_user.current_game_id = None
-    current_user.piece_color = None
-    db.commit()
-    db.refresh(current_user)
+    def leave():
+        user = game_service.leave_game(game_id, current_user)
+        if BotService(db).release_bots(game_id):
+            db.refresh(user)  # Expired by the bots' commits
+        return user
 
-    return current_user
+    return await game_actors.run(game_id, leave)
 
 
 @router.get("/{game_id}/players", response_model=List[UserRead])
 async def get_game_players(
     game_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
-    """Get all players in a game."""
+    """Get all players in a game.
+
+    A request whose If-None-Match names the current players ETag gets 304
+    without a database query.
+    """
+    # Taken before the query, so a change made meanwhile always gets a new tag
+    etag = player_stamps.etag(game_id)
+    if etag is not None:
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
     # Check if game exists
-    game_service = GameService(db)
-    game = game_service.get_game(game_id)
+    game_service = AsyncGameService(db)
+    game = await game_service.get_game(game_id)
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
     # Get players
-    players = db.query(User).filter(User.current_game_id == game_id).all()
-    return players 
\ No newline at end of file
+    return await game_service.get_players(game_id) 
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db, run_db
+from app.schemas.game import Game
+from app.services.game_service import AsyncGameService
+from app.services.game_updates import batch_frame, game_updates
+from app.services.user_cache import user_cache
+
+router = APIRouter()
+
+
+@router.websocket("/ws/game/{game_id}")
+async def game_updates_socket(
+    websocket: WebSocket, game_id: str, token: str = "", db: Session = Depends(get_db)
+):
+    """Stream a game: a full snapshot on connect, then a delta for every change.
+
+    Browsers cannot set headers on WebSocket requests, so the access token is
+    passed as the `token` query parameter. Deltas that pile up while the
+    client is slow arrive together in one batch frame; a client that falls
+    too far behind is sent a new snapshot instead.
+    """
+    if not token or await user_cache.authenticate(db, token) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    async def load_snapshot():
+        """Serialized snapshot of the game and its version, or None if it is gone."""
+        game = await AsyncGameService(db).get_game(game_id)
+        # Give the connection back to the pool between snapshots
+        await run_db(db.close)
+        if game is None:
+            return None
+        frame = game_updates.snapshot_frame(
+            game_id, game.version, lambda: Game.model_validate(game).model_dump(mode="json")
+        )
+        return frame, game.version
+
+    # Subscribe before reading the snapshot so no change falls in between
+    subscription = game_updates.subscribe(game_id)
+    try:
+        snapshot = await load_snapshot()
+        if snapshot is None:
+            await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Game not found")
+            return
+
+        await websocket.accept()
+        frame, version = snapshot
+        await websocket.send_text(frame)
+
+        async def send_updates(version: int):
+            while True:
+                overflowed, batch = await subscription.next_batch()
+                if overflowed:
+                    snapshot = await load_snapshot()
+                    if snapshot is None:
+                        return
+                    frame, version = snapshot
+                    await websocket.send_text(frame)
+                frames = [frame for frame_version, frame in batch if frame_version > version]
+                if frames:
+                    version = max(frame_version for frame_version, _ in batch)
+                    await websocket.send_text(
+                        frames[0] if len(frames) == 1 else batch_frame(frames)
+                    )
+
+        sender = asyncio.create_task(send_updates(version))
+        try:
+            # Incoming messages are ignored; receiving only notices the disconnect
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+    finally:
+        game_updates.unsubscribe(subscription)
@@ -0,0 +1,121 @@
+"""Vectorized evaluation features for many positions at once.
+
+Positions are rows of an (N, 28) integer array in the BoardState slot layout
+(see app.core.board). Per-color results are (N, 2) arrays with white in
+column 0 and black in column 1.
+"""
+from typing import Any, Iterable, NamedTuple
+
+import numpy as np
+
+from app.core.board import (
+    BLACK_BAR,
+    BLACK_HOME,
+    NUM_SLOTS,
+    WHITE_BAR,
+    WHITE_HOME,
+    BoardState,
+)
+
+_POINT_NUMBERS = np.arange(1, 25)
+
+
+class PositionFeatures(NamedTuple):
+    pips: np.ndarray  # (N, 2) pip counts, bar checkers count 25
+    blots: np.ndarray  # (N, 2) points holding a single checker
+    primes: np.ndarray  # (N, 2) longest run of consecutive made points
+    bar: np.ndarray  # (N, 2) checkers on the bar
+    home: np.ndarray  # (N, 2) checkers borne off
+    race: np.ndarray  # (N,) True when the two sides can no longer hit each other
+
+
+def encode_boards(boards: Iterable[BoardState]) -> np.ndarray:
+    """Stack boards into an (N, 28) int8 position array."""
+    raw = b"".join(board.key() for board in boards)
+    return np.frombuffer(raw, dtype=np.int8).reshape(-1, NUM_SLOTS)
+
+
+def encode_states(states: Iterable[Any]) -> np.ndarray:
+    """Stack GameStates (or their dict form) into an (N, 28) position array."""
+    return encode_boards(BoardState.from_state(state) for state in states)
+
+
+def _longest_run(made: np.ndarray) -> np.ndarray:
+    """Length of the longest run of True values in each row."""
+    run = np.zeros(made.shape[0], dtype=np.int16)
+    best = np.zeros(made.shape[0], dtype=np.int16)
+    for column in made.T:
+        run = np.where(column, run + 1, 0)
+        np.maximum(best, run, out=best)
+    return best
+
+
+def evaluate_batch(positions: np.ndarray) -> PositionFeatures:
+    """Compute evaluation features for every row of an (N, 28) array."""
+    positions = np.asarray(positions, dtype=np.int16)
+    if positions.ndim != 2 or positions.shape[1] != NUM_SLOTS:
+        raise ValueError(f"Expected an (N, {NUM_SLOTS}) array, got {positions.shape}")
+
+    points = positions[:, 1:25]
+    white = np.clip(points, 0, None)
+    black = np.clip(-points, 0, None)
+    white_bar = positions[:, WHITE_BAR]
+    black_bar = positions[:, BLACK_BAR]
+
+    # White moves down towards point 1, black up towards point 24
+    pips = np.stack([
+        white @ _POINT_NUMBERS + 25 * white_bar,
+        black @ (25 - _POINT_NUMBERS) + 25 * black_bar,
+    ], axis=1)
+    blots = np.stack([(points == 1).sum(axis=1), (points == -1).sum(axis=1)], axis=1)
+    primes = np.stack([_longest_run(points >= 2), _longest_run(points <= -2)], axis=1)
+    bar = np.stack([white_bar, black_bar], axis=1)
+    home = np.stack([positions[:, WHITE_HOME], positions[:, BLACK_HOME]], axis=1)
+
+    # Farthest-back checker of each side, counting the bar as beyond the board
+    white_back = np.where(white_bar > 0, 25, np.where(white > 0, _POINT_NUMBERS, 0).max(axis=1))
+    black_back = np.where(
+        black_bar > 0, 0, np.where(black > 0, _POINT_NUMBERS, 25).min(axis=1)
+    )
+    race = white_back < black_back
+
+    return PositionFeatures(pips, blots, primes, bar, home, race)
+
+
+def evaluate_board(board: BoardState) -> PositionFeatures:
+    """Per-position reference implementation of evaluate_batch.
+
+    Returns the same fields for a single board as plain Python values, with
+    per-color fields as (white, black) tuples.
+    """
+    cells = board.cells
+    pips = [25 * cells[WHITE_BAR], 25 * cells[BLACK_BAR]]
+    blots = [0, 0]
+    primes = [0, 0]
+    runs = [0, 0]
+    white_back = 25 if cells[WHITE_BAR] else 0
+    black_back = 0 if cells[BLACK_BAR] else 25
+    for point in range(1, 25):
+        value = cells[point]
+        if value > 0:
+            pips[0] += value * point
+            white_back = max(white_back, point)
+        elif value < 0:
+            pips[1] -= value * (25 - point)
+            black_back = min(black_back, point)
+        if value == 1:
+            blots[0] += 1
+        elif value == -1:
+            blots[1] += 1
+        runs[0] = runs[0] + 1 if value >= 2 else 0
+        runs[1] = runs[1] + 1 if value <= -2 else 0
+        primes[0] = max(primes[0], runs[0])
+        primes[1] = max(primes[1], runs[1])
+    return PositionFeatures(
+        tuple(pips),
+        tuple(blots),
+        tuple(primes),
+        (cells[WHITE_BAR], cells[BLACK_BAR]),
+        (cells[WHITE_HOME], cells[BLACK_HOME]),
+        white_back < black_back,
+    )
@@ -0,0 +1,192 @@
+"""One-sided bear-off database.
+
+The database holds, for every distribution of up to 15 checkers on the six
+home points, the expected number of rolls needed to bear all of them off
+(playing to minimize that expectation) and the probability of needing exactly
+n rolls. It is generated once into a flat binary file and memory-mapped
+read-only, so every worker process shares the same pages.
+"""
+import os
+from math import comb
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.board import BLACK_BAR, WHITE_BAR, BoardState
+from app.core.moves import ROLLS
+
+MAX_CHECKERS = 15
+HOME_POINTS = 6
+MAX_ROLLS = 32  # Last bucket also holds the (negligible) longer tail
+NUM_POSITIONS = comb(MAX_CHECKERS + HOME_POINTS, HOME_POINTS)
+
+MAGIC = b"BGBEAR01"
+HEADER = np.dtype([("magic", "S8"), ("positions", "<u4"), ("max_rolls", "<u4")])
+RECORD = np.dtype([("expected", "<f4"), ("dist", "<u2", (MAX_ROLLS,))])
+_DIST_SCALE = 65535
+
+Position = Tuple[int, ...]
+
+
+def position_index(counts: Sequence[int]) -> int:
+    """Rank of a home board distribution, with counts[0] on the ace point.
+
+    The distribution plus the checkers already off form a composition of 15
+    into 7 parts, ranked in the combinatorial number system.
+    """
+    index = 0
+    total = 0
+    for i, count in enumerate(counts):
+        total += count
+        index += comb(total + i, i + 1)
+    return index
+
+
+def home_counts(board: BoardState, color: str) -> Optional[Position]:
+    """Home board distribution of one side, or None if it is not bearing off."""
+    cells = board.cells
+    if color == "white":
+        if cells[WHITE_BAR] or any(cells[p] > 0 for p in range(7, 25)):
+            return None
+        return tuple(max(cells[p], 0) for p in range(1, 7))
+    if cells[BLACK_BAR] or any(cells[p] < 0 for p in range(1, 19)):
+        return None
+    return tuple(max(-cells[p], 0) for p in range(24, 18, -1))
+
+
+def _step(position: Position, die: int) -> List[Position]:
+    """Positions reachable by playing one die (all checkers are home)."""
+    highest = max((i for i, count in enumerate(position) if count), default=-1)
+    if highest < 0:
+        return [position]
+    results = []
+    for i in range(highest + 1):
+        if not position[i]:
+            continue
+        target = i - die
+        # A die larger than needed only bears off from the highest point
+        if target < -1 and i != highest:
+            continue
+        moved = list(position)
+        moved[i] -= 1
+        if target >= 0:
+            moved[target] += 1
+        results.append(tuple(moved))
+    return results
+
+
+def _finals(position: Position, roll: Tuple[int, int]) -> set:
+    die1, die2 = roll
+    orders = [(die1,) * 4] if die1 == die2 else [(die1, die2), (die2, die1)]
+    finals = set()
+    for dice in orders:
+        frontier = {position}
+        for die in dice:
+            frontier = {after for current in frontier for after in _step(current, die)}
+        finals |= frontier
+    return finals
+
+
+def _all_positions() -> List[Position]:
+    positions = []
+
+    def fill(prefix: List[int], left: int) -> None:
+        if len(prefix) == HOME_POINTS:
+            positions.append(tuple(prefix))
+            return
+        for count in range(left + 1):
+            fill(prefix + [count], left - count)
+
+    fill([], MAX_CHECKERS)
+    return positions
+
+
+def build_table() -> np.ndarray:
+    """Solve every position; returns a structured array indexed by position_index."""
+    positions = _all_positions()
+    # Every move lowers the pip count, so successors are always solved first
+    positions.sort(key=lambda pos: sum(count * (i + 1) for i, count in enumerate(pos)))
+
+    expected: Dict[Position, float] = {}
+    dists: Dict[Position, np.ndarray] = {}
+    empty = (0,) * HOME_POINTS
+    expected[empty] = 0.0
+    dists[empty] = np.zeros(MAX_ROLLS)
+    dists[empty][0] = 1.0
+
+    for position in positions:
+        if position == empty:
+            continue
+        total = 0.0
+        dist = np.zeros(MAX_ROLLS)
+        for roll, weight in ROLLS:
+            best = min(_finals(position, roll), key=expected.__getitem__)
+            total += weight * expected[best]
+            shifted = dists[best]
+            dist[1:] += weight * shifted[:-1]
+            dist[-1] += weight * shifted[-1]
+        expected[position] = 1.0 + total / 36.0
+        dists[position] = dist / 36.0
+
+    table = np.zeros(NUM_POSITIONS, dtype=RECORD)
+    for position in positions:
+        index = position_index(position)
+        table[index]["expected"] = expected[position]
+        table[index]["dist"] = np.rint(dists[position] * _DIST_SCALE)
+    return table
+
+
+def write_database(path: str, table: np.ndarray) -> None:
+    """Write a generated table to disk, replacing any existing file atomically."""
+    header = np.array([(MAGIC, NUM_POSITIONS, MAX_ROLLS)], dtype=HEADER)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(table.tobytes())
+    os.replace(tmp_path, path)
+
+
+class BearoffDatabase:
+    """Read-only, memory-mapped view of a generated bear-off database."""
+
+    def __init__(self, path: str):
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if not len(header) or header[0]["magic"] != MAGIC:
+            raise ValueError(f"{path} is not a bear-off database")
+        if header[0]["positions"] != NUM_POSITIONS or header[0]["max_rolls"] != MAX_ROLLS:
+            raise ValueError(f"{path} has an unsupported layout")
+        self.path = path
+        self.table = np.memmap(
+            path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(NUM_POSITIONS,)
+        )
+
+    def expected_rolls(self, counts: Sequence[int]) -> float:
+        """Expected rolls to bear off a home board distribution."""
+        return float(self.table[position_index(counts)]["expected"])
+
+    def roll_distribution(self, counts: Sequence[int]) -> np.ndarray:
+        """Probability of bearing off in exactly n rolls, for n in 0..MAX_ROLLS-1."""
+        return self.table[position_index(counts)]["dist"] / _DIST_SCALE
+
+    def lookup(self, board: BoardState, color: str) -> Optional[float]:
+        """Expected rolls for one side of a board, or None if it is not bearing off."""
+        counts = home_counts(board, color)
+        if counts is None:
+            return None
+        return self.expected_rolls(counts)
+
+
+_database: Optional[BearoffDatabase] = None
+
+
+def load_database(path: str) -> Optional[BearoffDatabase]:
+    """Map the database at `path` for this process; missing files are skipped."""
+    global _database
+    if os.path.exists(path):
+        _database = BearoffDatabase(path)
+    return _database
+
+
+def get_database() -> Optional[BearoffDatabase]:
+    """The database loaded at startup, if any."""
+    return _database
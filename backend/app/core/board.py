@@ -0,0 +1,271 @@
+"""Compact board representation used internally by the game engine."""
+from array import array
+import random
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+# Slot layout of the 28-slot board array. Points hold a signed checker count
+# (positive for white, negative for black); bars and homes hold plain counts.
+BLACK_BAR = 0  # Black enters from here and moves up the board
+WHITE_BAR = 25  # White enters from here and moves down the board
+WHITE_HOME = 26
+BLACK_HOME = 27
+NUM_SLOTS = 28
+POINTS = range(1, 25)
+
+# Off-board locations as used by MoveRequest.from_point / to_point
+API_BAR = -1
+API_WHITE_HOME = 25
+API_BLACK_HOME = 26
+
+COLORS = ("white", "black")
+_SIGN = {"white": 1, "black": -1}
+_BAR_SLOT = {"white": WHITE_BAR, "black": BLACK_BAR}
+_HOME_SLOT = {"white": WHITE_HOME, "black": BLACK_HOME}
+
+# Zobrist keys, one per slot and signed slot value. The generator is seeded so
+# hashes are stable across processes and can be persisted. An empty slot
+# contributes nothing, so the empty board hashes to 0.
+_ZOBRIST_OFFSET = 128
+_zobrist_rng = random.Random(0x5EED_BAC6)
+ZOBRIST = [
+    [0 if value == _ZOBRIST_OFFSET else _zobrist_rng.getrandbits(64) for value in range(256)]
+    for _ in range(NUM_SLOTS)
+]
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+def opponent(color: str) -> str:
+    """Return the color of the other player."""
+    return "black" if color == "white" else "white"
+
+
+def bar_slot(color: str) -> int:
+    return _BAR_SLOT[color]
+
+
+def home_slot(color: str) -> int:
+    return _HOME_SLOT[color]
+
+
+def slot_for_point(point: int, color: str) -> Optional[int]:
+    """Map an API point number to a board slot, or None if it is not a location."""
+    if 1 <= point <= 24:
+        return point
+    if point == API_BAR:
+        return _BAR_SLOT[color]
+    if point == API_WHITE_HOME:
+        return WHITE_HOME
+    if point == API_BLACK_HOME:
+        return BLACK_HOME
+    return None
+
+
+def point_for_slot(slot: int) -> int:
+    """Map a board slot back to its API point number."""
+    if 1 <= slot <= 24:
+        return slot
+    if slot == WHITE_HOME:
+        return API_WHITE_HOME
+    if slot == BLACK_HOME:
+        return API_BLACK_HOME
+    return API_BAR
+
+
+def _full_hash(cells: array) -> int:
+    h = 0
+    for slot, value in enumerate(cells):
+        if value:
+            h ^= ZOBRIST[slot][value + _ZOBRIST_OFFSET]
+    return h
+
+
+def validate_checker_counts(state: Mapping[str, Any], limit: int = 15) -> None:
+    """Raise ValueError unless each side of a state dict has 0 to `limit` checkers."""
+    totals = dict.fromkeys(COLORS, 0)
+    counts = []
+    for key, point in (state.get("points") or {}).items():
+        if not isinstance(point, Mapping) or point.get("color") not in COLORS:
+            raise ValueError(f"Point {key} needs a color of white or black")
+        counts.append((point["color"], point.get("count", 0), f"point {key}"))
+    for field in ("bar", "home"):
+        slots = state.get(field) or {}
+        if not isinstance(slots, Mapping):
+            raise ValueError(f"{field} must map colors to counts")
+        counts.extend((color, slots.get(color, 0), f"{field} {color}") for color in COLORS)
+    for color, count, where in counts:
+        if type(count) is not int or not 0 <= count <= limit:
+            raise ValueError(f"Invalid checker count on {where}: {count!r}")
+        totals[color] += count
+    for color, total in totals.items():
+        if total > limit:
+            raise ValueError(f"{color} has more than {limit} checkers")
+
+
+def position_hash_hex(state: Mapping[str, Any]) -> str:
+    """Zobrist position hash of a full GameState dict as 16 hex digits."""
+    board = BoardState.from_state(state)
+    return f"{board.position_hash(state['current_turn']):016x}"
+
+
+class BoardState:
+    """Immutable checker layout backed by a fixed 28-slot signed byte array.
+
+    Moves never mutate a board in place; they return a new instance, so a
+    board can be shared freely between the engine, caches and callers.
+    """
+
+    __slots__ = ("_cells", "_hash")
+
+    def __init__(self, cells: Optional[Iterable[int]] = None):
+        self._cells = array("b", cells) if cells is not None else array("b", bytes(NUM_SLOTS))
+        if len(self._cells) != NUM_SLOTS:
+            raise ValueError(f"Board must have {NUM_SLOTS} slots")
+        self._hash = _full_hash(self._cells)
+
+    @classmethod
+    def from_state(cls, state: Any) -> "BoardState":
+        """Build a board from a GameState or its dict form (int or str point keys)."""
+        if hasattr(state, "model_dump"):
+            state = state.model_dump()
+        cells = array("b", bytes(NUM_SLOTS))
+        for key, point in (state.get("points") or {}).items():
+            if hasattr(point, "model_dump"):
+                point = point.model_dump()
+            count = point.get("count", 0)
+            if count <= 0:
+                continue
+            index = int(key)
+            if index not in POINTS:
+                raise ValueError(f"Invalid point {key}")
+            cells[index] = count * _SIGN[point["color"]]
+        bar = state.get("bar") or {}
+        home = state.get("home") or {}
+        for color in COLORS:
+            cells[_BAR_SLOT[color]] = bar.get(color, 0)
+            cells[_HOME_SLOT[color]] = home.get(color, 0)
+        board = cls.__new__(cls)
+        board._cells = cells
+        board._hash = _full_hash(cells)
+        return board
+
+    def to_state(self) -> Dict[str, Any]:
+        """Return the points/bar/home fields of the GameState dict form."""
+        cells = self._cells
+        points = {}
+        for index in POINTS:
+            value = cells[index]
+            if value > 0:
+                points[str(index)] = {"color": "white", "count": value}
+            elif value < 0:
+                points[str(index)] = {"color": "black", "count": -value}
+        return {
+            "points": points,
+            "bar": {"white": cells[WHITE_BAR], "black": cells[BLACK_BAR]},
+            "home": {"white": cells[WHITE_HOME], "black": cells[BLACK_HOME]},
+        }
+
+    def merge_into(self, state: Mapping[str, Any]) -> Dict[str, Any]:
+        """Return a copy of a full state dict with this board's checkers."""
+        new_state = dict(state)
+        new_state.update(self.to_state())
+        return new_state
+
+    @property
+    def cells(self) -> array:
+        """Raw slot array; callers must treat it as read-only."""
+        return self._cells
+
+    def point(self, index: int) -> int:
+        """Signed checker count on a point (positive white, negative black)."""
+        return self._cells[index]
+
+    def count(self, slot: int, color: str) -> int:
+        """Number of `color` checkers in a slot."""
+        value = self._cells[slot]
+        if 1 <= slot <= 24:
+            value *= _SIGN[color]
+            return value if value > 0 else 0
+        if slot in (WHITE_BAR, WHITE_HOME):
+            return value if color == "white" else 0
+        return value if color == "black" else 0
+
+    def checkers(self, color: str) -> int:
+        """All of `color`'s checkers: on the points, on the bar and borne off."""
+        return sum(self.count(slot, color) for slot in range(NUM_SLOTS))
+
+    def bar(self, color: str) -> int:
+        return self._cells[_BAR_SLOT[color]]
+
+    def home(self, color: str) -> int:
+        return self._cells[_HOME_SLOT[color]]
+
+    def is_blocked(self, index: int, color: str) -> bool:
+        """True if a point holds two or more opponent checkers."""
+        return self._cells[index] * _SIGN[color] <= -2
+
+    def move(self, src: int, dst: int, color: str) -> "BoardState":
+        """Move one `color` checker between slots, hitting a lone opponent checker.
+
+        Off-board slots (bars and homes) are plain counters, so the caller is
+        responsible for passing slots that make sense for `color`. The Zobrist
+        hash is updated for the touched slots only.
+        """
+        cells = array("b", self._cells)
+        h = self._hash
+        sign = _SIGN[color]
+        old = cells[src]
+        new = old - sign if 1 <= src <= 24 else old - 1
+        cells[src] = new
+        h ^= ZOBRIST[src][old + _ZOBRIST_OFFSET] ^ ZOBRIST[src][new + _ZOBRIST_OFFSET]
+        old = cells[dst]
+        if 1 <= dst <= 24:
+            if old == -sign:
+                bar = _BAR_SLOT[opponent(color)]
+                bar_count = cells[bar]
+                cells[bar] = bar_count + 1
+                h ^= (
+                    ZOBRIST[bar][bar_count + _ZOBRIST_OFFSET]
+                    ^ ZOBRIST[bar][bar_count + 1 + _ZOBRIST_OFFSET]
+                )
+                new = sign
+            else:
+                new = old + sign
+        else:
+            new = old + 1
+        cells[dst] = new
+        h ^= ZOBRIST[dst][old + _ZOBRIST_OFFSET] ^ ZOBRIST[dst][new + _ZOBRIST_OFFSET]
+        board = BoardState.__new__(BoardState)
+        board._cells = cells
+        board._hash = h
+        return board
+
+    @property
+    def zobrist(self) -> int:
+        """64-bit Zobrist hash of the checker layout."""
+        return self._hash
+
+    def position_hash(self, color: str) -> int:
+        """Zobrist hash of the layout together with the side to move."""
+        return self._hash ^ ZOBRIST_BLACK_TO_MOVE if color == "black" else self._hash
+
+    def key(self) -> bytes:
+        """Compact 28-byte identity of the checker layout."""
+        return self._cells.tobytes()
+
+    @classmethod
+    def from_key(cls, key: bytes) -> "BoardState":
+        """Inverse of key()."""
+        cells = array("b")
+        cells.frombytes(key)
+        return cls(cells)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, BoardState):
+            return NotImplemented
+        return self._cells == other._cells
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"BoardState({self._cells.tolist()})"
@@ -14,17 +14,75 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///backgammon.db"
+    DATABASE_WORKERS: int = 8  # Threads running blocking queries for async handlers
+    DATABASE_POOL_SIZE: int = 10  # Connections kept open; at least DATABASE_WORKERS
+    DATABASE_MAX_OVERFLOW: int = 10  # Extra connections opened under load
+    DATABASE_POOL_RECYCLE_SECONDS: int = 1800  # Reopen connections older than this
+    DATABASE_POOL_TIMEOUT_SECONDS: int = 30  # Wait for a free connection before failing
+    DATABASE_POOL_PRE_PING: bool = True  # Check connections on checkout
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # Wait this long for a lock instead of failing
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # Bytes of the file read through mmap
 
     # Security
     SECRET_KEY: str = secrets.token_urlsafe(32)
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Put username, verified flag and game seat in access tokens, as of issue time
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = False
+    USER_CACHE_SIZE: int = 10_000  # Tokens and users remembered per process
+    USER_CACHE_TTL_SECONDS: int = 60  # Longest a change on another worker goes unseen
     ALGORITHM: str = "HS256"
     
+    # Password hashing (bcrypt) runs in its own threads
+    PASSWORD_HASH_WORKERS: int = 2  # Hashes computed at once
+    PASSWORD_HASH_QUEUE: int = 32  # Hashes waiting before requests get 503
+
     # Rate limiting
+    RATE_LIMIT_BACKEND: str = "sqlite"  # "sqlite" to share limits between workers, or "memory"
+    RATE_LIMIT_SQLITE_PATH: str = "rate_limits.db"
     LOGIN_RATE_LIMIT: str = "5/minute"
     REGISTER_RATE_LIMIT: str = "3/minute"
     
+    # Game engine
+    LEGAL_PLAYS_CACHE_SIZE: int = 65536
+    BEAROFF_DB_PATH: str = "bearoff.bin"  # Built with build_bearoff_db.py
+    GAME_SNAPSHOT_INTERVAL: int = 32  # Events between full state snapshots
+    GAME_WRITE_ATTEMPTS: int = 3  # Tries at a write that keeps losing version races
+
+    # Per-game actors serializing state changes
+    GAME_ACTOR_IDLE_SECONDS: int = 30  # Empty-mailbox time before an actor is reaped
+    GAME_ACTOR_MAILBOX_SIZE: int = 100  # Senders wait once this many operations are queued
+
+    # Live updates
+    BROADCAST_SUBSCRIBER_QUEUE: int = 64  # Backlog before a subscriber is resnapshotted
+
+    # Active games held in memory, with write-behind persistence
+    ACTIVE_GAME_MAX: int = 10_000
+    ACTIVE_GAME_TTL_SECONDS: int = 900  # Idle time before a game is evicted
+    ACTIVE_GAME_FLUSH_INTERVAL_MS: int = 200  # Longest time an event waits to be written
+    ACTIVE_GAME_FLUSH_BATCH: int = 500  # Pending events that trigger an early flush
+    ACTIVE_GAME_LOCK_PATH: str = "active_games.lock"  # Held by the one process serving games
+
+    # Dice
+    DICE_ENTROPY_BUFFER_BYTES: int = 4096  # Read from os.urandom at a time
+    DICE_HISTORY_FLUSH_INTERVAL_MS: int = 1000  # Longest a roll waits to be written
+    DICE_HISTORY_FLUSH_BATCH: int = 256  # Buffered rolls that trigger an early write
+
+    # Computer opponent
+    BOT_MOVE_BUDGET_MS: int = 300
+    BOT_MAX_DEPTH: int = 2
+    BOT_SEARCH_WIDTH: int = 6
+    BOT_SEARCH_WORKERS: int = 4  # Processes, each with its own transposition table
+    BOT_TRANSPOSITION_TABLE_SIZE: int = 200_000
+
+    # Rollouts
+    ROLLOUT_WORKERS: int = 4
+    ROLLOUT_DEFAULT_TRIALS: int = 1296
+    ROLLOUT_MAX_TRIALS: int = 20_000
+    ROLLOUT_CACHE_SIZE: int = 4096
+
     # Password policy
     MIN_PASSWORD_LENGTH: int = 8
     REQUIRE_SPECIAL_CHAR: bool = True
@@ -44,6 +102,15 @@ class Settings(BaseSettings):
     MAIL_SERVER: str = "smtp.gmail.com"
     MAIL_SSL_TLS: bool = False
     MAIL_STARTTLS: bool = True
+    # Delivery from the outbox table, see app/services/email_worker.py
+    EMAIL_BATCH_SIZE: int = 50  # Messages claimed per pass
+    EMAIL_POLL_SECONDS: float = 5  # Outbox check when no commit wakes the worker
+    EMAIL_MAX_ATTEMPTS: int = 8  # Tries before a message is marked failed
+    EMAIL_RETRY_BASE_SECONDS: float = 30  # First retry delay, doubled after each failure
+    EMAIL_RETRY_MAX_SECONDS: float = 3600
+    EMAIL_LEASE_SECONDS: float = 300  # Claimed messages not reported by then are resent
+    EMAIL_SMTP_IDLE_SECONDS: float = 30  # Close the SMTP connection after this long unused
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 30
 
     class Config:
         case_sensitive = True
@@ -1,16 +1,82 @@
-from sqlalchemy import create_engine
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./backgammon.db"
+from app.core.config import settings
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # WAL lets readers carry on while a write commits; NORMAL only syncs at
+    # checkpoints, which WAL keeps safe against corruption
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def create_db_engine(url: str) -> Engine:
+    """Engine for `url` with the configured connection pool.
+
+    SQLite connections get the SQLITE_* pragmas as they are opened. In-memory
+    SQLite databases keep SQLAlchemy's default single-connection pooling.
+    """
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DATABASE_POOL_PRE_PING}
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+    if backend != "sqlite" or make_url(url).database not in (None, "", ":memory:"):
+        options.update(
+            poolclass=QueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_recycle=settings.DATABASE_POOL_RECYCLE_SECONDS,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT_SECONDS,
+        )
+    db_engine = create_engine(url, **options)
+    if backend == "sqlite":
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+
+def pool_stats(db_engine: Engine) -> Dict[str, Any]:
+    """Connection pool occupancy, for monitoring."""
+    pool = db_engine.pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    return stats
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+T = TypeVar("T")
+
+# Blocking database work of async handlers runs here, off the event loop. One
+# session is only ever used by one thread at a time, so handing it between
+# these threads and the request is safe.
+_db_executor = ThreadPoolExecutor(
+    max_workers=settings.DATABASE_WORKERS, thread_name_prefix="db"
+)
+
 
 # Dependency
 def get_db():
@@ -19,3 +85,30 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def run_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking database call in a database worker thread and await it."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, functools.partial(fn, *args, **kwargs))
+
+
+class AsyncService:
+    """Async variant of a sync service: every method call runs through run_db.
+
+    Subclasses name the service they wrap in `service_class`; `sync` is the
+    wrapped instance, for calls that need no database.
+    """
+
+    service_class: type
+
+    def __init__(self, db: Session):
+        self.sync = self.service_class(db)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        method = getattr(self.sync, name)
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await run_db(method, *args, **kwargs)
+
+        return call
@@ -0,0 +1,41 @@
+"""Dice rolled from the operating system's CSPRNG.
+
+Rolls come from os.urandom, so they cannot be predicted from earlier rolls
+the way the Mersenne Twister behind `random` can. Entropy is read
+DICE_ENTROPY_BUFFER_BYTES at a time and a roll of both dice uses one byte:
+bytes below 252, the largest multiple of 36 under 256, map onto the 36
+outcomes without bias and the rest are rejected, so about 1.6% of bytes
+are skipped.
+"""
+import os
+import threading
+from typing import Tuple
+
+from app.core.config import settings
+
+_OUTCOMES = 36
+_LIMIT = 256 - 256 % _OUTCOMES  # 252
+
+
+class SecureDice:
+    def __init__(self, buffer_size: int = settings.DICE_ENTROPY_BUFFER_BYTES):
+        self.buffer_size = buffer_size
+        self._buffer = b""
+        self._pos = 0
+        self._lock = threading.Lock()  # Rolls come from several worker threads
+
+    def roll(self) -> Tuple[int, int]:
+        """Two independent, uniform dice."""
+        with self._lock:
+            while True:
+                if self._pos >= len(self._buffer):
+                    self._buffer = os.urandom(self.buffer_size)
+                    self._pos = 0
+                byte = self._buffer[self._pos]
+                self._pos += 1
+                if byte < _LIMIT:
+                    outcome = byte % _OUTCOMES
+                    return outcome // 6 + 1, outcome % 6 + 1
+
+
+secure_dice = SecureDice()
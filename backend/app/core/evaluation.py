@@ -0,0 +1,104 @@
+"""Heuristic position evaluation shared by the bot, rollouts and self-play."""
+from math import tanh
+from typing import Iterable, Optional, Tuple
+
+from app.core.batch_eval import evaluate_board
+from app.core.bearoff import get_database
+from app.core.board import WHITE_HOME, BLACK_HOME, BoardState, opponent
+from app.core.moves import Play, legal_plays
+
+CHECKERS_PER_SIDE = 15
+
+# Weights of the contact evaluation, per unit of feature difference
+PIP_WEIGHT = 0.015
+BLOT_WEIGHT = 0.08
+PRIME_WEIGHT = 0.06
+BAR_WEIGHT = 0.12
+HOME_WEIGHT = 0.04
+
+
+def game_result(board: BoardState) -> Optional[Tuple[str, int]]:
+    """Winner and points won (1 single, 2 gammon, 3 backgammon), or None."""
+    cells = board.cells
+    for winner, home in (("white", WHITE_HOME), ("black", BLACK_HOME)):
+        if cells[home] < CHECKERS_PER_SIDE:
+            continue
+        loser = opponent(winner)
+        if board.home(loser):
+            return winner, 1
+        # A checker on the bar or in the winner's home board is a backgammon
+        if winner == "white":
+            trapped = board.bar("black") or any(cells[p] < 0 for p in range(1, 7))
+        else:
+            trapped = board.bar("white") or any(cells[p] > 0 for p in range(19, 25))
+        return winner, 3 if trapped else 2
+    return None
+
+
+def evaluate(board: BoardState, color: str) -> float:
+    """Estimated equity of a board for `color`, who has just moved.
+
+    Finished games score their exact points; otherwise the value lies in
+    (-1, 1). Pure races use the bear-off database when both sides are home.
+    """
+    result = game_result(board)
+    if result is not None:
+        winner, points = result
+        return points if winner == color else -points
+
+    features = evaluate_board(board)
+    me, them = (0, 1) if color == "white" else (1, 0)
+
+    if features.race:
+        database = get_database()
+        if database is not None:
+            my_rolls = database.lookup(board, color)
+            their_rolls = database.lookup(board, opponent(color))
+            if my_rolls is not None and their_rolls is not None:
+                # The opponent is on roll, which is worth about half a roll
+                return tanh(0.8 * (their_rolls - my_rolls - 0.5))
+        pips = features.pips
+        return tanh(4.0 * (pips[them] - pips[me] - 4) / max(pips[me] + pips[them], 1))
+
+    score = (
+        PIP_WEIGHT * (features.pips[them] - features.pips[me])
+        + BLOT_WEIGHT * (features.blots[them] - features.blots[me])
+        + PRIME_WEIGHT * (features.primes[me] - features.primes[them])
+        + BAR_WEIGHT * (features.bar[them] - features.bar[me])
+        + HOME_WEIGHT * (features.home[me] - features.home[them])
+    )
+    return tanh(score)
+
+
+def _tie_break(board: BoardState, color: str) -> Tuple[int, ...]:
+    """Color-symmetric layout seen from `color`, farthest point first.
+
+    Equal evaluations are common; ordering them by this (smaller first, so
+    back checkers get moved) keeps both colors playing the same way instead
+    of following the move generator's slot order.
+    """
+    cells = board.cells
+    if color == "white":
+        return tuple(cells[p] for p in range(24, 0, -1))
+    return tuple(-cells[p] for p in range(1, 25))
+
+
+def rank_plays(
+    board: BoardState, color: str, dice: Iterable[int]
+) -> list[Tuple[float, Play, BoardState]]:
+    """Legal plays with their 0-ply evaluation, best first."""
+    legal = legal_plays(board, color, dice)
+    ranked = [(evaluate(result, color), play, result) for result, play in legal.plays.items()]
+    ranked.sort(key=lambda item: _tie_break(item[2], color))
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked
+
+
+def greedy_play(board: BoardState, color: str, dice: Iterable[int]) -> Tuple[Play, BoardState]:
+    """The play with the best 0-ply evaluation; the fast built-in policy."""
+    legal = legal_plays(board, color, dice)
+    best = min(
+        legal.plays,
+        key=lambda result: (-evaluate(result, color), _tie_break(result, color)),
+    )
+    return legal.plays[best], best
@@ -0,0 +1,78 @@
+"""Game events and the fold that turns them back into a game state.
+
+A game is stored as a snapshot of its state plus an append-only log of small
+events. Events are plain dicts with a "type" key so they serialize straight
+into the game_events table and over the wire:
+
+    roll      {"dice": [d1, d2]}                       dice rolled by the player on roll
+    move      {"color", "from", "to", "die"}           one checker move, in API points
+    turn_end  {"next": color}                           dice cleared, turn passes
+    state     {"state": {...}}                          full state written through PUT /state
+"""
+import copy
+from typing import Iterable
+
+from app.core.board import BoardState, slot_for_point
+
+ROLL = "roll"
+MOVE = "move"
+TURN_END = "turn_end"
+STATE = "state"
+
+EVENT_TYPES = (ROLL, MOVE, TURN_END, STATE)
+
+
+def roll_event(dice: Iterable[int]) -> dict:
+    return {"type": ROLL, "dice": list(dice)}
+
+
+def move_event(color: str, from_point: int, to_point: int, die: int) -> dict:
+    return {"type": MOVE, "color": color, "from": from_point, "to": to_point, "die": die}
+
+
+def turn_end_event(next_color: str) -> dict:
+    return {"type": TURN_END, "next": next_color}
+
+
+def state_event(state: dict) -> dict:
+    return {"type": STATE, "state": state}
+
+
+def apply_event(state: dict, event: dict) -> dict:
+    """Return the state after one event; the input state is not modified."""
+    kind = event["type"]
+    if kind == STATE:
+        return copy.deepcopy(event["state"])
+    if kind == ROLL:
+        return dict(state, dice_state={"values": list(event["dice"]), "used_values": []})
+    if kind == TURN_END:
+        return dict(
+            state,
+            current_turn=event["next"],
+            dice_state={"values": None, "used_values": []},
+        )
+    if kind == MOVE:
+        color = event["color"]
+        board = BoardState.from_state(state).move(
+            slot_for_point(event["from"], color), slot_for_point(event["to"], color), color
+        )
+        new_state = board.merge_into(state)
+        dice_state = state["dice_state"]
+        new_state["dice_state"] = {
+            "values": dice_state["values"],
+            "used_values": list(dice_state["used_values"]) + [event["die"]],
+        }
+        return new_state
+    raise ValueError(f"Unknown game event type: {kind}")
+
+
+def fold(state: dict, events: Iterable[dict]) -> dict:
+    """Replay events in order on top of a snapshot."""
+    for event in events:
+        state = apply_event(state, event)
+    return state
+
+
+def event_payload(event: dict) -> dict:
+    """The event without its type, as stored in the data column."""
+    return {key: value for key, value in event.items() if key != "type"}
@@ -0,0 +1,237 @@
+"""GNU Backgammon Position ID and Match ID encoding.
+
+A Position ID is the 10-byte (80-bit) gnubg position key in base64 without
+padding, 14 characters. The key is written as seen by the player on roll:
+the opponent's checkers first, then the player on roll's, each as 25 entries
+from that side's ace point up to its 24 point and then the bar. Every entry
+is its checker count in 1-bits followed by a 0-bit, filled in from the least
+significant bit of the first byte. Borne-off checkers are not stored.
+
+Here white's ace point is point 1 and black's is point 24, so the same
+position has a different ID depending on who is on roll.
+
+A Match ID is the 9-byte gnubg match key in base64, 12 characters, holding
+the cube, the dice, whose turn it is and the match score. gnubg's player 0
+is white and player 1 is black. Games here are unlimited money games with
+no cube, so the cube is always 1 and centered and the match length 0.
+"""
+import base64
+from typing import Any, Mapping, NamedTuple, Optional, Tuple
+
+from app.core.board import (
+    BLACK_BAR,
+    BLACK_HOME,
+    COLORS,
+    NUM_SLOTS,
+    WHITE_BAR,
+    WHITE_HOME,
+    BoardState,
+    opponent,
+)
+
+POSITION_KEY_BYTES = 10
+POSITION_ID_LENGTH = 14
+MATCH_KEY_BYTES = 9
+MATCH_ID_LENGTH = 12
+CHECKERS = 15
+
+# Game states of the Match ID
+GAME_NONE = 0
+GAME_PLAYING = 1
+GAME_OVER = 2
+GAME_RESIGNED = 3
+GAME_DROPPED = 4
+
+# (bit offset, width) of each Match ID field
+_CUBE = (0, 4)  # log2 of the cube value
+_CUBE_OWNER = (4, 2)  # player, or 3 when centered
+_ON_ROLL = (6, 1)
+_CRAWFORD = (7, 1)
+_GAME_STATE = (8, 3)
+_TURN = (11, 1)  # player who has to act: roll, move or answer an offer
+_DOUBLED = (12, 1)
+_RESIGNED = (13, 2)
+_DIE_1 = (15, 3)
+_DIE_2 = (18, 3)
+_MATCH_LENGTH = (21, 15)
+_SCORE_0 = (36, 15)
+_SCORE_1 = (51, 15)
+_CENTERED = 3
+
+
+def _slots(color: str) -> Tuple[int, ...]:
+    """Board slots of one side's 25 key entries: its ace point to 24 point, then the bar."""
+    if color == "white":
+        return tuple(range(1, 25)) + (WHITE_BAR,)
+    return tuple(range(24, 0, -1)) + (BLACK_BAR,)
+
+
+_KEY_SLOTS = {color: _slots(color) for color in COLORS}
+
+
+def _b64decode(text: str, length: int, size: int) -> bytes:
+    if len(text) != length:
+        raise ValueError(f"ID must be {length} characters")
+    try:
+        return base64.b64decode(text + "=" * (-length % 4), validate=True)[:size]
+    except ValueError:
+        raise ValueError("ID is not valid base64") from None
+
+
+def position_key(board: BoardState, color: str) -> bytes:
+    """The 10-byte gnubg key of a board with `color` on roll."""
+    bits = 0
+    offset = 0
+    for side in (opponent(color), color):
+        start = offset
+        for slot in _KEY_SLOTS[side]:
+            count = board.count(slot, side)
+            bits |= ((1 << count) - 1) << offset
+            offset += count + 1
+        if offset - start - len(_KEY_SLOTS[side]) > CHECKERS:
+            raise ValueError(f"{side} has more than {CHECKERS} checkers")
+    return bits.to_bytes(POSITION_KEY_BYTES, "little")
+
+
+def board_from_position_key(key: bytes, color: str) -> BoardState:
+    """Inverse of position_key(); checkers missing from the key are borne off."""
+    if len(key) != POSITION_KEY_BYTES:
+        raise ValueError(f"Position key must be {POSITION_KEY_BYTES} bytes")
+    bits = int.from_bytes(key, "little")
+    cells = [0] * NUM_SLOTS
+    offset = 0
+    for side in (opponent(color), color):
+        sign = 1 if side == "white" else -1
+        total = 0
+        for slot in _KEY_SLOTS[side]:
+            count = 0
+            while bits >> offset & 1:
+                count += 1
+                offset += 1
+            offset += 1
+            if offset > POSITION_KEY_BYTES * 8:
+                raise ValueError("Position key is truncated")
+            total += count
+            if not count:
+                continue
+            if slot in (WHITE_BAR, BLACK_BAR):
+                cells[slot] = count
+            elif cells[slot]:
+                raise ValueError(f"Both sides have checkers on point {slot}")
+            else:
+                cells[slot] = count * sign
+        if total > CHECKERS:
+            raise ValueError(f"{side} has more than {CHECKERS} checkers")
+        cells[WHITE_HOME if side == "white" else BLACK_HOME] = CHECKERS - total
+    if bits >> offset:
+        raise ValueError("Position key has trailing checkers")
+    return BoardState(cells)
+
+
+def position_id(board: BoardState, color: str) -> str:
+    """The 14-character gnubg Position ID of a board with `color` on roll."""
+    return base64.b64encode(position_key(board, color)).decode()[:POSITION_ID_LENGTH]
+
+
+def board_from_position_id(text: str, color: str) -> BoardState:
+    """Inverse of position_id(); raises ValueError for a malformed ID."""
+    return board_from_position_key(
+        _b64decode(text, POSITION_ID_LENGTH, POSITION_KEY_BYTES), color
+    )
+
+
+def state_position_id(state: Mapping[str, Any]) -> str:
+    """Position ID of a full GameState dict, as seen by the player on roll."""
+    return position_id(BoardState.from_state(state), state["current_turn"])
+
+
+class MatchInfo(NamedTuple):
+    """The fields of a Match ID; players are named by color."""
+
+    on_roll: str = "white"
+    turn: str = "white"
+    dice: Optional[Tuple[int, int]] = None
+    game_state: int = GAME_PLAYING
+    cube: int = 1
+    cube_owner: Optional[str] = None  # None while the cube is centered
+    crawford: bool = False
+    doubled: bool = False
+    resigned: int = 0  # 1, 2 or 3 for a single, gammon or backgammon resignation
+    match_length: int = 0  # 0 for a money game
+    score: Tuple[int, int] = (0, 0)  # White's, black's
+
+
+def match_id(info: MatchInfo) -> str:
+    """The 12-character gnubg Match ID of a game."""
+    dice = info.dice or (0, 0)
+    fields = (
+        (_CUBE, info.cube.bit_length() - 1),
+        (_CUBE_OWNER, _CENTERED if info.cube_owner is None else COLORS.index(info.cube_owner)),
+        (_ON_ROLL, COLORS.index(info.on_roll)),
+        (_CRAWFORD, int(info.crawford)),
+        (_GAME_STATE, info.game_state),
+        (_TURN, COLORS.index(info.turn)),
+        (_DOUBLED, int(info.doubled)),
+        (_RESIGNED, info.resigned),
+        (_DIE_1, dice[0]),
+        (_DIE_2, dice[1]),
+        (_MATCH_LENGTH, info.match_length),
+        (_SCORE_0, info.score[0]),
+        (_SCORE_1, info.score[1]),
+    )
+    bits = 0
+    for (offset, width), value in fields:
+        if not 0 <= value < 1 << width:
+            raise ValueError(f"Match ID field at bit {offset} out of range: {value}")
+        bits |= value << offset
+    return base64.b64encode(bits.to_bytes(MATCH_KEY_BYTES, "little")).decode()
+
+
+def decode_match_id(text: str) -> MatchInfo:
+    """Inverse of match_id(); raises ValueError for a malformed ID."""
+    bits = int.from_bytes(_b64decode(text, MATCH_ID_LENGTH, MATCH_KEY_BYTES), "little")
+
+    def field(spec: Tuple[int, int]) -> int:
+        offset, width = spec
+        return bits >> offset & ((1 << width) - 1)
+
+    dice = (field(_DIE_1), field(_DIE_2))
+    if not (dice == (0, 0) or all(1 <= die <= 6 for die in dice)):
+        raise ValueError(f"Invalid dice {dice}")
+    owner = field(_CUBE_OWNER)
+    if owner == 2:
+        raise ValueError("Invalid cube owner")
+    if field(_GAME_STATE) > GAME_DROPPED:
+        raise ValueError("Invalid game state")
+    return MatchInfo(
+        on_roll=COLORS[field(_ON_ROLL)],
+        turn=COLORS[field(_TURN)],
+        dice=dice if dice != (0, 0) else None,
+        game_state=field(_GAME_STATE),
+        cube=1 << field(_CUBE),
+        cube_owner=None if owner == _CENTERED else COLORS[owner],
+        crawford=bool(field(_CRAWFORD)),
+        doubled=bool(field(_DOUBLED)),
+        resigned=field(_RESIGNED),
+        match_length=field(_MATCH_LENGTH),
+        score=(field(_SCORE_0), field(_SCORE_1)),
+    )
+
+
+def state_match_info(state: Mapping[str, Any]) -> MatchInfo:
+    """Match ID fields of a full GameState dict."""
+    color = state["current_turn"]
+    dice_state = state.get("dice_state") or {}
+    home = state.get("home") or {}
+    over = any(home.get(side, 0) >= CHECKERS for side in COLORS)
+    dice = dice_state.get("values")
+    return MatchInfo(
+        on_roll=color,
+        turn=color,
+        dice=tuple(dice) if dice and not over else None,
+        game_state=GAME_OVER if over else GAME_PLAYING,
+    )
+
+
+def state_match_id(state: Mapping[str, Any]) -> str:
+    return match_id(state_match_info(state))
@@ -1,4 +1,215 @@
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+"""Rate limits for the auth endpoints, shared by every worker on a host.
 
-limiter = Limiter(key_func=get_remote_address) 
\ No newline at end of file
+A limit such as "5/minute" is enforced per key with GCRA, the generic cell
+rate algorithm: a token bucket that holds `limit` requests and refills over
+the period, kept as a single timestamp per key (the theoretical arrival time
+of the next request), so a check is one read-modify-write.
+
+With RATE_LIMIT_BACKEND "sqlite" the timestamps live in the file at
+RATE_LIMIT_SQLITE_PATH and each check is one UPSERT, so all uvicorn workers
+on the host count against the same limit. "memory" counts per process. A
+networked store only has to provide hit() with the semantics below.
+
+Keys combine the route's scope with the client address (client_ip) or, for
+authenticated routes, the token's subject (bearer_subject). Counters of
+allowed and limited requests per scope are kept per process; see stats().
+
+Stores that block (SQLite) are queried through run_db, off the event loop.
+A store that is busy (SQLite lock contention) fails closed with 503, so a
+burst cannot slip past the limit; any other store failure is logged and
+lets the request through rather than lock everybody out.
+"""
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import run_db
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+_CONTENTION = (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_RATE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+
+class StoreBusy(Exception):
+    """The store could not take the check in time because of contention."""
+
+
+def parse_rate(rate: str) -> Tuple[int, float]:
+    """Requests and period in seconds of a limit like "5/minute" or "100 per 2 hours"."""
+    match = _RATE.match(rate)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Invalid rate limit {rate!r}")
+    count, multiple, unit = match.groups()
+    return int(count), int(multiple or 1) * _PERIODS[unit]
+
+
+class MemoryStore:
+    """Per-process store; limits are multiplied by the number of workers."""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        # Losing a key only forgets its history, which errs on the lenient side
+        self._tats = LRUCache(max_keys)
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, interval: float, period: float, now: float) -> float:
+        """Count a request; 0 if it is allowed, else seconds until one would be."""
+        with self._lock:
+            tat = max(self._tats.get(key) or now, now) + interval
+            if tat - period > now:
+                return tat - period - now
+            self._tats.put(key, tat)
+            return 0.0
+
+
+class SQLiteStore:
+    """Store in a SQLite file that every process on the host opens."""
+
+    name = "sqlite"
+    blocking = True
+    # Inserts or advances the key's timestamp, unless that would exceed the limit
+    _HIT = (
+        "INSERT INTO rate_limits (key, tat) VALUES (:key, :now + :interval) "
+        "ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval "
+        "WHERE max(tat, :now) + :interval - :period <= :now RETURNING tat"
+    )
+    _PRUNE_EVERY = 1024  # Checks between deletions of keys that are back to a full bucket
+
+    def __init__(self, path: str, busy_timeout: float = 0.25):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._hits = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL) "
+            "WITHOUT ROWID"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Counters are not worth an fsync; a crash at worst forgets a few requests
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def hit(self, key: str, interval: float, period: float, now: float) -> float:
+        """Count a request; 0 if it is allowed, else seconds until one would be."""
+        connection = self._connection()
+        self._hits += 1
+        params = {"key": key, "now": now, "interval": interval, "period": period}
+        try:
+            if self._hits % self._PRUNE_EVERY == 0:
+                connection.execute("DELETE FROM rate_limits WHERE tat < ?", (now,))
+            if connection.execute(self._HIT, params).fetchone() is not None:
+                return 0.0
+            row = connection.execute(
+                "SELECT tat FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.OperationalError as exc:
+            if getattr(exc, "sqlite_errorcode", None) in _CONTENTION:
+                raise StoreBusy(str(exc)) from exc
+            raise
+        return max(row[0] + interval - period - now, 0.0) if row else 0.0
+
+
+def make_store():
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteStore(settings.RATE_LIMIT_SQLITE_PATH)
+    return MemoryStore()
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+def bearer_subject(request: Request) -> str:
+    """The user of a valid bearer token, else the client address."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    payload = verify_token(token) if scheme.lower() == "bearer" and token else None
+    if payload and payload.get("sub"):
+        return f"user:{payload['sub']}"
+    return f"ip:{client_ip(request)}"
+
+
+class RateLimiter:
+    def __init__(self, store=None):
+        self._store = store
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._counters_lock = threading.Lock()
+
+    @property
+    def store(self):
+        # Built on first use, so settings can still be changed before that
+        if self._store is None:
+            self._store = make_store()
+        return self._store
+
+    def limit(
+        self, rate: str, scope: str, key: Callable[[Request], str] = client_ip
+    ) -> Callable:
+        """A dependency allowing `rate` requests per key within `scope`, else 429."""
+        count, period = parse_rate(rate)
+        interval = period / count
+        with self._counters_lock:
+            self._counters.setdefault(
+                scope, {"allowed": 0, "limited": 0, "busy": 0, "errors": 0}
+            )
+
+        async def check(request: Request) -> None:
+            store = self.store
+            args = (f"{scope}:{key(request)}", interval, period, time.time())
+            try:
+                retry_after = await run_db(store.hit, *args) if store.blocking else store.hit(*args)
+            except StoreBusy:
+                self._count(scope, "busy")
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many requests at once, try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            except Exception:
+                # An unavailable store must not lock everybody out of logging in
+                logger.exception("Rate limit check for %s failed; allowing the request", scope)
+                self._count(scope, "errors")
+                return
+            if retry_after > 0:
+                self._count(scope, "limited")
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=f"Rate limit exceeded: {rate}",
+                    headers={"Retry-After": str(math.ceil(retry_after))},
+                )
+            self._count(scope, "allowed")
+
+        return check
+
+    def _count(self, scope: str, outcome: str) -> None:
+        with self._counters_lock:
+            self._counters[scope][outcome] += 1
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            scopes = {scope: dict(counters) for scope, counters in self._counters.items()}
+        return {"backend": self.store.name, "scopes": scopes}
+
+
+limiter = RateLimiter()
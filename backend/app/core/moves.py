@@ -0,0 +1,195 @@
+"""Legal move generation for the game engine.
+
+Moves are expressed in board slots (see app.core.board) as ``(src, dst, die)``
+triples; a play is the tuple of moves a player makes with one roll.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.board import (
+    BLACK_BAR,
+    BLACK_HOME,
+    WHITE_BAR,
+    WHITE_HOME,
+    BoardState,
+)
+from app.core.config import settings
+
+Move = Tuple[int, int, int]
+Play = Tuple[Move, ...]
+
+# Distance of the bar from home, the farthest a checker can be for either color
+_FARTHEST = 25
+
+# Each of the 21 distinct rolls with its probability weight out of 36
+ROLLS: List[Tuple[Tuple[int, int], int]] = [
+    ((die1, die2), 1 if die1 == die2 else 2)
+    for die1 in range(1, 7)
+    for die2 in range(die1, 7)
+]
+
+
+class LegalPlays(NamedTuple):
+    """All legal complete plays for one position, color and roll.
+
+    ``plays`` maps each distinct resulting board to one move sequence reaching
+    it, so equivalent orderings of the same play appear only once.
+    """
+
+    max_moves: int
+    plays: Dict[BoardState, Play]
+
+    def is_legal_result(self, board: BoardState) -> bool:
+        return board in self.plays
+
+
+def expand_dice(values: Optional[Sequence[int]]) -> Tuple[int, ...]:
+    """Dice available for a roll: doubles are played four times."""
+    if not values:
+        return ()
+    die1, die2 = values
+    return (die1,) * 4 if die1 == die2 else (die1, die2)
+
+
+def remaining_dice(dice_state: dict) -> Tuple[int, ...]:
+    """Dice of the current roll that have not been used yet."""
+    remaining = list(expand_dice(dice_state.get("values")))
+    for used in dice_state.get("used_values") or []:
+        if used in remaining:
+            remaining.remove(used)
+    return tuple(remaining)
+
+
+def _all_home(cells, color: str) -> bool:
+    if color == "white":
+        return cells[WHITE_BAR] == 0 and all(cells[i] <= 0 for i in range(7, 25))
+    return cells[BLACK_BAR] == 0 and all(cells[i] >= 0 for i in range(1, 19))
+
+
+def single_moves(board: BoardState, color: str, die: int) -> List[Move]:
+    """All legal single checker moves of `color` using one die."""
+    cells = board.cells
+    moves = []
+    if color == "white":
+        if cells[WHITE_BAR]:
+            target = WHITE_BAR - die
+            if cells[target] >= -1:
+                moves.append((WHITE_BAR, target, die))
+            return moves
+        can_bear_off = _all_home(cells, color)
+        highest = max((i for i in range(1, 25) if cells[i] > 0), default=0)
+        for src in range(1, 25):
+            if cells[src] <= 0:
+                continue
+            target = src - die
+            if target >= 1:
+                if cells[target] >= -1:
+                    moves.append((src, target, die))
+            elif can_bear_off and (target == 0 or src == highest):
+                moves.append((src, WHITE_HOME, die))
+    else:
+        if cells[BLACK_BAR]:
+            target = BLACK_BAR + die
+            if cells[target] <= 1:
+                moves.append((BLACK_BAR, target, die))
+            return moves
+        can_bear_off = _all_home(cells, color)
+        lowest = min((i for i in range(1, 25) if cells[i] < 0), default=25)
+        for src in range(1, 25):
+            if cells[src] >= 0:
+                continue
+            target = src + die
+            if target <= 24:
+                if cells[target] <= 1:
+                    moves.append((src, target, die))
+            elif can_bear_off and (target == 25 or src == lowest):
+                moves.append((src, BLACK_HOME, die))
+    return moves
+
+
+def _source_order(src: int, color: str) -> int:
+    """Distance of a source from the player's home, used to order doubles."""
+    return src if color == "white" else 25 - src
+
+
+def _extend(
+    board: BoardState,
+    color: str,
+    dice: Tuple[int, ...],
+    prefix: Play,
+    limit: Optional[int],
+    out: List[Tuple[Play, BoardState]],
+) -> None:
+    moves = single_moves(board, color, dice[0]) if dice else []
+    if not moves:
+        out.append((prefix, board))
+        return
+    for move in moves:
+        # With doubles every ordering of the same moves is equivalent, so only
+        # the one moving checkers farthest from home first is explored.
+        next_limit = limit
+        if limit is not None:
+            next_limit = _source_order(move[0], color)
+            if next_limit > limit:
+                continue
+        after = board.move(move[0], move[1], color)
+        _extend(after, color, dice[1:], prefix + (move,), next_limit, out)
+
+
+def _normalize(dice: Iterable[int]) -> Tuple[int, ...]:
+    return tuple(sorted(dice, reverse=True))
+
+
+@lru_cache(maxsize=settings.LEGAL_PLAYS_CACHE_SIZE)
+def _legal_plays(board: BoardState, color: str, dice: Tuple[int, ...]) -> LegalPlays:
+    candidates: List[Tuple[Play, BoardState]] = []
+    if dice and all(die == dice[0] for die in dice):
+        _extend(board, color, dice, (), _FARTHEST, candidates)
+    else:
+        _extend(board, color, dice, (), None, candidates)
+        if len(dice) == 2:
+            _extend(board, color, dice[::-1], (), None, candidates)
+
+    max_moves = max(len(play) for play, _ in candidates)
+    candidates = [item for item in candidates if len(item[0]) == max_moves]
+
+    # If only one die can be played, the larger one must be used when possible
+    if max_moves == 1 and len(dice) == 2 and dice[0] != dice[1]:
+        larger = [item for item in candidates if item[0][0][2] == dice[0]]
+        if larger:
+            candidates = larger
+
+    plays: Dict[BoardState, Play] = {}
+    for play, result in candidates:
+        plays.setdefault(result, play)
+    return LegalPlays(max_moves, plays)
+
+
+def legal_plays(board: BoardState, color: str, dice: Iterable[int]) -> LegalPlays:
+    """Enumerate every legal complete play for a position and remaining dice.
+
+    Results are memoized in an LRU cache keyed by the board's Zobrist hash,
+    the color and the roll.
+    """
+    return _legal_plays(board, color, _normalize(dice))
+
+
+def is_legal_step(board: BoardState, color: str, dice: Iterable[int], move: Move) -> bool:
+    """True if `move` starts at least one legal complete play."""
+    dice = _normalize(dice)
+    src, dst, die = move
+    if die not in dice or move not in single_moves(board, color, die):
+        return False
+    full = legal_plays(board, color, dice)
+    after = board.move(src, dst, color)
+    rest = list(dice)
+    rest.remove(die)
+    continuation = legal_plays(after, color, rest)
+    if continuation.max_moves != full.max_moves - 1:
+        return False
+    return any(full.is_legal_result(result) for result in continuation.plays)
+
+
+def legal_plays_cache_info():
+    """Hit/miss statistics of the legal play cache."""
+    return _legal_plays.cache_info()
@@ -0,0 +1,102 @@
+"""Monte Carlo rollouts with the greedy policy.
+
+Rollouts are CPU bound and run in worker processes; everything here is pure
+and picklable so a chunk can be shipped to any process in a pool.
+"""
+import random
+from math import sqrt
+from typing import Callable, List, NamedTuple, Tuple
+
+from app.core.board import BoardState, opponent
+from app.core.evaluation import evaluate, game_result, greedy_play
+
+# Games still running after this many turns are scored by the evaluation
+MAX_TURNS = 400
+
+# Two-sided 95% normal quantile
+Z_95 = 1.96
+
+RollSource = Callable[[], Tuple[int, int]]
+
+
+class RolloutStats(NamedTuple):
+    """Running sums over rollout samples; chunks from different workers add up."""
+    samples: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+
+    def __add__(self, other: "RolloutStats") -> "RolloutStats":
+        return RolloutStats(
+            self.samples + other.samples,
+            self.total + other.total,
+            self.total_sq + other.total_sq,
+        )
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.samples if self.samples else 0.0
+
+    @property
+    def std_error(self) -> float:
+        if self.samples < 2:
+            return 0.0
+        variance = (self.total_sq - self.samples * self.mean ** 2) / (self.samples - 1)
+        return sqrt(max(variance, 0.0) / self.samples)
+
+
+def play_out(board: BoardState, color: str, next_roll: RollSource) -> float:
+    """Play a game to the end with `color` on roll; returns points for `color`."""
+    player = color
+    for _ in range(MAX_TURNS):
+        result = game_result(board)
+        if result is not None:
+            winner, points = result
+            return points if winner == color else -points
+        _, board = greedy_play(board, player, next_roll())
+        player = opponent(player)
+    # The side that just moved is `opponent(player)`
+    value = evaluate(board, opponent(player))
+    return value if opponent(player) == color else -value
+
+
+class _AntitheticDice:
+    """Records the rolls of one game and replays them as 7 - d for its twin."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.rolls: List[Tuple[int, int]] = []
+        self.replay = -1
+
+    def __call__(self) -> Tuple[int, int]:
+        if self.replay < 0:
+            roll = (self.rng.randint(1, 6), self.rng.randint(1, 6))
+            self.rolls.append(roll)
+            return roll
+        if self.replay < len(self.rolls):
+            die1, die2 = self.rolls[self.replay]
+            self.replay += 1
+            return 7 - die1, 7 - die2
+        # The twin game outlasted the original; continue with fresh dice
+        return self.rng.randint(1, 6), self.rng.randint(1, 6)
+
+    def mirror(self) -> None:
+        self.replay = 0
+
+
+def rollout_chunk(key: bytes, color: str, pairs: int, seed: int) -> RolloutStats:
+    """Roll out `pairs` antithetic game pairs from a board given by BoardState.key().
+
+    Each sample is the average of a game and its twin played with every die
+    replaced by 7 - d, which cancels much of the luck between the two.
+    """
+    board = BoardState.from_key(key)
+    rng = random.Random(seed)
+    stats = RolloutStats()
+    for _ in range(pairs):
+        dice = _AntitheticDice(rng)
+        first = play_out(board, color, dice)
+        dice.mirror()
+        second = play_out(board, color, dice)
+        sample = (first + second) / 2
+        stats += RolloutStats(1, sample, sample * sample)
+    return stats
@@ -1,6 +1,10 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
+import asyncio
 import re
+import threading
+import time
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -25,6 +29,98 @@ def get_password_hash(password: str) -> str:
     validate_password(password)
     return pwd_context.hash(password)
 
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification in a bounded pool of threads.
+
+    Each bcrypt call takes 100-300 ms of CPU; bcrypt releases the GIL, so
+    running it here keeps the event loop, and every game on it, responsive.
+    At most `workers` hashes run at once and `max_queue` more may wait;
+    beyond that requests fail fast with 503 instead of piling up.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+        self._pending = 0  # Running or queued
+        self._stats: Dict[str, float] = {
+            "calls": 0,
+            "rejected": 0,
+            "busy_ms": 0.0,
+            "max_busy_ms": 0.0,
+            "queue_wait_ms": 0.0,
+            "max_queue_wait_ms": 0.0,
+        }
+
+    async def hash(self, password: str) -> str:
+        """Validate a new password against the policy and hash it."""
+        validate_password(password)
+        return await self._run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many password checks at once; try again shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        submitted = time.perf_counter()
+
+        def timed() -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - submitted, time.perf_counter() - started)
+
+        future = self._executor.submit(timed)
+        # Released when bcrypt is done, not when the caller stops waiting: a
+        # cancelled request (client gone) leaves its hash running in the pool
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Any) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _record(self, waited: float, busy: float) -> None:
+        with self._lock:
+            stats = self._stats
+            stats["calls"] += 1
+            stats["busy_ms"] += busy * 1000
+            stats["max_busy_ms"] = max(stats["max_busy_ms"], busy * 1000)
+            stats["queue_wait_ms"] += waited * 1000
+            stats["max_queue_wait_ms"] = max(stats["max_queue_wait_ms"], waited * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and hash latency, for monitoring."""
+        with self._lock:
+            stats = dict(self._stats)
+            pending = self._pending
+        calls = stats["calls"] or 1
+        return {
+            "in_flight": min(pending, self.workers),
+            "queued": max(pending - self.workers, 0),
+            "calls": int(stats["calls"]),
+            "rejected": int(stats["rejected"]),
+            "avg_ms": round(stats["busy_ms"] / calls, 1),
+            "max_ms": round(stats["max_busy_ms"], 1),
+            "avg_queue_wait_ms": round(stats["queue_wait_ms"] / calls, 1),
+            "max_queue_wait_ms": round(stats["max_queue_wait_ms"], 1),
+        }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE)
+
+
 def validate_password(password: str) -> bool:
     """Validate password against security policy."""
     if len(password) < settings.MIN_PASSWORD_LENGTH:
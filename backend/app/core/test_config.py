@@ -1,16 +1,14 @@
+import os
 from typing import Generator
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import settings
+from app.core.database import create_db_engine
 
-# Use SQLite for testing
-TEST_SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+# Use SQLite for testing; the test suite points this at a temporary file
+TEST_SQLALCHEMY_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "sqlite:///./test.db")
 
 # Create test engine
-test_engine = create_engine(
-    TEST_SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Needed for SQLite
-)
+test_engine = create_db_engine(TEST_SQLALCHEMY_DATABASE_URL)
 
 # Create test SessionLocal
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
@@ -29,6 +27,7 @@ test_settings = settings.model_copy(update={
     "EMAIL_ENABLED": False,  # Disable email sending in tests
     "REGISTER_RATE_LIMIT": "100/minute",  # Higher rate limits for testing
     "LOGIN_RATE_LIMIT": "100/minute",
+    "RATE_LIMIT_BACKEND": "memory",  # Nothing carries over between test runs
     # Email settings
     "MAIL_USERNAME": "test@example.com",
     "MAIL_PASSWORD": "test_password",
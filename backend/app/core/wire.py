@@ -0,0 +1,137 @@
+"""Compact binary representations of a game for high-frequency clients.
+
+Game endpoints answer with JSON unless the Accept header asks for one of:
+
+    application/x-backgammon-game   packed struct, see below
+    application/msgpack             the same fields as a MessagePack map
+                                    (only when the msgpack package is installed)
+
+The packed form is, little-endian:
+
+    u8   format (PACKED_FORMAT)
+    u8   player on roll, 0 white / 1 black
+    u8   die 1, 0 before the roll
+    u8   die 2
+    u8   n, number of dice used so far
+    u32  game version
+    n x u8  the used dice, in order
+    10 bytes  GNU BG position key as seen by the player on roll (see app.core.gnubg)
+    rest  game ID, UTF-8
+
+about 55 bytes for a UUID game ID instead of roughly 1 kB of JSON. Only the
+state is carried; timestamps and hashes are left out. Borne-off checkers are
+not stored but derived as 15 minus those on the board, so states where a
+side does not have exactly 15 checkers (set through PUT /state) are always
+sent as JSON.
+
+unpack_game() decodes either form back into the JSON shape of the game; a
+TypeScript decoder for the packed form lives in frontend/src/utils/gameWire.ts.
+"""
+import struct
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from app.core.board import COLORS, BoardState
+from app.core.gnubg import CHECKERS, POSITION_KEY_BYTES, board_from_position_key, position_key
+
+JSON = "application/json"
+PACKED = "application/x-backgammon-game"
+MSGPACK = "application/msgpack"
+
+PACKED_FORMAT = 1
+_HEADER = struct.Struct("<BBBBBI")
+
+
+def media_types() -> tuple:
+    """Representations this process can produce, most compact first."""
+    return (PACKED, MSGPACK, JSON) if msgpack is not None else (PACKED, JSON)
+
+
+def negotiate(accept: Optional[str], offered: Iterable[str] = None) -> str:
+    """Pick the representation for an Accept header; JSON when nothing else matches.
+
+    Quality values are honored; ties go to the type listed first in the header.
+    """
+    offered = tuple(offered or media_types())
+    best, best_q = JSON, 0.0
+    for part in (accept or "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in offered and q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def _fields(game: Any) -> Optional[Dict[str, Any]]:
+    state = game.state
+    try:
+        color = state["current_turn"]
+        board = BoardState.from_state(state)
+        key = position_key(board, color)
+        dice_state = state["dice_state"]
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None
+    if any(board.checkers(side) != CHECKERS for side in COLORS):
+        # The key cannot tell borne-off checkers from missing ones
+        return None
+    return {
+        "id": game.id,
+        "version": game.version,
+        "turn": COLORS.index(color),
+        "dice": list(dice_state.get("values") or (0, 0)),
+        "used": list(dice_state.get("used_values") or ()),
+        "key": key,
+    }
+
+
+def pack_game(game: Any, media_type: str = PACKED) -> Optional[bytes]:
+    """Encode a game (model or ActiveGame); None if its state is not a full position."""
+    fields = _fields(game)
+    if fields is None:
+        return None
+    if media_type == MSGPACK:
+        return msgpack.packb(fields, use_bin_type=True)
+    header = _HEADER.pack(
+        PACKED_FORMAT, fields["turn"], *fields["dice"], len(fields["used"]), fields["version"]
+    )
+    return header + bytes(fields["used"]) + fields["key"] + fields["id"].encode()
+
+
+def unpack_game(data: bytes, media_type: str = PACKED) -> Dict[str, Any]:
+    """Decode a packed or MessagePack game into the JSON shape (id, version, state)."""
+    if media_type == MSGPACK:
+        fields = msgpack.unpackb(data, raw=False)
+    else:
+        form, turn, die_1, die_2, used, version = _HEADER.unpack_from(data)
+        if form != PACKED_FORMAT:
+            raise ValueError(f"Unknown packed game format {form}")
+        offset = _HEADER.size
+        key_offset = offset + used
+        fields = {
+            "id": data[key_offset + POSITION_KEY_BYTES:].decode(),
+            "version": version,
+            "turn": turn,
+            "dice": [die_1, die_2],
+            "used": list(data[offset:key_offset]),
+            "key": data[key_offset:key_offset + POSITION_KEY_BYTES],
+        }
+    color = COLORS[fields["turn"]]
+    board = board_from_position_key(bytes(fields["key"]), color)
+    dice = fields["dice"] if any(fields["dice"]) else None
+    state = dict(
+        board.to_state(),
+        current_turn=color,
+        dice_state={"values": dice, "used_values": fields["used"]},
+    )
+    return {"id": fields["id"], "version": fields["version"], "state": state}
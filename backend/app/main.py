@@ -3,23 +3,48 @@ from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from contextlib import asynccontextmanager
 import datetime
 import time
 from app.api import api_router
 from app.core.config import settings
 from app.core.errors import AppError, error_handler
-from app.core.database import Base, engine
+from app.core.database import Base, engine, pool_stats
 from app.core.limiter import limiter
-from app.api.endpoints import game, auth, game_users
+from app.core.security import password_hasher
+from app.services.bot_service import shutdown_search_pool
+from app.services.dice_service import dice_history
+from app.services.email_worker import email_worker
+from app.core.bearoff import load_database
+from app.services.game_registry import game_registry
+from app.services.game_updates import game_updates
+from app.services.rollout_service import shutdown_pool
+from app.api.endpoints import game, auth, game_users, ws
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Map the bear-off database read-only; pages are shared between workers
+    load_database(settings.BEAROFF_DB_PATH)
+    game_registry.start()
+    dice_history.start()
+    await game_updates.start()
+    if settings.EMAIL_ENABLED:
+        email_worker.start()
+    yield
+    await email_worker.stop()
+    await game_updates.stop()
+    # Nothing acknowledged to a client may be lost. Rolls go to the history
+    # before the game events that use them, so the log never misses a roll
+    # the games show
+    await dice_history.stop()
+    await game_registry.stop()
+    shutdown_pool()
+    shutdown_search_pool()
 
-def create_app() -> FastAPI:
-    app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION)
 
-    # Add rate limiter
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+def create_app() -> FastAPI:
+    app = FastAPI(title=settings.PROJECT_NAME, version=settings.VERSION, lifespan=lifespan)
 
     # Configure CORS
     app.add_middleware(
@@ -55,6 +80,7 @@ def create_app() -> FastAPI:
     app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
     app.include_router(game.router, prefix="/api/game", tags=["game"])
     app.include_router(game_users.router, prefix="/api/game-users", tags=["game-users"])
+    app.include_router(ws.router, tags=["ws"])
 
     # Create database tables
     Base.metadata.create_all(bind=engine)
@@ -90,6 +116,10 @@ async def health_check():
             "timestamp": datetime.datetime.now().isoformat(),
             "uptime": time.time() - START_TIME,
             "version": settings.VERSION,
+            "database": pool_stats(engine),
+            "password_hashing": password_hasher.stats(),
+            "email": email_worker.stats(),
+            "rate_limits": limiter.stats(),
         }
     except Exception as e:
         raise AppError(
@@ -1,8 +1,9 @@
 from app.core.database import Base, engine
 from app.models.dice import DiceRollHistory
-from app.models.game import Game
+from app.models.email import OutboundEmail
+from app.models.game import Game, GameEvent
 from app.models.user import User, UserStats
 
 
 # Import all models here
-__all__ = ["DiceRollHistory", "Game", "User", "UserStats"]
+__all__ = ["DiceRollHistory", "Game", "GameEvent", "OutboundEmail", "User", "UserStats"]
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+
+class OutboundEmail(Base):
+    """A rendered email waiting for the delivery worker (see app.services.email_worker)."""
+
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # "pending" or "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    # Due time, pushed forward by a worker's lease and by backoff after a failure
+    next_attempt_at = Column(DateTime, nullable=False, index=True)
+    lease = Column(String, nullable=True)  # Worker currently sending it
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
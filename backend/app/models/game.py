@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, JSON, UniqueConstraint
 from sqlalchemy.sql import func
 from uuid import uuid4
 
@@ -9,6 +9,27 @@ class Game(Base):
     __tablename__ = "games"
 
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid4()))
-    state = Column(JSON, nullable=False)  # Current game state
+    state = Column(JSON, nullable=False)  # Snapshot of the state as of snapshot_seq
+    snapshot_seq = Column(Integer, nullable=False, default=0)  # Last event folded into state
+    version = Column(Integer, nullable=False, default=0)  # Last event written; compare-and-swap key
+    position_hash = Column(String(16), index=True)  # Zobrist hash of board and side to move
+    position_id = Column(String(14), index=True)  # GNU BG Position ID, seen from the side to move
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class GameEvent(Base):
+    """One entry of a game's append-only event log (see app.core.events)."""
+
+    __tablename__ = "game_events"
+    __table_args__ = (UniqueConstraint("game_id", "seq", name="uq_game_events_game_seq"),)
+
+    id = Column(Integer, primary_key=True)
+    game_id = Column(String, ForeignKey("games.id"), nullable=False, index=True)
+    seq = Column(Integer, nullable=False)  # 1, 2, 3... within a game
+    type = Column(String(16), nullable=False)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def as_event(self) -> dict:
+        return {"type": self.type, **self.data}
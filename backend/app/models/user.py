@@ -28,6 +28,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True))
     is_verified = Column(Boolean, default=False)
+    is_bot = Column(Boolean, default=False)
     failed_login_attempts = Column(Integer, default=0)
     last_failed_login = Column(DateTime(timezone=True), nullable=True)
     account_locked_until = Column(DateTime(timezone=True), nullable=True)
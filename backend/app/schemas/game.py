@@ -31,8 +31,59 @@ class MoveRequest(BaseModel):
     color: Literal["white", "black"]
 
 
+class CheckerMove(BaseModel):
+    from_point: int
+    to_point: int
+
+
+class TurnRequest(BaseModel):
+    color: Literal["white", "black"]
+    moves: list[CheckerMove]  # Every checker move of the play, in order
+
+
+class MoveStep(BaseModel):
+    from_point: int
+    to_point: int
+    die: int
+
+
+class LegalPlays(BaseModel):
+    dice: list[int]  # Unused dice of the current roll
+    max_moves: int  # Number of dice every legal play uses
+    plays: list[list[MoveStep]]  # One move sequence per distinct resulting position
+
+
+class GameEventRead(BaseModel):
+    seq: int
+    type: Literal["roll", "move", "turn_end", "state"]
+    data: Dict[str, Any]
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class RolloutResult(BaseModel):
+    color: Literal["white", "black"]  # Player on roll; equity is from their side
+    trials: int
+    equity: float  # Cubeless points per game
+    std_error: float
+    ci_low: float  # 95% confidence interval
+    ci_high: float
+    cached: bool = False
+
+
+class GameImport(BaseModel):
+    position_id: str  # 14-character GNU BG Position ID
+    match_id: Optional[str] = None  # 12-character GNU BG Match ID: player on roll and dice
+
+
 class Game(GameCreate):
     id: str
+    version: int = 0  # Pass back as expected_version to reject concurrent changes
+    position_hash: Optional[str] = None
+    position_id: Optional[str] = None  # GNU BG Position ID, seen from the player on roll
+    match_id: Optional[str] = None  # GNU BG Match ID
     created_at: datetime
     updated_at: datetime | None
 
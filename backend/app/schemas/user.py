@@ -2,6 +2,8 @@ from pydantic import BaseModel, EmailStr, Field, HttpUrl
 from datetime import datetime
 from typing import Optional, Literal
 
+from app.models.user import PieceColor
+
 
 class UserStatsBase(BaseModel):
     games_played: int = 0
@@ -13,7 +15,7 @@ class UserStatsBase(BaseModel):
 
 class UserStatsRead(UserStatsBase):
     id: int
-    user_id: int
+    user_id: str
     join_date: datetime
 
     class Config:
@@ -26,7 +28,8 @@ class UserBase(BaseModel):
     display_name: Optional[str] = Field(None, min_length=2, max_length=50)
     avatar_url: Optional[HttpUrl] = None
     current_game_id: Optional[str] = None
-    piece_color: Optional[Literal["white", "black"]] = None
+    piece_color: Optional[PieceColor] = None
+    is_bot: bool = False
 
 
 class UserCreate(UserBase):
@@ -42,7 +45,7 @@ class UserUpdate(BaseModel):
 
 
 class UserRead(UserBase):
-    id: int
+    id: str
     created_at: datetime
     last_login: Optional[datetime] = None
     stats: Optional[UserStatsRead] = None
@@ -5,26 +5,29 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from pydantic import EmailStr
 
-from app.core.security import verify_password, get_password_hash, create_access_token, verify_token
+from app.core.security import password_hasher, create_access_token, verify_token
 from app.models.user import User, PasswordResetToken
 from app.schemas.auth import UserCreate, UserLogin
 from app.core.config import settings
+from app.core.database import run_db
 from app.services.email_service import EmailService
+from app.services.http_cache import player_stamps
+from app.services.user_cache import user_cache
 
 class AuthService:
     def __init__(self, db: Session):
         self.db = db
-        self.email_service = EmailService()
+        self.email_service = EmailService(db)
 
     async def register_user(self, user_data: UserCreate) -> User:
         """Register a new user."""
         # Check if user already exists
-        if self.db.query(User).filter(User.email == user_data.email).first():
+        if await run_db(self.db.query(User).filter(User.email == user_data.email).first):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
-        if self.db.query(User).filter(User.username == user_data.username).first():
+        if await run_db(self.db.query(User).filter(User.username == user_data.username).first):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
@@ -32,7 +35,7 @@ class AuthService:
 
         # Create new user
         user_id = str(uuid.uuid4())
-        hashed_password = get_password_hash(user_data.password)
+        hashed_password = await password_hasher.hash(user_data.password)
         db_user = User(
             id=user_id,
             email=user_data.email,
@@ -40,15 +43,14 @@ class AuthService:
             hashed_password=hashed_password
         )
         self.db.add(db_user)
-        self.db.commit()
-        self.db.refresh(db_user)
 
-        # Send verification email
+        # Queue the verification email; it is stored with the user
         verification_token = create_access_token(
             {"sub": user_id, "type": "verification"},
             expires_delta=timedelta(hours=24)
         )
-        await self.email_service.send_verification_email(user_data.email, verification_token)
+        self.email_service.queue_verification_email(user_data.email, verification_token)
+        await run_db(self._commit, db_user)
 
         return db_user
 
@@ -61,7 +63,7 @@ class AuthService:
                 detail="Invalid verification token"
             )
 
-        user = self.db.query(User).filter(User.id == payload["sub"]).first()
+        user = await run_db(self.db.query(User).filter(User.id == payload["sub"]).first)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -69,14 +71,15 @@ class AuthService:
             )
 
         user.is_verified = True
-        self.db.commit()
+        await run_db(self.db.commit)
+        user_cache.invalidate_user(payload["sub"])
         return True
 
     async def authenticate_user(self, form_data: UserLogin) -> User:
         """Authenticate user and handle login attempts."""
-        user = self.db.query(User).filter(
+        user = await run_db(self.db.query(User).filter(
             (User.email == form_data.username) | (User.username == form_data.username)
-        ).first()
+        ).first)
         
         if not user:
             raise HTTPException(
@@ -92,7 +95,7 @@ class AuthService:
             )
 
         # Verify password
-        if not verify_password(form_data.password, user.hashed_password):
+        if not await password_hasher.verify(form_data.password, user.hashed_password):
             # Handle failed login attempt
             user.failed_login_attempts += 1
             user.last_failed_login = datetime.utcnow()
@@ -101,12 +104,14 @@ class AuthService:
             if user.failed_login_attempts >= settings.MAX_LOGIN_ATTEMPTS:
                 lock_duration = timedelta(minutes=settings.ACCOUNT_LOCKOUT_MINUTES)
                 user.account_locked_until = datetime.utcnow() + lock_duration
-                await self.email_service.send_account_locked_email(
+                self.email_service.queue_account_locked_email(
                     user.email,
                     user.account_locked_until.strftime("%Y-%m-%d %H:%M:%S UTC")
                 )
 
-            self.db.commit()
+            user_id = user.id  # Read before the commit expires it
+            await run_db(self.db.commit)
+            user_cache.invalidate_user(user_id)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect username or password"
@@ -115,13 +120,16 @@ class AuthService:
         # Reset failed login attempts on successful login
         user.failed_login_attempts = 0
         user.last_login = datetime.utcnow()
-        self.db.commit()
+        await run_db(self._commit, user)
+        user_cache.invalidate_user(user.id)
+        # Seated players are listed with their last login
+        player_stamps.changed(user.current_game_id)
 
         return user
 
     async def initiate_password_reset(self, email: EmailStr) -> bool:
         """Initiate password reset process."""
-        user = self.db.query(User).filter(User.email == email).first()
+        user = await run_db(self.db.query(User).filter(User.email == email).first)
         if not user:
             # Return True even if user doesn't exist to prevent email enumeration
             return True
@@ -135,19 +143,17 @@ class AuthService:
             expires_at=datetime.utcnow() + timedelta(hours=1)
         )
         self.db.add(reset_token)
-        self.db.commit()
-
-        # Send password reset email
-        await self.email_service.send_password_reset_email(email, token)
+        self.email_service.queue_password_reset_email(email, token)
+        await run_db(self.db.commit)
         return True
 
     async def reset_password(self, token: str, new_password: str) -> bool:
         """Reset user's password using reset token."""
-        reset_token = self.db.query(PasswordResetToken).filter(
+        reset_token = await run_db(self.db.query(PasswordResetToken).filter(
             PasswordResetToken.token == token,
             PasswordResetToken.is_used == False,
             PasswordResetToken.expires_at > datetime.utcnow()
-        ).first()
+        ).first)
 
         if not reset_token:
             raise HTTPException(
@@ -155,7 +161,7 @@ class AuthService:
                 detail="Invalid or expired reset token"
             )
 
-        user = self.db.query(User).filter(User.id == reset_token.user_id).first()
+        user = await run_db(self.db.query(User).filter(User.id == reset_token.user_id).first)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -163,17 +169,34 @@ class AuthService:
             )
 
         # Update password and mark token as used
-        user.hashed_password = get_password_hash(new_password)
+        user.hashed_password = await password_hasher.hash(new_password)
         reset_token.is_used = True
-        self.db.commit()
+        user_id = reset_token.user_id  # Read before the commit expires it
+        await run_db(self.db.commit)
+        user_cache.invalidate_user(user_id)
 
         return True
 
+    def _commit(self, *refresh: User) -> None:
+        """Commit, then reload the given rows so reading them later needs no query."""
+        self.db.commit()
+        for instance in refresh:
+            self.db.refresh(instance)
+
     def create_user_token(self, user: User) -> dict:
         """Create access token for user."""
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        claims = {"sub": str(user.id)}
+        if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+            # Enough for hot paths to skip the user lookup; the seat is as of now
+            claims.update(
+                username=user.username,
+                verified=bool(user.is_verified),
+                game=user.current_game_id,
+                color=user.piece_color.value if user.piece_color else None,
+            )
         access_token = create_access_token(
-            data={"sub": str(user.id)},
+            data=claims,
             expires_delta=access_token_expires
         )
         return {
@@ -0,0 +1,289 @@
+import asyncio
+import multiprocessing
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Optional
+
+from fastapi import BackgroundTasks, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.bearoff import load_database
+from app.core.board import BoardState, opponent, point_for_slot
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import SessionLocal, run_db
+from app.core.evaluation import evaluate, game_result, rank_plays
+from app.core.moves import ROLLS, Play, legal_plays, remaining_dice
+from app.models.user import PieceColor, User
+from app.schemas.game import CheckerMove, TurnRequest
+from app.services.dice_service import DiceService
+from app.services.game_actor import game_actors
+from app.services.game_registry import ActiveGame
+from app.services.game_service import GameService
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search once its time budget is used up."""
+
+
+class TranspositionTable(LRUCache):
+    """Bounded map from (position hash, depth) to a searched value."""
+
+
+# Shared by every bot game searched in this process; positions recur across
+# games. Each search worker process builds its own.
+transposition_table = TranspositionTable(settings.BOT_TRANSPOSITION_TABLE_SIZE)
+
+_search_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker(bearoff_path: str) -> None:
+    load_database(bearoff_path)
+
+
+def get_search_pool() -> ProcessPoolExecutor:
+    """Worker processes for bot searches, started on first use.
+
+    Searches are pure-Python CPU work, so in threads they would hold the GIL
+    and stall the event loop for their whole time budget.
+    """
+    global _search_pool
+    if _search_pool is None:
+        # Spawned rather than forked: the server process already runs threads
+        _search_pool = ProcessPoolExecutor(
+            max_workers=settings.BOT_SEARCH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.BEAROFF_DB_PATH,),
+        )
+    return _search_pool
+
+
+def shutdown_search_pool() -> None:
+    global _search_pool
+    if _search_pool is not None:
+        _search_pool.shutdown(cancel_futures=True)
+        _search_pool = None
+
+
+class ExpectiminimaxSearch:
+    """Iterative-deepening expectiminimax over the 21 distinct rolls.
+
+    Depth 0 picks the play with the best static evaluation; each extra level
+    averages the opponent's (or our own) best reply over every roll. Only the
+    `width` most promising plays are expanded at each decision node, and the
+    deepest fully completed iteration within the time budget wins.
+    """
+
+    def __init__(
+        self,
+        budget: float = settings.BOT_MOVE_BUDGET_MS / 1000,
+        max_depth: int = settings.BOT_MAX_DEPTH,
+        width: int = settings.BOT_SEARCH_WIDTH,
+        table: TranspositionTable = transposition_table,
+    ):
+        self.budget = budget
+        self.max_depth = max_depth
+        self.width = width
+        self.table = table
+        self._deadline = 0.0
+        self.depth_reached = 0
+
+    def choose(self, board: BoardState, color: str, dice: Iterable[int]) -> Play:
+        """Best play for `color` with the given dice within the time budget."""
+        self._deadline = time.monotonic() + self.budget
+        ranked = rank_plays(board, color, dice)
+        best = ranked[0]
+        self.depth_reached = 0
+        if len(ranked) == 1:
+            return best[1]
+
+        candidates = ranked[:self.width]
+        try:
+            for depth in range(1, self.max_depth + 1):
+                scored = [
+                    (-self._chance(result, opponent(color), depth - 1), play, result)
+                    for _, play, result in candidates
+                ]
+                scored.sort(key=lambda item: item[0], reverse=True)
+                candidates = scored
+                best = scored[0]
+                self.depth_reached = depth
+        except SearchTimeout:
+            pass
+        return best[1]
+
+    def _chance(self, board: BoardState, player: str, depth: int) -> float:
+        """Expected value for `player`, who is about to roll."""
+        if game_result(board) is not None:
+            return evaluate(board, player)
+        key = (board.position_hash(player), depth)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        total = 0.0
+        for roll, weight in ROLLS:
+            if time.monotonic() > self._deadline:
+                raise SearchTimeout()
+            total += weight * self._best(board, player, roll, depth)
+        value = total / 36
+        self.table.put(key, value)
+        return value
+
+    def _best(self, board: BoardState, player: str, roll, depth: int) -> float:
+        """Value for `player` of their best play with `roll`."""
+        if depth == 0:
+            legal = legal_plays(board, player, roll)
+            return max(evaluate(result, player) for result in legal.plays)
+        ranked = rank_plays(board, player, roll)[:self.width]
+        return max(
+            -self._chance(result, opponent(player), depth - 1) for _, _, result in ranked
+        )
+
+
+def search_play(key: bytes, color: str, dice: Iterable[int]) -> Play:
+    """Run one search in a worker process; the board travels as its key."""
+    return ExpectiminimaxSearch().choose(BoardState.from_key(key), color, dice)
+
+
+class BotService:
+    def __init__(self, db: Session):
+        self.db = db
+        self.game_service = GameService(db)
+
+    def add_bot(self, game_id: str, color: PieceColor, user: User) -> User:
+        """Seat a computer player in a game the user is playing in.
+
+        Bots left idle by earlier games are reused; a new one is only created
+        when none is free.
+        """
+        if user.current_game_id != game_id:
+            raise HTTPException(
+                status_code=403, detail="Only a player seated in this game can add a bot"
+            )
+        idle = self.db.query(User).filter(
+            User.is_bot == True,  # noqa: E712
+            User.current_game_id.is_(None),
+        ).first()
+        try:
+            return self.game_service.join_game(game_id, idle or self._new_bot(), color)
+        except HTTPException as e:
+            # Another game took the idle bot first
+            if e.status_code != 409 or idle is None:
+                raise
+            return self.game_service.join_game(game_id, self._new_bot(), color)
+
+    def _new_bot(self) -> User:
+        name = f"bot-{uuid.uuid4().hex[:12]}"
+        bot = User(
+            id=str(uuid.uuid4()),
+            username=name,
+            email=f"{name}@bots.backgammon.com",
+            hashed_password="!",  # Never matches, so bots cannot log in
+            display_name="Computer",
+            is_verified=True,
+            is_bot=True,
+        )
+        self.db.add(bot)
+        self.db.flush()
+        return bot
+
+    def release_bots(self, game_id: str) -> int:
+        """Unseat the bots of a game no human plays in any more, for reuse."""
+        players = self.game_service.get_players(game_id)
+        if any(not player.is_bot for player in players):
+            return 0
+        for bot in players:
+            self.game_service.leave_game(game_id, bot)
+        return len(players)
+
+    def bot_to_move(self, game: ActiveGame) -> bool:
+        """True if the player on roll in this game is a bot."""
+        return self.db.query(User).filter(
+            User.current_game_id == game.id,
+            User.is_bot == True,  # noqa: E712
+            User.piece_color == PieceColor(game.state["current_turn"]),
+        ).first() is not None
+
+    def _roll(self, game_id: str) -> ActiveGame | None:
+        game = self.game_service.get_game(game_id)
+        if game and not game.state["dice_state"]["values"]:
+            dice_service = DiceService(self.db)
+            dice = dice_service.roll_dice()
+            game = self.game_service.roll(game_id, dice)
+            if game is not None:
+                dice_service.record_roll(dice, game_id)
+        return game
+
+    async def play_turn(self, game_id: str) -> ActiveGame | None:
+        """Roll and play one full turn for the bot on roll, if there is one."""
+        game = await run_db(self.game_service.get_game, game_id)
+        if not game or not await run_db(self.bot_to_move, game):
+            return game
+        if game_result(BoardState.from_state(game.state)):
+            return game
+
+        color = game.state["current_turn"]
+        if not game.state["dice_state"]["values"]:
+            game = await game_actors.run(game_id, self._roll, game_id)
+            # The game no longer exists
+            if game is None:
+                return None
+
+        state = game.state
+        if state["current_turn"] == color:
+            board = BoardState.from_state(state)
+            dice = remaining_dice(state["dice_state"])
+            loop = asyncio.get_running_loop()
+            play = await loop.run_in_executor(
+                get_search_pool(), search_play, board.key(), color, dice
+            )
+            turn = TurnRequest(color=color, moves=[
+                CheckerMove(from_point=point_for_slot(src), to_point=point_for_slot(dst))
+                for src, dst, _ in play
+            ])
+            game = await game_actors.run(game_id, self.game_service.make_turn, game_id, turn)
+
+        return game
+
+
+# Games with a bot loop running in this process, so each game has at most one
+_playing: set = set()
+
+
+async def play_bot_turns(game_id: str, bind: Any) -> None:
+    """Play bot turns for as long as a bot is on roll, so bot-vs-bot games finish.
+
+    Runs after the response is sent, in its own session: the request's
+    session is closed by then.
+    """
+    if game_id in _playing:
+        return
+    _playing.add(game_id)
+    db = SessionLocal(bind=bind)
+    try:
+        bot_service = BotService(db)
+        version = None
+        while True:
+            game = await bot_service.play_turn(game_id)
+            # Unchanged once a human is on roll or the game is over
+            if game is None or game.version == version:
+                return
+            version = game.version
+            # Give the connection back between turns
+            await run_db(db.close)
+    finally:
+        _playing.discard(game_id)
+        await run_db(db.close)
+
+
+async def schedule_bot_turn(
+    background_tasks: BackgroundTasks, db: Session, game: ActiveGame | None
+) -> None:
+    """Let a bot answer after the response is sent if it is now on roll."""
+    if game is None:
+        return
+    if await run_db(BotService(db).bot_to_move, game):
+        background_tasks.add_task(play_bot_turns, game.id, db.get_bind())
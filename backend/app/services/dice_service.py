@@ -1,48 +1,159 @@
-from random import randint
-from typing import Tuple, Optional
+"""Dice rolls and their history.
+
+Rolls come from app.core.dice. Their history is an audit log, not game
+state (the roll itself is recorded by the game's events, which the active-game
+registry also writes behind), so it is written behind the request: rows are buffered here and bulk-inserted by a flusher
+task started from the app lifespan, at most DICE_HISTORY_FLUSH_INTERVAL_MS
+after the roll and sooner once DICE_HISTORY_FLUSH_BATCH rows are waiting.
+Reading the history flushes first, and shutdown flushes everything.
+"""
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.database import AsyncService
+from app.core.dice import secure_dice
 from app.models.dice import DiceRollHistory
 
+logger = logging.getLogger(__name__)
+
+
+class DiceHistory:
+    """Buffers roll history rows and writes them in bulk."""
+
+    def __init__(
+        self,
+        flush_interval: float = settings.DICE_HISTORY_FLUSH_INTERVAL_MS / 1000,
+        flush_batch: int = settings.DICE_HISTORY_FLUSH_BATCH,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._pending: List[Tuple[Any, dict]] = []  # (bind, row)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def record(self, bind: Any, row: dict) -> None:
+        with self._lock:
+            self._pending.append((bind, row))
+            full = len(self._pending) >= self.flush_batch
+        if full:
+            if self._loop is not None and self._wake is not None:
+                self._loop.call_soon_threadsafe(self._wake.set)
+            else:
+                # No flusher running (scripts, tests): write the batch here
+                self.flush()
+
+    def flush(self) -> int:
+        """Bulk-insert every buffered row; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            by_bind: Dict[Any, List[dict]] = {}
+            for bind, row in batch:
+                by_bind.setdefault(bind, []).append(row)
+            written = 0
+            for bind, rows in by_bind.items():
+                try:
+                    with Session(bind) as db:
+                        db.execute(insert(DiceRollHistory), rows)
+                        db.commit()
+                    written += len(rows)
+                except Exception:
+                    logger.exception("Writing %d dice rolls failed; will retry", len(rows))
+                    with self._lock:
+                        self._pending[:0] = [(bind, row) for row in rows]
+            return written
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self.flush)
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = self._wake = None
+        await asyncio.to_thread(self.flush)
+
+
+dice_history = DiceHistory()
+
 
 class DiceService:
     def __init__(self, db: Session):
         self.db = db
 
-    def roll_dice(self, game_id: Optional[str] = None) -> Tuple[int, int]:
+    def roll_dice(self) -> Tuple[int, int]:
         """
-        Roll two six-sided dice, store the result in the database, and return their values.
-        Args:
-            game_id: Optional identifier for the game this roll belongs to
+        Roll two six-sided dice. The roll is not part of the history until
+        record_roll() is called, once the game has accepted it.
         Returns:
             A tuple of (die1, die2) where each die is a number between 1 and 6.
         """
-        die1 = randint(1, 6)
-        die2 = randint(1, 6)
+        return secure_dice.roll()
 
-        # Store the roll in the database
-        dice_roll = DiceRollHistory(
-            game_id=game_id, die1=die1, die2=die2, is_doubles=die1 == die2
-        )
-        self.db.add(dice_roll)
-        self.db.commit()
-
-        return (die1, die2)
+    def record_roll(self, dice: Tuple[int, int], game_id: Optional[str] = None) -> None:
+        """
+        Queue a roll for the roll history.
+        Args:
+            dice: The (die1, die2) that were rolled
+            game_id: Optional identifier for the game this roll belongs to
+        """
+        die1, die2 = dice
+        dice_history.record(self.db.get_bind(), {
+            "game_id": game_id,
+            "die1": die1,
+            "die2": die2,
+            "is_doubles": die1 == die2,
+            "timestamp": datetime.now(timezone.utc),
+        })
 
     def get_roll_history(
         self, limit: int = 10, game_id: Optional[str] = None
     ) -> list[DiceRollHistory]:
         """
-        Get the most recent dice rolls.
+        Get the most recent dice rolls, including those not yet written.
         Args:
             limit: Maximum number of rolls to return
             game_id: Optional game ID to filter rolls by
         Returns:
             List of dice rolls, ordered by most recent first
         """
+        dice_history.flush()
         query = self.db.query(DiceRollHistory)
 
         if game_id is not None:
             query = query.filter(DiceRollHistory.game_id == game_id)
 
         return query.order_by(DiceRollHistory.timestamp.desc()).limit(limit).all()
+
+
+class AsyncDiceService(AsyncService):
+    """DiceService for async handlers; queries run off the event loop."""
+
+    service_class = DiceService
@@ -1,83 +1,63 @@
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+"""Transactional email, queued in the outbox and delivered in the background.
+
+Messages used to be sent inside the request, so a slow SMTP server slowed
+registration, failed logins and password resets down with it. Now a message
+is rendered once, when it is queued, and added to the caller's session: the
+commit that stores the change also stores its email, and a rolled back
+change sends nothing. That commit wakes the worker in
+app.services.email_worker, which delivers the outbox.
+"""
+from datetime import datetime
+
+from jinja2 import Environment, select_autoescape, PackageLoader
 from pydantic import EmailStr
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
 from app.core.config import settings
-from jinja2 import Environment, select_autoescape, PackageLoader
+from app.models.email import OutboundEmail
+from app.services.email_worker import email_worker
 
-# Email templates environment
+# Email templates environment; templates are compiled on first use and kept
 env = Environment(
     loader=PackageLoader('app', 'templates/email'),
     autoescape=select_autoescape(['html', 'xml'])
 )
 
+
+def _wake_worker(session, *args) -> None:
+    email_worker.wake()
+
+
 class EmailService:
-    def __init__(self):
-        if not settings.EMAIL_ENABLED:
-            # For test environments, use a minimal configuration
-            self.config = ConnectionConfig(
-                MAIL_USERNAME="test@example.com",
-                MAIL_PASSWORD="test_password",
-                MAIL_FROM="test@example.com",
-                MAIL_PORT=587,
-                MAIL_SERVER="smtp.example.com",
-                MAIL_SSL_TLS=False,
-                MAIL_STARTTLS=True,
-                USE_CREDENTIALS=True,
-                SUPPRESS_SEND=True  # Suppress actual email sending in tests
-            )
-        else:
-            self.config = ConnectionConfig(
-                MAIL_USERNAME=settings.MAIL_USERNAME,
-                MAIL_PASSWORD=settings.MAIL_PASSWORD,
-                MAIL_FROM=settings.MAIL_FROM,
-                MAIL_PORT=settings.MAIL_PORT,
-                MAIL_SERVER=settings.MAIL_SERVER,
-                MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-                MAIL_STARTTLS=settings.MAIL_STARTTLS,
-                USE_CREDENTIALS=True
-            )
-        self.fastmail = FastMail(self.config)
+    def __init__(self, db: Session):
+        self.db = db
 
-    async def send_verification_email(self, email: EmailStr, token: str):
-        """Send verification email to user."""
+    def _queue(self, email: EmailStr, subject: str, template: str, **context) -> None:
+        """Render a message into the session; it is sent once the session commits."""
         if not settings.EMAIL_ENABLED:
-            # Skip sending email if disabled
             return
-
-        template = env.get_template('verification.html')
+        self.db.add(OutboundEmail(
+            recipient=email,
+            subject=subject,
+            html=env.get_template(template).render(**context),
+            next_attempt_at=datetime.utcnow(),
+        ))
+        if not event.contains(self.db, "after_commit", _wake_worker):
+            event.listen(self.db, "after_commit", _wake_worker)
+
+    def queue_verification_email(self, email: EmailStr, token: str) -> None:
+        """Queue the verification email for a new user."""
         verify_url = f"{settings.FRONTEND_URL}/verify?token={token}"
-        html = template.render(verify_url=verify_url)
-
-        message = MessageSchema(
-            subject="Verify your email",
-            recipients=[email],
-            body=html,
-            subtype="html"
-        )
-        await self.fastmail.send_message(message)
+        self._queue(email, "Verify your email", "verification.html", verify_url=verify_url)
 
-    async def send_password_reset_email(self, email: EmailStr, token: str):
-        """Send password reset email to user."""
-        template = env.get_template('password_reset.html')
+    def queue_password_reset_email(self, email: EmailStr, token: str) -> None:
+        """Queue a password reset email."""
         reset_url = f"{settings.FRONTEND_URL}/reset-password?token={token}"
-        html = template.render(reset_url=reset_url)
-
-        message = MessageSchema(
-            subject="Reset your password",
-            recipients=[email],
-            body=html,
-            subtype="html"
-        )
-        await self.fastmail.send_message(message)
-
-    async def send_account_locked_email(self, email: EmailStr, unlock_time: str):
-        """Send account locked notification email."""
-        template = env.get_template('account_locked.html')
-        html = template.render(unlock_time=unlock_time)
+        self._queue(email, "Reset your password", "password_reset.html", reset_url=reset_url)
 
-        message = MessageSchema(
-            subject="Account Temporarily Locked",
-            recipients=[email],
-            body=html,
-            subtype="html"
+    def queue_account_locked_email(self, email: EmailStr, unlock_time: str) -> None:
+        """Queue the account locked notification."""
+        self._queue(
+            email, "Account Temporarily Locked", "account_locked.html", unlock_time=unlock_time
         )
-        await self.fastmail.send_message(message) 
\ No newline at end of file
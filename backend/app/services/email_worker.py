@@ -0,0 +1,231 @@
+"""Background delivery of the email outbox.
+
+Each process runs one worker task. It claims due messages in batches of
+EMAIL_BATCH_SIZE with a single UPDATE that leases them for
+EMAIL_LEASE_SECONDS, so several workers can share the outbox and a message
+whose sender died is picked up again once the lease runs out. Messages go
+out over one SMTP connection, which is opened on demand, kept across
+batches and closed after EMAIL_SMTP_IDLE_SECONDS without mail.
+
+Delivered messages are deleted. A failed one is retried with exponential
+backoff, EMAIL_RETRY_BASE_SECONDS doubling up to EMAIL_RETRY_MAX_SECONDS,
+and marked failed after EMAIL_MAX_ATTEMPTS.
+
+For local testing, run the aiosmtpd debugging server and point MAIL_SERVER
+and MAIL_PORT at it with MAIL_STARTTLS off:
+
+    python -m aiosmtpd -n -l localhost:1025
+"""
+import asyncio
+import logging
+import secrets
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional
+
+import aiosmtplib
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.email import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSender:
+    """Sends messages over one SMTP connection, reconnecting when it drops."""
+
+    def __init__(self):
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self.connections = 0
+
+    async def send(self, message: EmailMessage) -> None:
+        if self._smtp is None or not self._smtp.is_connected:
+            smtp = aiosmtplib.SMTP(
+                hostname=settings.MAIL_SERVER,
+                port=settings.MAIL_PORT,
+                username=settings.MAIL_USERNAME or None,
+                password=settings.MAIL_PASSWORD or None,
+                use_tls=settings.MAIL_SSL_TLS,
+                start_tls=settings.MAIL_STARTTLS,
+                timeout=settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+            )
+            await smtp.connect()
+            self._smtp = smtp
+            self.connections += 1
+        try:
+            await self._smtp.send_message(message)
+        except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPTimeoutError, OSError):
+            await self.close()
+            raise
+
+    async def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None and smtp.is_connected:
+            try:
+                await smtp.quit()
+            except (aiosmtplib.SMTPException, OSError):
+                smtp.close()
+
+
+class EmailWorker:
+    def __init__(
+        self,
+        bind: Any = None,
+        sender: Any = None,
+        batch_size: int = settings.EMAIL_BATCH_SIZE,
+        poll_interval: float = settings.EMAIL_POLL_SECONDS,
+        max_attempts: int = settings.EMAIL_MAX_ATTEMPTS,
+        retry_base: float = settings.EMAIL_RETRY_BASE_SECONDS,
+        retry_max: float = settings.EMAIL_RETRY_MAX_SECONDS,
+        lease: float = settings.EMAIL_LEASE_SECONDS,
+        idle: float = settings.EMAIL_SMTP_IDLE_SECONDS,
+    ):
+        self.bind = bind if bind is not None else engine
+        self.sender = sender or SMTPSender()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.idle = idle
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_send = 0.0
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+
+    def wake(self) -> None:
+        """Have the worker look at the outbox now; safe from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before retrying a message that has failed `attempts` times."""
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    def _claim(self) -> List[Any]:
+        now = datetime.utcnow()
+        lease = secrets.token_hex(8)
+        is_due = (OutboundEmail.status == "pending", OutboundEmail.next_attempt_at <= now)
+        due = (
+            select(OutboundEmail.id)
+            .where(*is_due)
+            .order_by(OutboundEmail.next_attempt_at)
+            .limit(self.batch_size)
+        )
+        with Session(self.bind) as db:
+            db.execute(
+                update(OutboundEmail)
+                # Checked again on the rows themselves: on databases where the
+                # subquery can see rows another worker is leasing (Postgres under
+                # READ COMMITTED), the UPDATE re-evaluates this after the other
+                # lease commits and skips the rows it took
+                .where(OutboundEmail.id.in_(due.scalar_subquery()), *is_due)
+                .values(lease=lease, next_attempt_at=now + timedelta(seconds=self.lease))
+                .execution_options(synchronize_session=False)
+            )
+            rows = db.execute(
+                select(
+                    OutboundEmail.id,
+                    OutboundEmail.recipient,
+                    OutboundEmail.subject,
+                    OutboundEmail.html,
+                    OutboundEmail.attempts,
+                ).where(OutboundEmail.lease == lease)
+            ).all()
+            db.commit()
+        return rows
+
+    def _record(self, sent: List[int], failed: Dict[int, tuple]) -> None:
+        now = datetime.utcnow()
+        with Session(self.bind) as db:
+            if sent:
+                db.execute(delete(OutboundEmail).where(OutboundEmail.id.in_(sent)))
+            for message_id, (attempts, error) in failed.items():
+                values = {"attempts": attempts, "last_error": error[:500], "lease": None}
+                if attempts >= self.max_attempts:
+                    values["status"] = "failed"
+                else:
+                    values["next_attempt_at"] = now + timedelta(seconds=self.backoff(attempts))
+                db.execute(
+                    update(OutboundEmail).where(OutboundEmail.id == message_id).values(**values)
+                )
+            db.commit()
+
+    @staticmethod
+    def _message(row: Any) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = settings.MAIL_FROM
+        message["To"] = row.recipient
+        message["Subject"] = row.subject
+        message.set_content(row.html, subtype="html")
+        return message
+
+    async def drain(self) -> int:
+        """Send one batch of due messages; returns how many were claimed."""
+        rows = await asyncio.to_thread(self._claim)
+        sent: List[int] = []
+        failed: Dict[int, tuple] = {}
+        for row in rows:
+            try:
+                await self.sender.send(self._message(row))
+                sent.append(row.id)
+            except Exception as exc:
+                logger.warning("Sending email %d to %s failed: %s", row.id, row.recipient, exc)
+                failed[row.id] = (row.attempts + 1, repr(exc))
+        if rows:
+            self._last_send = time.monotonic()
+            await asyncio.to_thread(self._record, sent, failed)
+            self._sent += len(sent)
+            for attempts, _ in failed.values():
+                if attempts >= self.max_attempts:
+                    self._failed += 1
+                else:
+                    self._retried += 1
+        return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while await self.drain() == self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("Email delivery pass failed; will retry")
+            if time.monotonic() - self._last_send > self.idle:
+                await self.sender.close()
+
+    def start(self) -> None:
+        """Start delivering on the running event loop; mail already queued goes out first."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._wake.set()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop delivering; whatever is left stays queued for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.sender.close()
+
+    def stats(self) -> dict:
+        return {"sent": self._sent, "retried": self._retried, "failed": self._failed}
+
+
+email_worker = EmailWorker()
@@ -0,0 +1,81 @@
+"""Per-game actors that apply one game's state changes strictly in order.
+
+Each active game gets a mailbox and a single consumer task. Operations are
+queued and run one at a time in a worker thread, so requests for the same
+game (double clicks, retries, both players acting) queue up cheaply in
+process instead of racing each other in the database, while different games
+run in parallel. An actor is created on the first operation for its game and
+reaped once its mailbox has been empty for GAME_ACTOR_IDLE_SECONDS.
+"""
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+from app.core.config import settings
+
+
+class GameActor:
+    def __init__(self, game_id: str, actors: "GameActors"):
+        self.game_id = game_id
+        self.loop = asyncio.get_running_loop()
+        self.mailbox: asyncio.Queue = asyncio.Queue(maxsize=settings.GAME_ACTOR_MAILBOX_SIZE)
+        self._actors = actors
+        self._task = self.loop.create_task(self._consume())
+
+    async def submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Queue `fn(*args)` behind the game's earlier operations and await its result."""
+        future = self.loop.create_future()
+        await self.mailbox.put((fn, args, future))
+        return await future
+
+    async def _consume(self) -> None:
+        while True:
+            try:
+                fn, args, future = await asyncio.wait_for(
+                    self.mailbox.get(), timeout=self._actors.idle_timeout
+                )
+            except asyncio.TimeoutError:
+                # Nothing can be queued between this check and the reap: both
+                # happen on the event loop without yielding
+                if self.mailbox.empty():
+                    self._actors._reap(self)
+                    return
+                continue
+            if future.cancelled():
+                continue
+            try:
+                result = await asyncio.to_thread(fn, *args)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+
+class GameActors:
+    """The live actors of this process, by game ID."""
+
+    def __init__(self, idle_timeout: float = settings.GAME_ACTOR_IDLE_SECONDS):
+        self.idle_timeout = idle_timeout
+        self._actors: Dict[str, GameActor] = {}
+
+    def get(self, game_id: str) -> Optional[GameActor]:
+        return self._actors.get(game_id)
+
+    async def run(self, game_id: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a state-changing operation on a game after those already queued for it."""
+        actor = self._actors.get(game_id)
+        if actor is None or actor.loop is not asyncio.get_running_loop():
+            actor = GameActor(game_id, self)
+            self._actors[game_id] = actor
+        return await actor.submit(fn, *args)
+
+    def _reap(self, actor: GameActor) -> None:
+        if self._actors.get(actor.game_id) is actor:
+            del self._actors[actor.game_id]
+
+    def __len__(self) -> int:
+        return len(self._actors)
+
+
+game_actors = GameActors()
@@ -0,0 +1,366 @@
+"""In-memory authoritative store for active games.
+
+Live games are held here and served straight from memory; moves are applied
+in memory and their events are written to the database behind the request,
+in batches, by a flusher task started from the app lifespan. A game's events
+reach the database at most ACTIVE_GAME_FLUSH_INTERVAL_MS after they happen
+(sooner once ACTIVE_GAME_FLUSH_BATCH events are waiting), and everything is
+flushed on shutdown. Idle games are evicted once they are clean.
+
+Writes are compare-and-swap on the game version, the sequence number of its
+last event: in memory under the registry lock, and again in the database
+when flushing (UPDATE ... WHERE id = ? AND version = ?).
+
+Requests are answered before their events are flushed, so a version
+conflict found only at flush time would drop moves a client was already
+told succeeded. The registry therefore has to be the database's only
+writer: start() takes an exclusive lock on ACTIVE_GAME_LOCK_PATH and
+refuses to run while another process holds it, which makes a second
+uvicorn worker (or a second app on the same host) fail at startup. The
+lock file belongs next to the database; processes on other hosts are not
+covered by it. A flush that still finds a row moved on underneath it drops
+the game from memory instead of overwriting the other writer.
+"""
+import asyncio
+import fcntl
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.board import position_hash_hex
+from app.core.config import settings
+from app.core.events import STATE, event_payload, fold
+from app.core.gnubg import state_match_id, state_position_id
+from app.models.game import Game, GameEvent
+
+logger = logging.getLogger(__name__)
+
+
+class VersionConflict(Exception):
+    """The game changed since the version a write was computed against."""
+
+    def __init__(self, game_id: str, expected: int, actual: int):
+        super().__init__(f"Game {game_id} is at version {actual}, not {expected}")
+        self.game_id = game_id
+        self.expected = expected
+        self.actual = actual
+
+
+def state_position_hash(state: dict) -> Optional[str]:
+    try:
+        return position_hash_hex(state)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        # Free-form states written through PUT /state may not be positions
+        return None
+
+
+def state_position_ids(state: dict) -> tuple[Optional[str], Optional[str]]:
+    """GNU BG Position ID and Match ID of a state, or Nones if it is not a position."""
+    try:
+        return state_position_id(state), state_match_id(state)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        return None, None
+
+
+class ActiveGame:
+    """A live game; exposes the same fields as the Game model for responses."""
+
+    def __init__(self, game: Game, state: dict, version: int, bind: Any):
+        self.id = game.id
+        self.state = state
+        self.position_hash = game.position_hash
+        self.position_id, self.match_id = state_position_ids(state)
+        self.created_at = game.created_at
+        self.updated_at = game.updated_at
+        self.snapshot_seq = game.snapshot_seq
+        self.version = version  # Sequence number of the last event applied to `state`
+        self.flushed_version = game.version  # Version of the row in the database
+        self.pending: List[dict] = []  # Events not yet written, ending at `version`
+        self.bind = bind  # Engine the game was loaded from and is flushed to
+        self.last_access = time.monotonic()
+
+
+class WriterLockHeld(RuntimeError):
+    """Another process already serves the active games of this database."""
+
+
+class GameRegistry:
+    def __init__(
+        self,
+        max_games: int = settings.ACTIVE_GAME_MAX,
+        ttl: float = settings.ACTIVE_GAME_TTL_SECONDS,
+        flush_interval: float = settings.ACTIVE_GAME_FLUSH_INTERVAL_MS / 1000,
+        flush_batch: int = settings.ACTIVE_GAME_FLUSH_BATCH,
+    ):
+        self.max_games = max_games
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self._games: "OrderedDict[str, ActiveGame]" = OrderedDict()
+        self._pending_count = 0
+        self._lock = threading.Lock()  # Guards the games and their pending events
+        self._flush_lock = threading.Lock()  # Keeps flushes, and so event order, serial
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock_file = None  # Held open while this process is the only writer
+
+    def get(self, game_id: str) -> Optional[ActiveGame]:
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is not None:
+                game.last_access = time.monotonic()
+                self._games.move_to_end(game_id)
+            return game
+
+    def load(self, db: Session, game_id: str) -> Optional[ActiveGame]:
+        """Serve a game from memory, loading it from the database on a miss."""
+        game = self.get(game_id)
+        if game is not None:
+            return game
+        row = db.query(Game).filter(Game.id == game_id).populate_existing().first()
+        if row is None:
+            return None
+        events = (
+            db.query(GameEvent)
+            .filter(GameEvent.game_id == game_id, GameEvent.seq > row.snapshot_seq)
+            .order_by(GameEvent.seq)
+            .all()
+        )
+        state = fold(row.state, [event.as_event() for event in events])
+        version = events[-1].seq if events else row.snapshot_seq
+        with self._lock:
+            # Another request may have loaded it meanwhile; the first one wins
+            game = self._games.get(game_id)
+            if game is None:
+                game = ActiveGame(row, state, version, db.get_bind())
+                self._games[game_id] = game
+            return game
+
+    def record(
+        self, game: ActiveGame, events: List[dict], expected_version: Optional[int] = None
+    ) -> ActiveGame:
+        """Apply events to a live game and queue them for the database.
+
+        With `expected_version`, the events are only applied if the game is
+        still at that version; otherwise VersionConflict is raised. A game
+        evicted or replaced since it was read is reloaded from its snapshot
+        and event log, and the events go to that copy if it is still at the
+        version they were planned against.
+        """
+        while True:
+            with self._lock:
+                if self._games.get(game.id) is game:
+                    full = self._apply(game, events, expected_version)
+                    break
+            # Evictions only drop clean games, so the database is up to date
+            with Session(bind=game.bind) as db:
+                current = self.load(db, game.id)
+            if current is None:
+                raise VersionConflict(game.id, game.version, -1)
+            if expected_version is None:
+                expected_version = game.version
+            game = current
+        if full:
+            self._request_flush()
+        return game
+
+    def _apply(self, game: ActiveGame, events: List[dict], expected_version: Optional[int]) -> bool:
+        """Apply events to a game under the lock; True once a flush is due."""
+        if expected_version is not None and game.version != expected_version:
+            raise VersionConflict(game.id, expected_version, game.version)
+        if not events:
+            return False
+        # Everything that can fail runs before the game is touched
+        state = fold(game.state, events)
+        position_hash = state_position_hash(state)
+        position_id, match_id = state_position_ids(state)
+        game.state = state
+        game.position_hash = position_hash
+        game.position_id, game.match_id = position_id, match_id
+        game.version += len(events)
+        game.pending.extend(events)
+        game.updated_at = datetime.now(timezone.utc)
+        game.last_access = time.monotonic()
+        self._pending_count += len(events)
+        return self._pending_count >= self.flush_batch
+
+    def pending_events(self, game_id: str, after: int = 0) -> List[GameEvent]:
+        """Unflushed events of a game as (unsaved) GameEvent rows."""
+        with self._lock:
+            game = self._games.get(game_id)
+            if game is None:
+                return []
+            first = game.version - len(game.pending) + 1
+            return [
+                GameEvent(game_id=game_id, seq=seq, type=event["type"], data=event_payload(event))
+                for seq, event in enumerate(game.pending, start=first)
+                if seq > after
+            ]
+
+    def flush(self) -> int:
+        """Write every pending event to the database; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = [
+                    (
+                        game,
+                        game.pending,
+                        game.version,
+                        game.state,
+                        game.position_hash,
+                        game.position_id,
+                    )
+                    for game in self._games.values()
+                    if game.pending
+                ]
+                for game, *_ in batch:
+                    game.pending = []
+                self._pending_count = 0
+            if not batch:
+                return 0
+
+            by_bind: Dict[Any, list] = {}
+            for item in batch:
+                by_bind.setdefault(item[0].bind, []).append(item)
+            written = 0
+            for bind, items in by_bind.items():
+                try:
+                    lost = self._write(bind, items)
+                    written += sum(len(events) for game, events, *_ in items if game not in lost)
+                except Exception:
+                    logger.exception("Flushing %d active games failed; will retry", len(items))
+                    with self._lock:
+                        for game, events, *_ in items:
+                            game.pending = events + game.pending
+                            self._pending_count += len(events)
+            return written
+
+    def _write(self, bind: Any, items: list) -> set:
+        """Write one database's share of a flush; returns the games that lost a conflict."""
+        flushed = {}
+        lost = set()
+        with Session(bind=bind) as db:
+            for game, events, version, state, position_hash, position_id in items:
+                values = {
+                    "position_hash": position_hash,
+                    "position_id": position_id,
+                    "version": version,
+                }
+                if (
+                    version - game.snapshot_seq >= settings.GAME_SNAPSHOT_INTERVAL
+                    or any(event["type"] == STATE for event in events)
+                ):
+                    values.update(state=state, snapshot_seq=version)
+                swapped = db.execute(
+                    update(Game)
+                    .where(Game.id == game.id, Game.version == game.flushed_version)
+                    .values(**values)
+                ).rowcount
+                if not swapped:
+                    lost.add(game)
+                    continue
+                first = version - len(events) + 1
+                db.add_all(
+                    GameEvent(game_id=game.id, seq=n, type=event["type"], data=event_payload(event))
+                    for n, event in enumerate(events, start=first)
+                )
+                flushed[game] = values
+            db.commit()
+        for game, values in flushed.items():
+            game.flushed_version = values["version"]
+            game.snapshot_seq = values.get("snapshot_seq", game.snapshot_seq)
+        if lost:
+            with self._lock:
+                for game in lost:
+                    logger.error(
+                        "Game %s was written by another process; dropping it from memory",
+                        game.id,
+                    )
+                    if self._games.get(game.id) is game:
+                        del self._games[game.id]
+                        self._pending_count -= len(game.pending)
+        return lost
+
+    def evict_idle(self) -> int:
+        """Drop clean games that are idle past the TTL or beyond the size limit."""
+        now = time.monotonic()
+        evicted = 0
+        with self._lock:
+            overflow = len(self._games) - self.max_games
+            # Least recently used first
+            for game_id, game in list(self._games.items()):
+                if game.pending:
+                    continue
+                if overflow > 0 or now - game.last_access > self.ttl:
+                    del self._games[game_id]
+                    overflow -= 1
+                    evicted += 1
+                elif overflow <= 0:
+                    break
+        return evicted
+
+    def _request_flush(self) -> None:
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await asyncio.to_thread(self.flush)
+            self.evict_idle()
+
+    def acquire_writer_lock(self, path: str = settings.ACTIVE_GAME_LOCK_PATH) -> None:
+        """Become the only process serving games, or raise WriterLockHeld."""
+        if self._lock_file is not None:
+            return
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise WriterLockHeld(
+                f"Another process holds {path}; active games need a single worker"
+            ) from None
+        self._lock_file = lock_file
+
+    @property
+    def is_writer(self) -> bool:
+        return self._lock_file is not None
+
+    def release_writer_lock(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()  # Closing the file drops the lock
+            self._lock_file = None
+
+    def start(self) -> None:
+        """Take the writer lock and start the background flusher on the running loop."""
+        self.acquire_writer_lock()
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out everything still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+        self.release_writer_lock()
+
+
+game_registry = GameRegistry()
@@ -1,253 +1,394 @@
 from sqlalchemy.orm import Session
+from app.core.database import AsyncService, run_db
 from fastapi import HTTPException
-from app.models.game import Game
-from app.schemas.game import GameCreate, MoveRequest
-from typing import Optional
+from app.models.game import Game, GameEvent
+from app.models.user import PieceColor, User
+from app.schemas.game import GameCreate, GameState, MoveRequest, TurnRequest
+from app.core.board import BoardState, opponent, slot_for_point, validate_checker_counts
+from app.core.config import settings
+from app.core.gnubg import MatchInfo, board_from_position_id, decode_match_id
+from app.core.events import (
+    fold,
+    move_event,
+    roll_event,
+    state_event,
+    turn_end_event,
+)
+from app.core.moves import (
+    LegalPlays,
+    is_legal_step,
+    legal_plays,
+    remaining_dice,
+    single_moves,
+)
+from app.services.game_registry import (
+    ActiveGame,
+    VersionConflict,
+    game_registry,
+    state_position_hash,
+    state_position_ids,
+)
+from app.services.game_updates import game_updates
+from app.services.http_cache import player_stamps
+from app.services.user_cache import user_cache
+from typing import Callable, List, Optional, Tuple
 
 
 class GameService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_game(self, game_data: GameCreate, game_id: Optional[str] = None) -> Game:
+    def create_game(self, game_data: GameCreate, game_id: Optional[str] = None) -> ActiveGame:
         """Create a new game with initial state."""
         # Convert GameState to dict before saving
         state_dict = game_data.state.model_dump()
-        game = Game(id=game_id, state=state_dict) if game_id else Game(state=state_dict)
+        game = Game(id=game_id) if game_id else Game()
+        game.state = state_dict
+        game.position_hash = state_position_hash(state_dict)
+        game.position_id = state_position_ids(state_dict)[0]
         self.db.add(game)
         self.db.commit()
-        self.db.refresh(game)
-        return game
+        return game_registry.load(self.db, game.id)
 
-    def get_game(self, game_id: str) -> Game | None:
-        """Get a game by its ID."""
-        return self.db.query(Game).filter(Game.id == game_id).first()
+    def get_game(self, game_id: str) -> ActiveGame | None:
+        """Get a live game by its ID, from memory when it is active."""
+        return game_registry.load(self.db, game_id)
 
-    def make_move(self, game_id: str, move: MoveRequest) -> Game | None:
-        """Validate and execute a move in the game."""
+    def get_events(self, game_id: str, after: int = 0) -> list[GameEvent]:
+        """A game's events with a sequence number above `after`, oldest first."""
+        stored = (
+            self.db.query(GameEvent)
+            .filter(GameEvent.game_id == game_id, GameEvent.seq > after)
+            .order_by(GameEvent.seq)
+            .all()
+        )
+        # Events still waiting for the write-behind flush come after those on disk
+        last = stored[-1].seq if stored else after
+        return stored + game_registry.pending_events(game_id, after=last)
+
+    def join_game(self, game_id: str, user: User, color: PieceColor) -> User:
+        """Seat a user in a game with the given color."""
+        # Check if game exists
         game = self.get_game(game_id)
         if not game:
-            return None
+            raise HTTPException(status_code=404, detail="Game not found")
+
+        # Check if user is already in a game
+        if user.current_game_id:
+            raise HTTPException(
+                status_code=400,
+                detail="User is already in a game. Leave current game first."
+            )
+
+        # Check if color is already taken in this game
+        existing_players = self.db.query(User).filter(User.current_game_id == game_id).all()
+        for player in existing_players:
+            if player.piece_color == color:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Color {color.value} is already taken in this game"
+                )
+
+        # Check if game is full
+        if len(existing_players) >= 2:
+            raise HTTPException(
+                status_code=400,
+                detail="Game is full"
+            )
+
+        # Join the game, unless the user took a seat elsewhere meanwhile (games
+        # are serialized per game, so two joins for different games can race)
+        claimed = self.db.query(User).filter(
+            User.id == user.id, User.current_game_id.is_(None)
+        ).update(
+            {User.current_game_id: game_id, User.piece_color: color},
+            synchronize_session=False,
+        )
+        if not claimed:
+            self.db.rollback()
+            raise HTTPException(status_code=409, detail="User joined another game meanwhile")
+        self.db.commit()
+        player_stamps.changed(game_id)
+        user_cache.invalidate_user(user.id)
+        self.db.refresh(user)
+        return user
+
+    def leave_game(self, game_id: str, user: User) -> User:
+        """Take a user out of a game."""
+        # Check if user is in this game
+        if user.current_game_id != game_id:
+            raise HTTPException(
+                status_code=400,
+                detail="User is not in this game"
+            )
+
+        # Leave the game
+        user.current_game_id = None
+        user.piece_color = None
+        self.db.commit()
+        player_stamps.changed(game_id)
+        user_cache.invalidate_user(user.id)
+        self.db.refresh(user)
+        return user
+
+    def get_players(self, game_id: str) -> list[User]:
+        """The users seated in a game."""
+        return self.db.query(User).filter(User.current_game_id == game_id).all()
+
+    def find_games_by_position(self, position_hash: str) -> list[Game]:
+        """Get all games in the given position as of the last write-behind flush."""
+        return self.db.query(Game).filter(Game.position_hash == position_hash).all()
+
+    def find_games_by_position_id(self, position_id: str) -> list[Game]:
+        """Get all games whose GNU BG Position ID is `position_id`, as of the last flush."""
+        return self.db.query(Game).filter(Game.position_id == position_id).all()
 
-        # Get current game state
-        state = game.state
-        points = state.get("points", {})
-        bar = state.get("bar", {"white": 0, "black": 0})
-        home = state.get("home", {"white": 0, "black": 0})
-        
+    def create_game_from_ids(
+        self, position_id: str, match_id: Optional[str] = None, game_id: Optional[str] = None
+    ) -> ActiveGame:
+        """Create a game set up from a GNU BG Position ID and optional Match ID.
+
+        The Match ID supplies the player on roll and the dice; without one,
+        white is on roll and has not rolled yet.
+        """
+        try:
+            info = decode_match_id(match_id) if match_id else MatchInfo()
+            board = board_from_position_id(position_id, info.on_roll)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        state = dict(
+            board.to_state(),
+            current_turn=info.on_roll,
+            dice_state={"values": list(info.dice) if info.dice else None, "used_values": []},
+        )
+        return self.create_game(GameCreate(state=GameState(**state)), game_id)
+
+    def roll(
+        self, game_id: str, dice: Tuple[int, int], expected_version: Optional[int] = None
+    ) -> ActiveGame | None:
+        """Record a roll for the player on roll, passing the turn if it cannot be played."""
+        return self._write(game_id, lambda state: self.roll_events(state, dice), expected_version)
+
+    def roll_events(self, state: dict, dice: Tuple[int, int]) -> list[dict]:
+        # A finished or unplayable turn clears the dice, so any values left
+        # belong to a turn that is still being played
+        if state["dice_state"]["values"] is not None:
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot roll again until current roll is used or turn is complete"
+            )
+        return self._then_advance(state, [roll_event(dice)])[0]
+
+    def make_move(
+        self, game_id: str, move: MoveRequest, expected_version: Optional[int] = None
+    ) -> ActiveGame | None:
+        """Validate and execute a move in the game."""
+        return self._write(game_id, lambda state: self.move_events(state, move), expected_version)
+
+    def apply_move(self, state: dict, move: MoveRequest) -> dict:
+        """Validate a single checker move and return the resulting state."""
+        return self._move(state, move)[1]
+
+    def move_events(self, state: dict, move: MoveRequest) -> list[dict]:
+        """Validate a single checker move and return the events it produces."""
+        return self._move(state, move)[0]
+
+    def _move(self, state: dict, move: MoveRequest) -> Tuple[list[dict], dict]:
         # Check if it's the player's turn
         if move.color != state["current_turn"]:
             raise HTTPException(status_code=400, detail="Not your turn")
-            
+
         # Check if dice have been rolled
         if not state["dice_state"]["values"]:
             raise HTTPException(status_code=400, detail="Must roll dice before moving")
 
         # Validate move based on game rules
-        if not self._is_valid_move(move, state):
+        board = BoardState.from_state(state)
+        die = self._move_die(move, board, remaining_dice(state["dice_state"]))
+        if die is None:
             raise HTTPException(status_code=400, detail="Invalid move")
 
-        # Execute the move
-        new_state = self._execute_move(state, move)
-        
-        # Update used dice values
-        dice_values = state["dice_state"]["values"]
-        move_distance = abs(move.to_point - move.from_point)
-        if move_distance in dice_values and move_distance not in state["dice_state"]["used_values"]:
-            state["dice_state"]["used_values"].append(move_distance)
-        
-        # Check if turn is complete
-        if len(state["dice_state"]["used_values"]) == len(dice_values):
-            # Reset dice state and switch turns
-            new_state["dice_state"]["values"] = None
-            new_state["dice_state"]["used_values"] = []
-            new_state["current_turn"] = "black" if state["current_turn"] == "white" else "white"
-        
-        game.state = new_state
-        self.db.commit()
-        self.db.refresh(game)
-        return game
-
-    def _is_valid_move(
-        self, move: MoveRequest, state: dict
-    ) -> bool:
-        """Validate if a move is legal according to backgammon rules."""
-        points = state.get("points", {})
-        bar = state.get("bar", {"white": 0, "black": 0})
-        home = state.get("home", {"white": 0, "black": 0})
-        dice_state = state.get("dice_state", {})
-        
-        from_point = move.from_point
-        to_point = move.to_point
-        color = move.color
-        
-        # Validate move distance against dice roll
-        move_distance = abs(to_point - from_point)
-        dice_values = dice_state.get("values", ())
-        used_values = dice_state.get("used_values", [])
-        if move_distance not in dice_values or move_distance in used_values:
-            return False
-
-        # Basic validation
-        if from_point == to_point:
-            return False
-
-        # Validate moving from points
-        if from_point >= 0 and from_point <= 24:
-            source_point = points.get(str(from_point))
-            if (
-                not source_point
-                or source_point.get("count", 0) <= 0
-                or source_point.get("color") != color
-            ):
-                return False
-
-            # If moving to another point
-            if to_point >= 0 and to_point <= 24:
-                target_point = points.get(str(to_point))
-                # Can't move to a point with 2 or more opponent pieces
-                if (
-                    target_point
-                    and target_point.get("count", 0) > 1
-                    and target_point.get("color") != color
-                ):
-                    return False
-
-            # If moving to home
-            elif to_point == 25 or to_point == 26:
-                # White can only move to white home (25) and black to black home (26)
-                if (color == "white" and to_point == 26) or (
-                    color == "black" and to_point == 25
-                ):
-                    return False
-
-        # Validate moving from bar
-        elif from_point == -1:
-            if bar[color] <= 0:
-                return False
-
-            # Can't move from bar to home
-            if to_point == 25 or to_point == 26:
-                return False
-
-            target_point = points.get(str(to_point))
-            if (
-                target_point
-                and target_point.get("count", 0) > 1
-                and target_point.get("color") != color
-            ):
-                return False
-
-        # Validate moving from home
-        elif from_point == 25 or from_point == 26:
-            home_count = home["white"] if from_point == 25 else home["black"]
-            if home_count <= 0:
-                return False
-
-            # Can't move between homes
-            if to_point == 25 or to_point == 26:
-                return False
-
-            if to_point >= 0 and to_point <= 24:
-                target_point = points.get(str(to_point))
-                if (
-                    target_point
-                    and target_point.get("count", 0) > 1
-                    and target_point.get("color") != color
-                ):
-                    return False
-
-        return True
-
-    def _execute_move(self, state: dict, move: MoveRequest) -> dict:
-        """Execute a validated move and return the new game state."""
-        new_state = state.copy()
-        points = new_state.get("points", {}).copy()
-        bar = new_state.get("bar", {"white": 0, "black": 0}).copy()
-        home = new_state.get("home", {"white": 0, "black": 0}).copy()
-
-        from_point = move.from_point
-        to_point = move.to_point
-        color = move.color
-        opponent_color = "black" if color == "white" else "white"
-
-        # Handle moving from points
-        if from_point >= 0 and from_point <= 24:
-            source_point = points.get(str(from_point), {"color": color, "count": 0})
-            points[str(from_point)] = {
-                "color": source_point["color"],
-                "count": source_point["count"] - 1,
-            }
-
-            if to_point == -1:  # Moving to bar
-                bar[color] = bar.get(color, 0) + 1
-            elif to_point == 25 or to_point == 26:  # Moving to home
-                home_color = "white" if to_point == 25 else "black"
-                home[home_color] = home.get(home_color, 0) + 1
-            else:  # Moving to another point
-                target_point = points.get(str(to_point), {"color": color, "count": 0})
-                
-                # Check if there's a single opponent piece to capture
-                if target_point.get("color") == opponent_color and target_point.get("count") == 1:
-                    # Move opponent piece to the bar
-                    bar[opponent_color] = bar.get(opponent_color, 0) + 1
-                    # Place our piece on the point
-                    points[str(to_point)] = {"color": color, "count": 1}
-                else:
-                    # Normal move - add our piece to existing pieces
-                    points[str(to_point)] = {
-                        "color": color,
-                        "count": target_point["count"] + 1 if target_point["color"] == color else 1,
-                    }
-
-        # Handle moving from bar
-        elif from_point == -1:
-            bar[color] = bar[color] - 1
-            target_point = points.get(str(to_point), {"color": color, "count": 0})
-            
-            # Check if there's a single opponent piece to capture
-            if target_point.get("color") == opponent_color and target_point.get("count") == 1:
-                # Move opponent piece to the bar
-                bar[opponent_color] = bar.get(opponent_color, 0) + 1
-                # Place our piece on the point
-                points[str(to_point)] = {"color": color, "count": 1}
-            else:
-                # Normal move - add our piece to existing pieces
-                points[str(to_point)] = {"color": color, "count": target_point["count"] + 1 if target_point["color"] == color else 1}
-
-        # Handle moving from home
-        elif from_point == 25 or from_point == 26:
-            home_color = "white" if from_point == 25 else "black"
-            home[home_color] = home[home_color] - 1
-
-            if to_point == -1:  # Moving to bar
-                bar[color] = bar.get(color, 0) + 1
-            else:  # Moving to a point
-                target_point = points.get(str(to_point), {"color": color, "count": 0})
-                
-                # Check if there's a single opponent piece to capture
-                if target_point.get("color") == opponent_color and target_point.get("count") == 1:
-                    # Move opponent piece to the bar
-                    bar[opponent_color] = bar.get(opponent_color, 0) + 1
-                    # Place our piece on the point
-                    points[str(to_point)] = {"color": color, "count": 1}
-                else:
-                    # Normal move - add our piece to existing pieces
-                    points[str(to_point)] = {"color": color, "count": target_point["count"] + 1 if target_point["color"] == color else 1}
-
-        # Clean up points with count 0
-        points = {k: v for k, v in points.items() if v["count"] > 0}
-
-        new_state["points"] = points
-        new_state["bar"] = bar
-        new_state["home"] = home
-        return new_state
-
-    def update_game_state(self, game_id: str, new_state: dict) -> Game | None:
+        # Execute the move and record the die it used
+        return self._then_advance(
+            state, [move_event(move.color, move.from_point, move.to_point, die)]
+        )
+
+    def make_turn(
+        self, game_id: str, turn: TurnRequest, expected_version: Optional[int] = None
+    ) -> ActiveGame | None:
+        """Validate and execute a complete play as one batch of events."""
+        return self._write(game_id, lambda state: self.turn_events(state, turn), expected_version)
+
+    def apply_turn(self, state: dict, turn: TurnRequest) -> dict:
+        """Validate a complete play for the remaining dice and return the resulting state."""
+        return self._turn(state, turn)[1]
+
+    def turn_events(self, state: dict, turn: TurnRequest) -> list[dict]:
+        """Validate a complete play for the remaining dice and return its events."""
+        return self._turn(state, turn)[0]
+
+    def _turn(self, state: dict, turn: TurnRequest) -> Tuple[list[dict], dict]:
+        if turn.color != state["current_turn"]:
+            raise HTTPException(status_code=400, detail="Not your turn")
+
+        if not state["dice_state"]["values"]:
+            raise HTTPException(status_code=400, detail="Must roll dice before moving")
+
+        board = BoardState.from_state(state)
+        dice = remaining_dice(state["dice_state"])
+        legal = legal_plays(board, turn.color, dice)
+        if len(turn.moves) != legal.max_moves:
+            raise HTTPException(
+                status_code=400, detail=f"Play must consist of {legal.max_moves} moves"
+            )
+
+        steps = []
+        for move in turn.moves:
+            src = slot_for_point(move.from_point, turn.color)
+            dst = slot_for_point(move.to_point, turn.color)
+            if src is None or dst is None:
+                raise HTTPException(status_code=400, detail="Invalid move")
+            steps.append((src, dst))
+
+        match = self._match_dice(board, turn.color, steps, dice)
+        if match is None or not legal.is_legal_result(match[0]):
+            raise HTTPException(status_code=400, detail="Invalid play")
+
+        _, used = match
+        events = [
+            move_event(turn.color, move.from_point, move.to_point, die)
+            for move, die in zip(turn.moves, used)
+        ]
+        return self._then_advance(state, events)
+
+    def advance_turn(self, state: dict) -> dict:
+        """Pass the turn once the player on roll has no dice or legal moves left."""
+        return fold(state, self.advance_events(state))
+
+    def _then_advance(self, state: dict, events: list[dict]) -> Tuple[list[dict], dict]:
+        """Add the turn change, if any, to a player's events; returns them and the new state."""
+        state = fold(state, events)
+        advance = self.advance_events(state)
+        return events + advance, fold(state, advance)
+
+    def advance_events(self, state: dict) -> list[dict]:
+        dice_state = state["dice_state"]
+        if not dice_state["values"]:
+            return []
+        remaining = remaining_dice(dice_state)
+        if remaining:
+            board = BoardState.from_state(state)
+            if legal_plays(board, state["current_turn"], remaining).max_moves:
+                return []
+
+        # Reset dice state and switch turns
+        return [turn_end_event(opponent(state["current_turn"]))]
+
+    def get_legal_plays(self, state: dict) -> LegalPlays:
+        """All legal complete plays for the player on roll with the unused dice."""
+        return legal_plays(
+            BoardState.from_state(state),
+            state["current_turn"],
+            remaining_dice(state["dice_state"]),
+        )
+
+    def _move_die(
+        self, move: MoveRequest, board: BoardState, dice: Tuple[int, ...]
+    ) -> Optional[int]:
+        """Return the die a legal move uses, or None if the move is illegal.
+
+        A move is legal when it starts at least one legal complete play, which
+        enforces entering from the bar, bear-off rules and using as many dice
+        (and the larger die) as possible. Bearing off with more than one
+        possible die uses the smallest.
+        """
+        src = slot_for_point(move.from_point, move.color)
+        dst = slot_for_point(move.to_point, move.color)
+        if src is None or dst is None:
+            return None
+        for die in sorted(set(dice)):
+            if is_legal_step(board, move.color, dice, (src, dst, die)):
+                return die
+        return None
+
+    def _match_dice(
+        self,
+        board: BoardState,
+        color: str,
+        steps: List[Tuple[int, int]],
+        dice: Tuple[int, ...],
+    ) -> Optional[Tuple[BoardState, List[int]]]:
+        """Assign a die to each step so that every move is legal when made.
+
+        Returns the resulting board and the dice used, or None if no
+        assignment exists.
+        """
+        if not steps:
+            return board, []
+        src, dst = steps[0]
+        for die in sorted(set(dice)):
+            if (src, dst, die) not in single_moves(board, color, die):
+                continue
+            rest = list(dice)
+            rest.remove(die)
+            match = self._match_dice(board.move(src, dst, color), color, steps[1:], tuple(rest))
+            if match is not None:
+                return match[0], [die] + match[1]
+        return None
+
+    def update_game_state(
+        self, game_id: str, new_state: dict, expected_version: Optional[int] = None
+    ) -> ActiveGame | None:
         """Update the state of an existing game."""
-        game = self.get_game(game_id)
-        if game:
-            game.state = new_state
-            self.db.commit()
-            self.db.refresh(game)
-        return game
+        try:
+            validate_checker_counts(new_state)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return self._write(game_id, lambda state: [state_event(new_state)], expected_version)
+
+    def _write(
+        self,
+        game_id: str,
+        plan: Callable[[dict], list[dict]],
+        expected_version: Optional[int] = None,
+    ) -> ActiveGame | None:
+        """Read-modify-write a game as a compare-and-swap on its version.
+
+        `plan` turns the current state into events. With an expected version
+        from the client any mismatch is a 409; otherwise a write that loses a
+        race is recomputed against the newer state, up to GAME_WRITE_ATTEMPTS
+        times. The registry writes the events behind the request; the full
+        state document is only rewritten as a snapshot every
+        GAME_SNAPSHOT_INTERVAL events, or when a whole state is written
+        through PUT /state.
+        """
+        for _ in range(settings.GAME_WRITE_ATTEMPTS):
+            game = self.get_game(game_id)
+            if not game:
+                return None
+            version = game.version if expected_version is None else expected_version
+            if game.version != version:
+                break
+            events = plan(game.state)
+            try:
+                game = game_registry.record(game, events, version)
+            except VersionConflict:
+                if expected_version is not None:
+                    break
+                continue
+            game_updates.publish_events(game_id, version + len(events), events)
+            return game
+        raise HTTPException(
+            status_code=409,
+            detail="Game was changed by another request; reload it and try again",
+        )
+
+
+class AsyncGameService(AsyncService):
+    """GameService for async handlers; queries run off the event loop."""
+
+    service_class = GameService
+
+    async def get_game(self, game_id: str) -> ActiveGame | None:
+        # Active games are answered from memory without a thread hop
+        return game_registry.get(game_id) or await run_db(self.sync.get_game, game_id)
@@ -0,0 +1,150 @@
+"""Live game updates fanned out to WebSocket subscribers.
+
+Every successful write to a game is published once as a delta message:
+
+    {"type": "events", "game_id": ..., "version": v, "events": [...]}
+
+where `events` are the game events of that write (see app.core.events) and
+`version` is the game version after them. A client that starts from a
+snapshot at version s folds every delta with a version above s.
+
+Each message is serialized to JSON once and the same frame is handed to
+every subscriber. Subscribers have bounded queues: a burst that piles up
+behind a slow consumer is sent as a single batch frame
+
+    {"type": "batch", "messages": [...]}
+
+and a subscriber that falls more than BROADCAST_SUBSCRIBER_QUEUE messages
+behind has its backlog dropped and gets a fresh snapshot instead.
+
+Messages travel through a pluggable backend; InProcessBackend delivers them
+within the process. Games are served by a single process (the active-game
+registry holds a writer lock, see app.services.game_registry), so there are
+no other workers whose subscribers would need them.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+Deliver = Callable[[str, int, str], None]
+
+
+def encode(message: dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+def batch_frame(frames: List[str]) -> str:
+    """Join already serialized messages into one frame without re-encoding them."""
+    return '{"type":"batch","messages":[' + ",".join(frames) + "]}"
+
+
+class Subscription:
+    """One subscriber's bounded backlog of frames for a game."""
+
+    def __init__(self, game_id: str, max_pending: int):
+        self.game_id = game_id
+        self.loop = asyncio.get_running_loop()
+        self.max_pending = max_pending
+        self.pending: deque = deque()
+        self.overflowed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, version: int, frame: str) -> None:
+        """Queue a frame; runs on the subscriber's event loop."""
+        if len(self.pending) >= self.max_pending:
+            self.pending.clear()
+            self.overflowed = True
+        else:
+            self.pending.append((version, frame))
+        self._ready.set()
+
+    async def next_batch(self) -> Tuple[bool, List[Tuple[int, str]]]:
+        """Wait for frames; returns whether a snapshot is needed and everything queued."""
+        await self._ready.wait()
+        self._ready.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        batch = list(self.pending)
+        self.pending.clear()
+        return overflowed, batch
+
+
+class InProcessBackend:
+    """Delivers published frames to this process's subscribers only."""
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    def attach(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def start(self) -> None:
+        pass
+
+    def publish(self, game_id: str, version: int, frame: str) -> None:
+        if self._deliver is not None:
+            self._deliver(game_id, version, frame)
+
+    async def stop(self) -> None:
+        pass
+
+
+class GameUpdates:
+    def __init__(self, backend=None, max_pending: int = settings.BROADCAST_SUBSCRIBER_QUEUE):
+        self.backend = backend or InProcessBackend()
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        # Serialized snapshots by (game ID, version), shared by everyone who connects
+        self._snapshots = LRUCache(1024)
+        self._lock = threading.Lock()  # Publishers may run on worker threads
+        self.backend.attach(self._deliver)
+
+    async def start(self) -> None:
+        await self.backend.start()
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+    def subscribe(self, game_id: str) -> Subscription:
+        subscription = Subscription(game_id, self.max_pending)
+        with self._lock:
+            self._subscribers.setdefault(game_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.game_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.game_id]
+
+    def publish_events(self, game_id: str, version: int, events: list[dict]) -> None:
+        """Serialize a write's events once and publish them; safe from any thread."""
+        if events:
+            frame = encode(
+                {"type": "events", "game_id": game_id, "version": version, "events": events}
+            )
+            self.backend.publish(game_id, version, frame)
+
+    def snapshot_frame(self, game_id: str, version: int, build: Callable[[], dict]) -> str:
+        """The serialized snapshot of a game at a version, built once."""
+        key = (game_id, version)
+        frame = self._snapshots.get(key)
+        if frame is None:
+            frame = encode({"type": "snapshot", "version": version, "game": build()})
+            self._snapshots.put(key, frame)
+        return frame
+
+    def _deliver(self, game_id: str, version: int, frame: str) -> None:
+        with self._lock:
+            subscriptions = list(self._subscribers.get(game_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.offer, version, frame)
+
+
+game_updates = GameUpdates()
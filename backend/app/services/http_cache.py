@@ -0,0 +1,75 @@
+"""Strong ETags and conditional GETs for resources that clients poll.
+
+A game's ETag is its version, which changes with every write, together with
+the representation (JSON or packed, see app.core.wire). A poll whose
+If-None-Match still names the version of the game in the active-game
+registry is answered 304 straight from memory.
+
+The players of a game are not versioned in the database, so this process
+stamps them instead: every seat change or login of a seated player gives
+the game a new stamp. Stamps come from one counter and carry a per-process
+epoch, so an ETag issued before a restart never matches by accident; a game
+whose stamp was forgotten just gets a new one.
+
+Stamps only see changes made by this process, so they are only issued while
+it holds the active-game registry's writer lock, which makes it the only
+process serving the database. Otherwise player lists get no ETag at all.
+"""
+import itertools
+import secrets
+import threading
+from typing import Optional
+
+from app.core.cache import LRUCache
+from app.core.wire import JSON
+from app.services.game_registry import game_registry
+
+# Clients may keep responses but must revalidate them on every use
+CACHE_CONTROL = "no-cache"
+
+_EPOCH = secrets.token_hex(4)
+
+
+def game_etag(version: int, media_type: str = JSON) -> str:
+    suffix = "" if media_type == JSON else "-" + media_type.rsplit("/", 1)[-1]
+    return f'"v{version}{suffix}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison: weak, and `*` matches anything."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class PlayerStamps:
+    """Per-process ETags for the player list of each game."""
+
+    def __init__(self, max_size: int = 10_000):
+        self._stamps = LRUCache(max_size)
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def etag(self, game_id: str) -> Optional[str]:
+        """The players ETag of a game; None unless this is the only serving process."""
+        if not game_registry.is_writer:
+            return None
+        with self._lock:
+            stamp = self._stamps.get(game_id)
+            if stamp is None:
+                stamp = next(self._counter)
+                self._stamps.put(game_id, stamp)
+        return f'"p{_EPOCH}.{stamp}"'
+
+    def changed(self, game_id: Optional[str]) -> None:
+        """Record that the players of a game, or one of their profiles, changed."""
+        if game_id:
+            with self._lock:
+                self._stamps.put(game_id, next(self._counter))
+
+
+player_stamps = PlayerStamps()
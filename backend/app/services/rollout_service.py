@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core.bearoff import load_database
+from app.core.board import BoardState
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.rollout import Z_95, RolloutStats, rollout_chunk
+from app.schemas.game import RolloutResult
+
+# Results per (position hash, trials); identical seeds make them reproducible
+rollout_cache = LRUCache(settings.ROLLOUT_CACHE_SIZE)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _init_worker(bearoff_path: str) -> None:
+    load_database(bearoff_path)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Worker processes for rollouts, started on first use."""
+    global _pool
+    if _pool is None:
+        # Spawned rather than forked: the server process already runs threads
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.ROLLOUT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(settings.BEAROFF_DB_PATH,),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+class RolloutService:
+    async def rollout(self, state: dict, trials: int) -> RolloutResult:
+        """Cubeless equity of the player on roll, who has not rolled yet.
+
+        Trials are played as antithetic pairs split evenly over the worker
+        processes; each chunk gets its own seed derived from the position.
+        """
+        board = BoardState.from_state(state)
+        color = state["current_turn"]
+        position_hash = board.position_hash(color)
+        key = (position_hash, trials)
+        cached = rollout_cache.get(key)
+        if cached is not None:
+            return cached.model_copy(update={"cached": True})
+
+        pairs = max(trials // 2, 1)
+        chunks = min(settings.ROLLOUT_WORKERS, pairs)
+        sizes = [pairs // chunks + (i < pairs % chunks) for i in range(chunks)]
+
+        loop = asyncio.get_running_loop()
+        pool = get_pool()
+        parts = await asyncio.gather(*(
+            loop.run_in_executor(
+                pool, rollout_chunk, board.key(), color, size, (position_hash << 8) | i
+            )
+            for i, size in enumerate(sizes)
+        ))
+        stats = sum(parts, RolloutStats())
+
+        margin = Z_95 * stats.std_error
+        result = RolloutResult(
+            color=color,
+            trials=stats.samples * 2,
+            equity=stats.mean,
+            std_error=stats.std_error,
+            ci_low=stats.mean - margin,
+            ci_high=stats.mean + margin,
+        )
+        rollout_cache.put(key, result)
+        return result
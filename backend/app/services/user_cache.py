@@ -0,0 +1,101 @@
+"""Per-process cache of verified access tokens and the users they resolve to.
+
+Authenticated requests used to decode the JWT and query the users table every
+time. Here the decoded claims are kept by token and the user's column values
+by user ID, both in LRU caches with a TTL (USER_CACHE_SIZE,
+USER_CACHE_TTL_SECONDS). A hit rebuilds the user in the request's session
+without a query, so handlers can change and commit it as usual.
+
+Whatever changes a user row (login, lockout, password reset, verification,
+joining or leaving a game) invalidates that user; logout also forgets the
+token. The cache is per process, so a change made on another worker is seen
+here once the TTL runs out.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import run_db
+from app.core.security import verify_token
+from app.models.user import User
+
+_COLUMNS = [attribute.key for attribute in inspect(User).column_attrs]
+
+
+class UserCache:
+    def __init__(
+        self,
+        max_size: int = settings.USER_CACHE_SIZE,
+        ttl: float = settings.USER_CACHE_TTL_SECONDS,
+    ):
+        self._claims = LRUCache(max_size, ttl)
+        self._users = LRUCache(max_size, ttl)
+        # Bumped by every invalidation; a load that overlapped one is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def claims(self, token: str) -> Optional[Dict[str, Any]]:
+        """The verified claims of a token, or None if it is invalid or expired."""
+        payload = self._claims.get(token)
+        if payload is None:
+            payload = verify_token(token)
+            if payload is None:
+                return None
+            self._claims.put(token, payload)
+        elif payload.get("exp", 0) < time.time():
+            self._claims.pop(token)
+            return None
+        return payload
+
+    async def user(self, db: Session, user_id: str) -> Optional[User]:
+        """The user with this ID, attached to `db`; queried only on a cache miss."""
+        values = self._users.get(user_id)
+        if values is None:
+            generation = self._generation
+            user = await run_db(db.query(User).filter(User.id == user_id).first)
+            if user is None:
+                return None
+            with self._lock:
+                if generation == self._generation:
+                    self._users.put(user_id, {key: getattr(user, key) for key in _COLUMNS})
+            return user
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    async def authenticate(self, db: Session, token: str) -> Optional[Dict[str, Any]]:
+        """Claims of a valid token whose user exists, or None.
+
+        Tokens that embed the user's claims (ACCESS_TOKEN_EMBED_CLAIMS) are
+        trusted as they are, without looking the user up.
+        """
+        payload = self.claims(token)
+        if not payload or not payload.get("sub"):
+            return None
+        if "username" in payload or await self.user(db, payload["sub"]) is not None:
+            return payload
+        return None
+
+    def invalidate_user(self, user_id: Optional[str]) -> None:
+        """Drop a user whose row changed."""
+        if user_id:
+            with self._lock:
+                self._generation += 1
+                self._users.pop(user_id)
+
+    def forget_token(self, token: str) -> None:
+        self._claims.pop(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._claims.clear()
+            self._users.clear()
+
+
+user_cache = UserCache()
@@ -0,0 +1,70 @@
+"""Benchmark vectorized position features against the per-position path.
+
+Usage: python benchmarks/batch_eval.py [--positions N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from app.constants.game import INITIAL_POSITION  # noqa: E402
+from app.core.batch_eval import encode_boards, evaluate_batch, evaluate_board  # noqa: E402
+from app.core.board import BoardState, opponent  # noqa: E402
+from app.core.moves import legal_plays  # noqa: E402
+
+
+def sample_positions(count: int, seed: int = 0) -> list[BoardState]:
+    """Collect positions from random games so the sample looks like real play."""
+    rng = random.Random(seed)
+    start = BoardState.from_state(INITIAL_POSITION)
+    board, color = start, "white"
+    positions = []
+    while len(positions) < count:
+        legal = legal_plays(board, color, (rng.randint(1, 6), rng.randint(1, 6)))
+        if legal.max_moves:
+            board = rng.choice(list(legal.plays))
+        positions.append(board)
+        if board.home(color) == 15:
+            board = start
+        color = opponent(color)
+    return positions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=100_000)
+    args = parser.parse_args()
+
+    boards = sample_positions(args.positions)
+    print(f"Evaluating {len(boards)} positions")
+
+    start = time.perf_counter()
+    for board in boards:
+        evaluate_board(board)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    array = encode_boards(boards)
+    encoded = time.perf_counter() - start
+    start = time.perf_counter()
+    features = evaluate_batch(array)
+    batch = time.perf_counter() - start
+
+    # Sanity check that both paths agree
+    reference = evaluate_board(boards[-1])
+    assert tuple(features.pips[-1]) == reference.pips
+    assert bool(features.race[-1]) == reference.race
+
+    print(f"per-position: {len(boards) / single:>14,.0f} positions/sec")
+    print(f"batch:        {len(boards) / batch:>14,.0f} positions/sec "
+          f"({single / batch:.0f}x, encoding {encoded * 1000:.1f} ms)")
+    print(f"mean pips white/black: {np.mean(features.pips, axis=0)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measure request throughput as the number of requests in flight grows.
+
+Requests go straight to the ASGI app over httpx, against a scratch SQLite
+database. --latency-ms adds a delay to every SQL statement to stand in for a
+networked database. Async handlers run their queries on the database worker
+threads, so throughput should grow with concurrency up to DATABASE_WORKERS
+rather than stay flat as it does when queries block the event loop.
+
+Usage: python benchmarks/db_concurrency.py --concurrency 1 4 16 64 --requests 1000 --latency-ms 2
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import app.models  # noqa: F401, E402  (registers every table on Base)
+from app.core.database import Base, get_db  # noqa: E402
+from app.main import create_app  # noqa: E402
+
+
+async def measure(client: httpx.AsyncClient, url: str, requests: int, concurrency: int) -> float:
+    """Requests per second for `requests` GETs of `url`, `concurrency` at a time."""
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(url)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+
+async def run(concurrency: list[int], requests: int, latency_ms: float) -> None:
+    path = os.path.join(tempfile.mkdtemp(), "benchmark.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    if latency_ms:
+        @event.listens_for(engine, "before_cursor_execute")
+        def delay(*args):
+            time.sleep(latency_ms / 1000)
+
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_benchmark_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    api = create_app()
+    api.dependency_overrides[get_db] = get_benchmark_db
+    transport = httpx.ASGITransport(app=api)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        game_id = (await client.post("/api/game")).json()["id"]
+        # Reading events always queries the database, unlike the game itself
+        url = f"/api/game/{game_id}/events"
+        await measure(client, url, min(requests, 50), 1)  # Warm up
+        print(f"{'in flight':>10} {'req/sec':>10}")
+        for level in concurrency:
+            rate = await measure(client, url, requests, level)
+            print(f"{level:>10} {rate:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput against requests in flight")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.concurrency, args.requests, args.latency_ms))
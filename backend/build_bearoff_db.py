@@ -0,0 +1,20 @@
+import argparse
+import time
+
+from app.core.bearoff import NUM_POSITIONS, build_table, write_database
+from app.core.config import settings
+
+
+def build_bearoff_db(path: str):
+    print(f"Solving {NUM_POSITIONS} bear-off positions...")
+    start = time.time()
+    table = build_table()
+    write_database(path, table)
+    print(f"Wrote {path} in {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the one-sided bear-off database")
+    parser.add_argument("path", nargs="?", default=settings.BEAROFF_DB_PATH)
+    args = parser.parse_args()
+    build_bearoff_db(args.path)
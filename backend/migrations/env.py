@@ -10,7 +10,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from app.core.database import Base
-from app.models import User, UserStats, Game, DiceRollHistory
+from app.models import User, UserStats, Game, GameEvent, DiceRollHistory, OutboundEmail
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
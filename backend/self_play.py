@@ -0,0 +1,324 @@
+"""Play games between built-in policies against the game engine, without a database.
+
+Every play goes through GameService.apply_turn exactly as it would over HTTP,
+so the run doubles as a rules soak test. Each turn is checked against a rules
+oracle written independently of app.core.moves: it brute-forces every order of
+the dice on a player-relative pip layout and re-derives the bar, blocking,
+bear-off, use-as-many-dice-as-possible and larger-die rules itself. Any
+disagreement between the oracle and the move generator, any step or resulting
+position the oracle does not allow, any play the engine rejects, any checker
+that appears or disappears, and any game that never ends is counted as a rule
+violation.
+
+Usage: python self_play.py --games 1000 --white greedy --black random --output games.jsonl
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from app.constants.game import INITIAL_POSITION
+from app.core.bearoff import load_database
+from app.core.board import BLACK_BAR, BLACK_HOME, WHITE_BAR, WHITE_HOME, BoardState, point_for_slot
+from app.core.config import settings
+from app.core.evaluation import CHECKERS_PER_SIDE, game_result, greedy_play
+from app.core.moves import Play, expand_dice, legal_plays, remaining_dice
+from app.schemas.game import CheckerMove, TurnRequest
+from app.services.game_service import GameService
+
+# Games are abandoned (and counted as a violation) after this many turns
+MAX_TURNS = 1000
+
+Policy = Callable[[BoardState, str, Iterable[int], random.Random], Play]
+
+
+def random_policy(board: BoardState, color: str, dice, rng: random.Random) -> Play:
+    return rng.choice(list(legal_plays(board, color, dice).plays.values()))
+
+
+def greedy_policy(board: BoardState, color: str, dice, rng: random.Random) -> Play:
+    return greedy_play(board, color, dice)[0]
+
+
+def expectiminimax_policy(board: BoardState, color: str, dice, rng: random.Random) -> Play:
+    from app.services.bot_service import ExpectiminimaxSearch
+
+    return ExpectiminimaxSearch().choose(board, color, dice)
+
+
+POLICIES: Dict[str, Policy] = {
+    "random": random_policy,
+    "greedy": greedy_policy,
+    "expectiminimax": expectiminimax_policy,
+}
+
+
+def checker_counts(board: BoardState) -> tuple[int, int]:
+    """Checkers of each side anywhere on the board, bar or home."""
+    cells = board.cells
+    white = sum(c for c in cells[1:25] if c > 0) + cells[WHITE_BAR] + cells[WHITE_HOME]
+    black = -sum(c for c in cells[1:25] if c < 0) + cells[BLACK_BAR] + cells[BLACK_HOME]
+    return white, black
+
+
+# A position as seen by the player to move: index 1-24 is the distance of a
+# point from that player's home, 25 is the bar and 0 is borne off. Opponent
+# checkers use the same indices, so their bar and borne-off counts are kept at
+# 25 and 0 without meaning anything to the mover.
+Relative = Tuple[Tuple[int, ...], Tuple[int, ...]]
+
+
+def relative_position(board: BoardState, color: str) -> Relative:
+    """Recount `board` from `color`'s side, independently of the slot layout."""
+    other = "black" if color == "white" else "white"
+    points = range(1, 25) if color == "white" else range(24, 0, -1)
+    own = [board.home(color)] + [board.count(p, color) for p in points] + [board.bar(color)]
+    opp = [board.home(other)] + [board.count(p, other) for p in points] + [board.bar(other)]
+    return tuple(own), tuple(opp)
+
+
+def oracle_steps(position: Relative, die: int) -> Dict[Tuple[int, int], Relative]:
+    """Every single checker move for one die, keyed by (from, to) distance."""
+    own, opp = position
+    if own[25]:
+        sources = [25]
+    else:
+        sources = [d for d in range(1, 25) if own[d]]
+    bearing_off = sum(own[7:26]) == 0
+    steps = {}
+    for src in sources:
+        dst = src - die
+        if dst >= 1:
+            if opp[dst] >= 2:
+                continue
+        # An exact roll bears off; a larger one only from the farthest checker
+        elif not bearing_off or (dst < 0 and any(own[src + 1:25])):
+            continue
+        else:
+            dst = 0
+        after_own, after_opp = list(own), list(opp)
+        after_own[src] -= 1
+        after_own[dst] += 1
+        if dst and opp[dst] == 1:
+            after_opp[dst] = 0
+            after_opp[25] += 1
+        steps[(src, dst)] = (tuple(after_own), tuple(after_opp))
+    return steps
+
+
+def oracle_plays(board: BoardState, color: str, dice: Iterable[int]) -> Set[Relative]:
+    """Every position a legal complete play can reach, by brute force."""
+    start = relative_position(board, color)
+    dice = tuple(sorted(dice))
+    finals: Set[Tuple[Tuple[int, ...], Relative]] = set()
+    seen = set()
+    stack = [(start, dice, ())]
+    while stack:
+        state = stack.pop()
+        if state in seen:
+            continue
+        seen.add(state)
+        position, rest, used = state
+        moved = False
+        for i, die in enumerate(rest):
+            for after in oracle_steps(position, die).values():
+                moved = True
+                stack.append((after, rest[:i] + rest[i + 1:], tuple(sorted(used + (die,)))))
+        if not moved:
+            finals.add((used, position))
+
+    # As many dice as possible must be played...
+    most = max(len(used) for used, _ in finals)
+    finals = {(used, position) for used, position in finals if len(used) == most}
+    # ...and if only one of two different dice can be, the larger one if possible
+    if most == 1 and len(dice) == 2 and dice[0] != dice[1]:
+        larger = {(used, position) for used, position in finals if used == (dice[1],)}
+        finals = larger or finals
+    return {position for _, position in finals}
+
+
+def _distance(slot: int, color: str) -> int:
+    if slot in (WHITE_HOME, BLACK_HOME):
+        return 0
+    if slot in (WHITE_BAR, BLACK_BAR):
+        return 25
+    return slot if color == "white" else 25 - slot
+
+
+def check_turn(
+    board: BoardState, after: BoardState, color: str, dice: Iterable[int], play: Play
+) -> List[str]:
+    """Compare one turn with the rules oracle; returns what it disagrees with."""
+    dice = tuple(dice)
+    problems = []
+    allowed = oracle_plays(board, color, dice)
+    generated = {
+        relative_position(result, color) for result in legal_plays(board, color, dice).plays
+    }
+    if generated != allowed:
+        problems.append(
+            f"move generator disagrees with the rules oracle "
+            f"({len(allowed - generated)} plays missing, {len(generated - allowed)} extra)"
+        )
+
+    position = relative_position(board, color)
+    rest = list(dice)
+    for src, dst, die in play:
+        step = (_distance(src, color), _distance(dst, color))
+        if die not in rest or step not in oracle_steps(position, die):
+            problems.append(f"step {point_for_slot(src)}->{point_for_slot(dst)} is illegal")
+            return problems
+        rest.remove(die)
+        position = oracle_steps(position, die)[step]
+    if position not in allowed:
+        problems.append("play does not reach a position the rules allow")
+    elif relative_position(after, color) != position:
+        problems.append("engine position differs from the play's moves")
+    return problems
+
+
+def play_game(white: str, black: str, seed: int, record: bool = False) -> dict:
+    """Play one game; returns its outcome, move count and any rule violations."""
+    engine = GameService(None)
+    rng = random.Random(seed)
+    policies = {"white": POLICIES[white], "black": POLICIES[black]}
+    state = copy.deepcopy(INITIAL_POSITION)
+    violations: List[str] = []
+    turns: List[dict] = []
+    moves = 0
+    result = None
+
+    for _ in range(MAX_TURNS):
+        color = state["current_turn"]
+        roll = [rng.randint(1, 6), rng.randint(1, 6)]
+        state = engine.advance_turn(dict(state, dice_state={"values": roll, "used_values": []}))
+        play: Play = ()
+        board = BoardState.from_state(state)
+        if state["current_turn"] == color:
+            dice = remaining_dice(state["dice_state"])
+            play = policies[color](board, color, dice, rng)
+            turn = TurnRequest(color=color, moves=[
+                CheckerMove(from_point=point_for_slot(src), to_point=point_for_slot(dst))
+                for src, dst, _ in play
+            ])
+            try:
+                state = engine.apply_turn(state, turn)
+            except HTTPException as e:
+                violations.append(f"{color} {roll}: engine rejected a legal play ({e.detail})")
+                break
+            if state["current_turn"] == color:
+                violations.append(f"{color} {roll}: turn did not pass after a full play")
+                break
+            problems = check_turn(board, BoardState.from_state(state), color, dice, play)
+            violations.extend(f"{color} {roll}: {problem}" for problem in problems)
+            if problems:
+                break
+        elif oracle_plays(board, color, expand_dice(roll)) != {relative_position(board, color)}:
+            violations.append(f"{color} {roll}: turn passed although a play was possible")
+            break
+        moves += len(play)
+        if record:
+            turns.append({
+                "color": color,
+                "dice": roll,
+                "moves": [[point_for_slot(src), point_for_slot(dst)] for src, dst, _ in play],
+            })
+
+        board = BoardState.from_state(state)
+        if checker_counts(board) != (CHECKERS_PER_SIDE, CHECKERS_PER_SIDE):
+            violations.append(f"{color} {roll}: checker count is {checker_counts(board)}")
+            break
+        result = game_result(board)
+        if result is not None:
+            break
+    else:
+        violations.append(f"game did not finish within {MAX_TURNS} turns")
+
+    game = {
+        "seed": seed,
+        "white": white,
+        "black": black,
+        "winner": result[0] if result else None,
+        "points": result[1] if result else 0,
+        "moves": moves,
+        "violations": violations,
+    }
+    if record:
+        game["turns"] = turns
+    return game
+
+
+def _play_game(args: tuple) -> dict:
+    return play_game(*args)
+
+
+def run(
+    games: int,
+    white: str,
+    black: str,
+    workers: int,
+    seed: int = 0,
+    output: Optional[str] = None,
+) -> dict:
+    """Play `games` games over `workers` processes and summarize throughput."""
+    jobs = [(white, black, seed + i, output is not None) for i in range(games)]
+    out = open(output, "w") if output else None
+    wins = {"white": 0, "black": 0}
+    moves = 0
+    violations = 0
+    start = time.perf_counter()
+    try:
+        with Pool(workers, initializer=load_database, initargs=(settings.BEAROFF_DB_PATH,)) as pool:
+            chunksize = max(games // (workers * 8), 1)
+            for game in pool.imap_unordered(_play_game, jobs, chunksize=chunksize):
+                moves += game["moves"]
+                violations += len(game["violations"])
+                if game["winner"]:
+                    wins[game["winner"]] += 1
+                for violation in game["violations"]:
+                    print(f"violation (seed {game['seed']}): {violation}")
+                if out:
+                    out.write(json.dumps(game) + "\n")
+    finally:
+        if out:
+            out.close()
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "seconds": elapsed,
+        "games_per_sec": games / elapsed,
+        "moves_per_sec": moves / elapsed,
+        "violations": violations,
+        "wins": wins,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless self-play between built-in policies")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--white", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--black", choices=sorted(POLICIES), default="greedy")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write every game, with its turns, as JSON lines")
+    args = parser.parse_args()
+
+    summary = run(args.games, args.white, args.black, args.workers, args.seed, args.output)
+    print(
+        f"{summary['games']} games in {summary['seconds']:.2f}s: "
+        f"{summary['games_per_sec']:.1f} games/sec, {summary['moves_per_sec']:.0f} moves/sec"
+    )
+    print(f"White {summary['wins']['white']}, black {summary['wins']['black']}")
+    print(f"Rule violations: {summary['violations']}")
+    if summary["violations"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,19 @@
+import os
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from typing import Generator
 
+# Engines are created on import, so point both the app and the tests at a
+# scratch directory before any app module loads; the tracked database files
+# are never opened
+_database_dir = tempfile.TemporaryDirectory(prefix="backgammon-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_database_dir.name}/backgammon.db"
+os.environ["TEST_DATABASE_URL"] = f"sqlite:///{_database_dir.name}/test.db"
+
 from app.core.database import Base, get_db
 from app.core.test_config import (
     TEST_SQLALCHEMY_DATABASE_URL,
@@ -14,9 +24,14 @@ from app.core.test_config import (
 from app.main import create_app
 from app.core.config import settings
 
+# Tests run against a fresh database, so never try to deliver real email
+settings.EMAIL_ENABLED = test_settings.EMAIL_ENABLED
+settings.RATE_LIMIT_BACKEND = test_settings.RATE_LIMIT_BACKEND
+
 @pytest.fixture(scope="session")
 def app():
     """Create a fresh database on each test case"""
+    Base.metadata.drop_all(bind=test_engine)
     Base.metadata.create_all(bind=test_engine)
     app = create_app()
     # Override dependencies
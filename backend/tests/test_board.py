@@ -0,0 +1,54 @@
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BLACK_BAR, WHITE_HOME, BoardState
+from app.schemas.game import GameState
+
+
+def test_round_trip_initial_position():
+    """Converting to and from the GameState dict form is lossless"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    state = board.to_state()
+
+    assert state["points"]["24"] == {"color": "white", "count": 2}
+    assert state["points"]["1"] == {"color": "black", "count": 2}
+    assert BoardState.from_state(state) == board
+    assert BoardState.from_state(GameState(**INITIAL_POSITION)) == board
+
+
+def test_move_is_copy_on_write():
+    """Moving returns a new board and leaves the original untouched"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    moved = board.move(24, 20, "white")
+
+    assert board.point(24) == 2
+    assert moved.point(24) == 1
+    assert moved.point(20) == 1
+    assert moved.key() != board.key()
+
+
+def test_move_hits_lone_opponent_checker():
+    """Landing on a blot sends the opponent checker to the bar"""
+    board = BoardState.from_state(INITIAL_POSITION).move(24, 20, "white")
+    hit = board.move(17, 20, "black")
+
+    assert hit.point(20) == -1
+    assert hit.bar("white") == 1
+    assert hit.cells[BLACK_BAR] == 0
+
+
+def test_bear_off_to_home():
+    """Checkers moved home are counted in the home slot"""
+    board = BoardState.from_state({"points": {"3": {"color": "white", "count": 1}}})
+    borne_off = board.move(3, WHITE_HOME, "white")
+
+    assert borne_off.home("white") == 1
+    assert borne_off.to_state()["points"] == {}
+
+
+def test_zobrist_hash_is_updated_incrementally():
+    """The hash after a move matches a hash computed from scratch"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    moved = board.move(24, 20, "white").move(17, 20, "black")
+
+    assert moved.zobrist == BoardState(moved.cells).zobrist
+    assert moved.zobrist != board.zobrist
+    assert board.position_hash("white") != board.position_hash("black")
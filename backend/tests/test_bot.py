@@ -0,0 +1,132 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BoardState
+from app.core.evaluation import game_result
+from app.core.moves import legal_plays
+from app.core.test_config import TestingSessionLocal, test_engine
+from app.models.user import PieceColor, User
+from app.services import bot_service
+from app.services.bot_service import (
+    BotService,
+    ExpectiminimaxSearch,
+    TranspositionTable,
+    get_search_pool,
+    play_bot_turns,
+    search_play,
+    shutdown_search_pool,
+)
+from tests.test_ws import make_token
+
+
+def test_search_returns_legal_play_within_budget():
+    """The bot always answers with a legal play, even when it runs out of time"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    search = ExpectiminimaxSearch(budget=0.2, table=TranspositionTable(10_000))
+
+    start = time.monotonic()
+    play = search.choose(board, "white", (3, 1))
+    elapsed = time.monotonic() - start
+
+    result = board
+    for src, dst, _ in play:
+        result = result.move(src, dst, "white")
+    assert legal_plays(board, "white", (3, 1)).is_legal_result(result)
+    assert elapsed < 0.5
+    # Making the 5 point is the standard opening 31
+    assert result.point(5) == 2
+
+
+def test_search_runs_in_worker_processes():
+    """Searches leave the server process, so they never hold its GIL"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    try:
+        pool = get_search_pool()
+        assert pool.submit(os.getpid).result() != os.getpid()
+        play = pool.submit(search_play, board.key(), "white", (3, 1)).result()
+    finally:
+        shutdown_search_pool()
+
+    result = board
+    for src, dst, _ in play:
+        result = result.move(src, dst, "white")
+    assert legal_plays(board, "white", (3, 1)).is_legal_result(result)
+
+
+def test_transposition_table_is_bounded():
+    """The oldest entries are evicted once the table is full"""
+    table = TranspositionTable(2)
+    table.put("a", 1.0)
+    table.put("b", 2.0)
+    table.get("a")
+    table.put("c", 3.0)
+
+    assert table.get("b") is None
+    assert table.get("a") == 1.0
+    assert len(table) == 2
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_only_seated_players_add_bots_and_bots_are_reused(client):
+    """Bots join games their caller plays in, and are freed for reuse when the humans leave"""
+    token = make_token()
+    game_id = client.post("/api/game").json()["id"]
+    assert client.post(
+        f"/api/game-users/{game_id}/bot?color=black", headers=auth(token)
+    ).status_code == 403
+
+    client.post(f"/api/game-users/{game_id}/join?color=white", headers=auth(token))
+    client.post(f"/api/game-users/{game_id}/bot?color=black", headers=auth(token))
+    client.post(f"/api/game-users/{game_id}/leave", headers=auth(token))
+    assert client.get(f"/api/game-users/{game_id}/players").json() == []
+
+    db = TestingSessionLocal()
+    bots = db.query(User).filter(User.is_bot == True).count()  # noqa: E712
+    other_id = client.post("/api/game").json()["id"]
+    client.post(f"/api/game-users/{other_id}/join?color=white", headers=auth(token))
+    again = client.post(f"/api/game-users/{other_id}/bot?color=black", headers=auth(token))
+    assert again.json()["is_bot"]
+    assert db.query(User).filter(User.is_bot == True).count() == bots  # noqa: E712
+    db.close()
+
+
+def test_bot_games_play_on_until_a_human_is_on_roll(client, monkeypatch):
+    """The bot loop keeps playing while bots are on roll, in a session of its own"""
+
+    class QuickSearch(ExpectiminimaxSearch):
+        def __init__(self):
+            super().__init__(max_depth=0, table=TranspositionTable(1000))
+
+    monkeypatch.setattr(bot_service, "ExpectiminimaxSearch", QuickSearch)
+    # In-process so the quick search is the one that runs
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(bot_service, "get_search_pool", lambda: executor)
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+    service = BotService(db)
+    service.game_service.join_game(game_id, service._new_bot(), PieceColor.WHITE)
+    service.game_service.join_game(game_id, service._new_bot(), PieceColor.BLACK)
+    db.close()
+
+    asyncio.run(play_bot_turns(game_id, test_engine))
+    executor.shutdown()
+    game = client.get(f"/api/game/{game_id}").json()
+    assert game_result(BoardState.from_state(game["state"])) is not None
+
+
+def test_bot_stops_when_its_game_is_gone(client, monkeypatch):
+    """A roll that finds no game ends the bot's turn instead of failing"""
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+    service = BotService(db)
+    monkeypatch.setattr(service, "bot_to_move", lambda game: True)
+    monkeypatch.setattr(service, "_roll", lambda game_id: None)
+
+    assert asyncio.run(service.play_turn(game_id)) is None
+    db.close()
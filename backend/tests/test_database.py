@@ -0,0 +1,25 @@
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.database import create_db_engine, pool_stats
+from app.main import health_check
+
+
+def test_sqlite_connections_get_pragmas(tmp_path):
+    """File databases run in WAL mode with the configured pragmas and a sized pool"""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'pragmas.db'}")
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        stats = pool_stats(engine)
+    assert stats["pool"] == "QueuePool"
+    assert stats["checked_out"] == 1
+    engine.dispose()
+
+
+def test_health_reports_pool_stats():
+    """The health check includes connection pool occupancy"""
+    database = asyncio.run(health_check())["database"]
+    assert {"pool", "size", "checked_out", "checked_in", "overflow"} <= database.keys()
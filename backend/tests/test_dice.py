@@ -0,0 +1,113 @@
+from collections import Counter
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from app.core import dice
+from app.core.dice import SecureDice
+from app.core.test_config import TestingSessionLocal, test_engine
+from app.main import create_app
+from app.models.dice import DiceRollHistory
+from app.services.dice_service import DiceHistory, DiceService, dice_history
+from app.services.game_registry import game_registry
+from app.services.game_service import GameService
+
+
+def test_rolls_reject_biased_bytes_and_refill(monkeypatch):
+    """Bytes 252-255 are skipped and the buffer is refilled when used up"""
+    chunks = iter([bytes([255, 0, 252]), bytes([35, 251])])
+    monkeypatch.setattr(dice.os, "urandom", lambda size: next(chunks))
+    rolls = SecureDice(buffer_size=3)
+    assert [rolls.roll() for _ in range(3)] == [(1, 1), (6, 6), (6, 6)]
+
+
+def test_rolls_cover_every_outcome_evenly():
+    """All 36 outcomes come up at about the same rate"""
+    rolls = SecureDice()
+    counts = Counter(rolls.roll() for _ in range(36_000))
+    assert len(counts) == 36
+    assert all(800 < n < 1200 for n in counts.values())
+
+
+def test_roll_history_is_written_in_batches(app, monkeypatch):
+    """Rolls are buffered until the batch fills, and reading the history flushes them"""
+    history = DiceHistory(flush_batch=3)
+    monkeypatch.setattr("app.services.dice_service.dice_history", history)
+    db = TestingSessionLocal()
+    try:
+        db.query(DiceRollHistory).filter(DiceRollHistory.game_id == "batch").delete()
+        db.commit()
+        service = DiceService(db)
+
+        def stored():
+            with test_engine.connect() as connection:
+                return connection.exec_driver_sql(
+                    "SELECT count(*) FROM dice_rolls WHERE game_id = 'batch'"
+                ).scalar()
+
+        def roll():
+            dice = service.roll_dice()
+            service.record_roll(dice, "batch")
+            return dice
+
+        roll()
+        roll()
+        assert stored() == 0
+        roll()
+        assert stored() == 3
+        rolls = [roll() for _ in range(2)]
+        latest = service.get_roll_history(limit=2, game_id="batch")
+        assert stored() == 5
+        assert sorted((r.die1, r.die2) for r in latest) == sorted(rolls)
+    finally:
+        db.close()
+
+
+def test_rejected_rolls_stay_out_of_the_history(client, monkeypatch):
+    """A roll the game write refuses is not logged"""
+    game_id = client.post("/api/game").json()["id"]
+
+    def conflict(*args, **kwargs):
+        raise HTTPException(status_code=409, detail="Game was changed by another request")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(GameService, "roll", conflict)
+        assert client.post(f"/api/dice/roll?game_id={game_id}").status_code == 409
+    assert client.get(f"/api/dice/history?game_id={game_id}").json() == []
+
+    assert client.post(f"/api/dice/roll?game_id={game_id}").status_code == 200
+    assert len(client.get(f"/api/dice/history?game_id={game_id}").json()) == 1
+
+
+def test_cannot_roll_again_mid_turn(client, monkeypatch):
+    """Once a checker has moved, the rest of the roll must be played before rolling again"""
+    game_id = client.post("/api/game").json()["id"]
+    monkeypatch.setattr(DiceService, "roll_dice", lambda self: (3, 1))
+
+    assert client.post(f"/api/dice/roll?game_id={game_id}").status_code == 200
+    moved = client.post(
+        f"/api/game/{game_id}/move", json={"from_point": 8, "to_point": 5, "color": "white"}
+    )
+    assert moved.status_code == 200
+
+    again = client.post(f"/api/dice/roll?game_id={game_id}")
+    assert again.status_code == 400
+    state = client.get(f"/api/game/{game_id}").json()["state"]
+    assert state["dice_state"] == {"values": [3, 1], "used_values": [3]}
+    assert len(client.get(f"/api/dice/history?game_id={game_id}").json()) == 1
+
+
+def test_roll_history_is_written_before_game_events_on_shutdown(monkeypatch):
+    """Shutdown flushes the roll history first, so it covers every roll the games show"""
+    stopped = []
+
+    async def stop(name):
+        stopped.append(name)
+
+    for name, store in (("dice", dice_history), ("games", game_registry)):
+        monkeypatch.setattr(store, "start", lambda: None)
+        monkeypatch.setattr(store, "stop", lambda name=name: stop(name))
+
+    with TestClient(create_app()):
+        pass
+    assert stopped == ["dice", "games"]
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.core.test_config import TestingSessionLocal, test_engine
+from app.models.email import OutboundEmail
+from app.services.email_service import EmailService
+from app.services.email_worker import EmailWorker
+
+
+class RecordingSender:
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.sent = []
+
+    async def send(self, message):
+        if self.fail:
+            self.fail -= 1
+            raise ConnectionError("SMTP is down")
+        self.sent.append(message)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    monkeypatch.setattr(settings, "EMAIL_ENABLED", True)
+    db = TestingSessionLocal()
+    yield db
+    db.query(OutboundEmail).delete()
+    db.commit()
+    db.close()
+
+
+def test_emails_are_rendered_into_the_outbox_with_the_commit(outbox):
+    """Queued email is stored by the caller's commit and dropped with a rollback"""
+    EmailService(outbox).queue_password_reset_email("a@example.com", "lost")
+    outbox.rollback()
+    assert outbox.query(OutboundEmail).count() == 0
+
+    EmailService(outbox).queue_verification_email("a@example.com", "tok")
+    outbox.commit()
+    (message,) = outbox.query(OutboundEmail).all()
+    assert message.recipient == "a@example.com"
+    assert "/verify?token=tok" in message.html
+
+
+def test_worker_delivers_and_retries_with_backoff(outbox):
+    """Sent messages leave the outbox; failures back off and finally give up"""
+    service = EmailService(outbox)
+    service.queue_verification_email("a@example.com", "one")
+    service.queue_account_locked_email("b@example.com", "soon")
+    outbox.commit()
+
+    sender = RecordingSender(fail=1)
+    worker = EmailWorker(bind=test_engine, sender=sender, retry_base=0, max_attempts=2)
+    assert asyncio.run(worker.drain()) == 2
+    assert [m["To"] for m in sender.sent] == ["b@example.com"]
+    (retry,) = outbox.query(OutboundEmail).all()
+    assert (retry.attempts, retry.status) == (1, "pending")
+
+    # Due again at once (no backoff); this time it goes out
+    assert asyncio.run(worker.drain()) == 1
+    assert outbox.query(OutboundEmail).count() == 0
+    assert worker.stats() == {"sent": 2, "retried": 1, "failed": 0}
+
+    service.queue_verification_email("c@example.com", "two")
+    outbox.commit()
+    sender.fail = 2
+    asyncio.run(worker.drain())
+    asyncio.run(worker.drain())
+    outbox.expire_all()
+    assert outbox.query(OutboundEmail).one().status == "failed"
+    assert worker.backoff(1) == 0 and EmailWorker(retry_base=30).backoff(3) == 120
+
+
+def test_leased_messages_are_not_claimed_twice(outbox):
+    """A second worker finds nothing while the first holds the lease"""
+    EmailService(outbox).queue_verification_email("a@example.com", "tok")
+    outbox.commit()
+    first = EmailWorker(bind=test_engine, sender=RecordingSender())
+    second = EmailWorker(bind=test_engine, sender=RecordingSender())
+    assert len(first._claim()) == 1
+    assert second._claim() == []
@@ -0,0 +1,77 @@
+import copy
+import random
+
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BoardState, point_for_slot
+from app.core.config import settings
+from app.core.events import fold, roll_event, turn_end_event
+from app.core.moves import remaining_dice
+from app.core.test_config import TestingSessionLocal
+from app.models.game import Game, GameEvent
+from app.schemas.game import CheckerMove, TurnRequest
+from app.services.game_registry import game_registry
+from app.services.game_service import GameService
+from self_play import greedy_policy
+
+
+def test_turn_is_logged_as_events(client):
+    """A roll and a play append events instead of rewriting the state"""
+    game_id = client.post("/api/game").json()["id"]
+    state = copy.deepcopy(INITIAL_POSITION)
+    state["dice_state"] = {"values": [3, 1], "used_values": []}
+    client.put(f"/api/game/{game_id}/state", json=state)
+    client.post(f"/api/game/{game_id}/turn", json={
+        "color": "white",
+        "moves": [{"from_point": 8, "to_point": 5}, {"from_point": 6, "to_point": 5}],
+    })
+
+    events = client.get(f"/api/game/{game_id}/events").json()
+
+    assert [event["type"] for event in events] == ["state", "move", "move", "turn_end"]
+    assert [event["seq"] for event in events] == [1, 2, 3, 4]
+    assert events[1]["data"] == {"color": "white", "from": 8, "to": 5, "die": 3}
+    assert events[3]["data"] == {"next": "black"}
+
+
+def test_state_is_rebuilt_from_snapshot_and_events(client):
+    """Snapshots are written every few events and folding always gives the live state"""
+    db = TestingSessionLocal()
+    service = GameService(db)
+    game_id = client.post("/api/game").json()["id"]
+    rng = random.Random(4)
+    expected = client.get(f"/api/game/{game_id}").json()["state"]
+
+    for _ in range(30):
+        dice = (rng.randint(1, 6), rng.randint(1, 6))
+        game = service.roll(game_id, dice)
+        expected = fold(expected, [roll_event(dice)])
+        expected = service.advance_turn(expected)
+        state = game.state
+        color = state["current_turn"]
+        if state["dice_state"]["values"]:
+            board = BoardState.from_state(state)
+            play = greedy_policy(board, color, remaining_dice(state["dice_state"]), rng)
+            turn = TurnRequest(color=color, moves=[
+                CheckerMove(from_point=point_for_slot(src), to_point=point_for_slot(dst))
+                for src, dst, _ in play
+            ])
+            game = service.make_turn(game_id, turn)
+            expected = service.apply_turn(expected, turn)
+        assert game.state == expected
+
+    game_registry.flush()
+    stored = db.query(Game).filter(Game.id == game_id).first()
+    events = db.query(GameEvent).filter(GameEvent.game_id == game_id).count()
+    assert stored.snapshot_seq > 0
+    assert events - stored.snapshot_seq < settings.GAME_SNAPSHOT_INTERVAL
+    db.close()
+
+    assert client.get(f"/api/game/{game_id}").json()["state"] == expected
+
+
+def test_turn_end_event_clears_dice():
+    """Folding a turn end passes the turn with fresh dice"""
+    state = dict(copy.deepcopy(INITIAL_POSITION), dice_state={"values": [6, 6], "used_values": [6]})
+    state = fold(state, [turn_end_event("black")])
+    assert state["current_turn"] == "black"
+    assert state["dice_state"] == {"values": None, "used_values": []}
@@ -0,0 +1,59 @@
+import asyncio
+import threading
+import time
+
+from app.services.game_actor import GameActors
+
+
+def test_operations_on_one_game_run_in_order():
+    """Queued operations for a game never overlap and keep their order"""
+    actors = GameActors(idle_timeout=0.05)
+    log = []
+    running = threading.Lock()
+
+    def operation(n):
+        assert running.acquire(blocking=False), "operations overlapped"
+        time.sleep(0.005)
+        log.append(n)
+        running.release()
+        return n * n
+
+    async def main():
+        return await asyncio.gather(*(actors.run("game", operation, n) for n in range(10)))
+
+    assert asyncio.run(main()) == [n * n for n in range(10)]
+    assert log == list(range(10))
+
+
+def test_games_run_in_parallel_and_idle_actors_are_reaped():
+    """Different games do not wait for each other, and actors go away when idle"""
+    actors = GameActors(idle_timeout=0.05)
+
+    async def main():
+        start = time.monotonic()
+        await asyncio.gather(*(actors.run(f"game-{n}", time.sleep, 0.1) for n in range(4)))
+        elapsed = time.monotonic() - start
+        assert len(actors) == 4
+        await asyncio.sleep(0.2)
+        return elapsed
+
+    assert asyncio.run(main()) < 0.3
+    assert len(actors) == 0
+
+
+def test_errors_reach_the_caller():
+    """An operation that raises fails its own request only"""
+    actors = GameActors(idle_timeout=0.05)
+
+    def fail():
+        raise ValueError("bad move")
+
+    async def main():
+        results = await asyncio.gather(
+            actors.run("game", fail), actors.run("game", lambda: "ok"), return_exceptions=True
+        )
+        return results
+
+    error, ok = asyncio.run(main())
+    assert isinstance(error, ValueError)
+    assert ok == "ok"
@@ -0,0 +1,107 @@
+import copy
+
+from app.constants.game import INITIAL_POSITION
+
+
+def create_game_with_roll(client, dice):
+    """Create a game at the initial position with white to play `dice`"""
+    game = client.post("/api/game").json()
+    state = copy.deepcopy(INITIAL_POSITION)
+    state["dice_state"] = {"values": list(dice), "used_values": []}
+    client.put(f"/api/game/{game['id']}/state", json=state)
+    return game["id"]
+
+
+def test_turn_applies_whole_play(client):
+    """A complete play is applied at once and passes the turn"""
+    game_id = create_game_with_roll(client, (3, 1))
+
+    response = client.post(f"/api/game/{game_id}/turn", json={
+        "color": "white",
+        "moves": [{"from_point": 8, "to_point": 5}, {"from_point": 6, "to_point": 5}],
+    })
+
+    assert response.status_code == 200
+    state = response.json()["state"]
+    assert state["points"]["5"] == {"count": 2, "color": "white"}
+    assert state["current_turn"] == "black"
+    assert state["dice_state"] == {"values": None, "used_values": []}
+
+
+def test_turn_with_doubles(client):
+    """Doubles are submitted as four moves in one request"""
+    game_id = create_game_with_roll(client, (6, 6))
+
+    response = client.post(f"/api/game/{game_id}/turn", json={
+        "color": "white",
+        "moves": [
+            {"from_point": 24, "to_point": 18},
+            {"from_point": 24, "to_point": 18},
+            {"from_point": 13, "to_point": 7},
+            {"from_point": 13, "to_point": 7},
+        ],
+    })
+
+    assert response.status_code == 200
+    assert response.json()["state"]["points"]["18"] == {"count": 2, "color": "white"}
+
+
+def test_incomplete_turn_is_rejected(client):
+    """A play that leaves a usable die unplayed changes nothing"""
+    game_id = create_game_with_roll(client, (3, 1))
+
+    response = client.post(f"/api/game/{game_id}/turn", json={
+        "color": "white",
+        "moves": [{"from_point": 8, "to_point": 5}],
+    })
+
+    assert response.status_code == 400
+    state = client.get(f"/api/game/{game_id}").json()["state"]
+    assert state["points"]["8"] == {"count": 3, "color": "white"}
+    assert state["dice_state"]["used_values"] == []
+
+
+def test_legal_moves_lists_plays(client):
+    """Legal plays are listed for the player on roll"""
+    game_id = create_game_with_roll(client, (6, 5))
+
+    legal = client.get(f"/api/game/{game_id}/legal-moves").json()
+
+    assert legal["dice"] == [6, 5]
+    assert legal["max_moves"] == 2
+    assert [{"from_point": 24, "to_point": 18, "die": 6},
+            {"from_point": 18, "to_point": 13, "die": 5}] in legal["plays"]
+
+
+def test_stale_expected_version_is_rejected(client):
+    """A write computed against an old version gets 409 and changes nothing"""
+    game_id = create_game_with_roll(client, (3, 1))
+    version = client.get(f"/api/game/{game_id}").json()["version"]
+    play = {
+        "color": "white",
+        "moves": [{"from_point": 8, "to_point": 5}, {"from_point": 6, "to_point": 5}],
+    }
+
+    response = client.post(f"/api/game/{game_id}/turn?expected_version={version}", json=play)
+    assert response.status_code == 200
+    assert response.json()["version"] == version + 3  # Two moves and the turn change
+
+    stale = client.put(
+        f"/api/game/{game_id}/state?expected_version={version}",
+        json=response.json()["state"],
+    )
+    assert stale.status_code == 409
+    assert client.get(f"/api/game/{game_id}").json()["version"] == version + 3
+
+
+def test_impossible_checker_counts_are_rejected(client):
+    """PUT /state refuses counts no board can hold and leaves the game untouched"""
+    game = client.post("/api/game").json()
+    for bad in ({"bar": {"white": 200, "black": 0}}, {"home": {"white": 16, "black": 0}}):
+        state = dict(copy.deepcopy(INITIAL_POSITION), **bad)
+        response = client.put(f"/api/game/{game['id']}/state", json=state)
+        assert response.status_code == 400
+
+    after = client.get(f"/api/game/{game['id']}").json()
+    assert after["version"] == game["version"]
+    assert after["state"]["bar"] == game["state"]["bar"]
@@ -0,0 +1,107 @@
+import pytest
+
+from app.core.events import roll_event, state_event
+from app.core.test_config import TestingSessionLocal
+from app.models.game import GameEvent
+from app.services.game_registry import GameRegistry, VersionConflict, WriterLockHeld
+
+
+def test_moves_are_served_from_memory_and_written_behind(client):
+    """Events reach the database on flush, and the flushed game reloads identically"""
+    registry = GameRegistry(flush_batch=1000)
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+
+    game = registry.load(db, game_id)
+    registry.record(game, [roll_event((3, 1))])
+    assert registry.load(db, game_id) is game
+    assert game.state["dice_state"]["values"] == [3, 1]
+    assert [event.seq for event in registry.pending_events(game_id)] == [1]
+    assert db.query(GameEvent).filter(GameEvent.game_id == game_id).count() == 0
+
+    assert registry.flush() == 1
+    assert db.query(GameEvent).filter(GameEvent.game_id == game_id).count() == 1
+    assert registry.pending_events(game_id) == []
+
+    reloaded = GameRegistry().load(db, game_id)
+    assert reloaded.state == game.state
+    assert reloaded.version == 1
+    db.close()
+
+
+def test_idle_games_are_evicted_once_clean(client):
+    """Only games with nothing left to write are dropped"""
+    registry = GameRegistry(max_games=1, ttl=3600)
+    db = TestingSessionLocal()
+    first = registry.load(db, client.post("/api/game").json()["id"])
+    second = registry.load(db, client.post("/api/game").json()["id"])
+    registry.record(first, [roll_event((6, 5))])
+
+    # The least recently used game is dirty, so the newer one goes instead
+    assert registry.evict_idle() == 1
+    assert registry.get(first.id) is first
+    assert registry.get(second.id) is None
+
+    db.close()
+
+
+def test_evicted_games_are_reloaded_for_a_write(client):
+    """A write to a game evicted since it was read lands on a reloaded copy"""
+    registry = GameRegistry(ttl=0)
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+    stale = registry.load(db, game_id)
+    assert registry.evict_idle() == 1
+
+    game = registry.record(stale, [roll_event((3, 1))], expected_version=0)
+    assert game is not stale and registry.get(game_id) is game
+    assert (game.version, game.state["dice_state"]["values"]) == (1, [3, 1])
+
+    # The reloaded copy has moved on, so the stale read is now a real conflict
+    registry.evict_idle()
+    registry.flush()
+    with pytest.raises(VersionConflict):
+        registry.record(stale, [roll_event((6, 6))])
+    db.close()
+
+
+def test_flush_does_not_overwrite_another_writer(client):
+    """A process whose copy of the game is stale loses the database compare-and-swap"""
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+    first, second = GameRegistry(), GameRegistry()
+    first.record(first.load(db, game_id), [roll_event((3, 1))])
+    second.record(second.load(db, game_id), [roll_event((6, 6))])
+
+    assert first.flush() == 1
+    assert second.flush() == 0
+    assert second.get(game_id) is None
+    assert GameRegistry().load(db, game_id).state["dice_state"]["values"] == [3, 1]
+    db.close()
+
+
+def test_unencodable_states_are_still_recorded_consistently(client):
+    """A state too big for the board array is applied whole, without a hash"""
+    registry = GameRegistry(flush_batch=1000)
+    game_id = client.post("/api/game").json()["id"]
+    db = TestingSessionLocal()
+    game = registry.load(db, game_id)
+    state = dict(game.state, bar={"white": 200, "black": 0})
+
+    registry.record(game, [state_event(state)])
+    assert (game.version, game.state["bar"]["white"]) == (1, 200)
+    assert game.position_hash is None and game.position_id is None
+    assert [event.seq for event in registry.pending_events(game_id)] == [1]
+    db.close()
+
+
+def test_only_one_process_may_serve_games(tmp_path):
+    """A second registry cannot take the writer lock until the first lets go"""
+    path = str(tmp_path / "games.lock")
+    first, second = GameRegistry(), GameRegistry()
+    first.acquire_writer_lock(path)
+    with pytest.raises(WriterLockHeld):
+        second.acquire_writer_lock(path)
+    first.release_writer_lock()
+    second.acquire_writer_lock(path)
+    second.release_writer_lock()
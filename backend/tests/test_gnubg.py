@@ -0,0 +1,72 @@
+import pytest
+
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BoardState
+from app.core.gnubg import (
+    MatchInfo,
+    board_from_position_id,
+    decode_match_id,
+    match_id,
+    position_id,
+)
+from app.services.game_registry import game_registry
+
+
+def test_position_id_matches_gnubg():
+    """The opening position has gnubg's well-known ID and decodes back"""
+    board = BoardState.from_state(INITIAL_POSITION)
+
+    assert position_id(board, "white") == "4HPwATDgc/ABMA"
+    assert board_from_position_id("4HPwATDgc/ABMA", "white") == board
+    assert board_from_position_id("4HPwATDgc/ABMA", "black") == board
+
+
+def test_position_id_round_trips_bar_and_borne_off_checkers():
+    """Checkers on the bar and borne off survive encoding from either side"""
+    board = BoardState.from_state(INITIAL_POSITION).move(24, 20, "white").move(1, 20, "black")
+    board = board.move(6, 26, "white")
+
+    for color in ("white", "black"):
+        assert board_from_position_id(position_id(board, color), color) == board
+    assert position_id(board, "white") != position_id(board, "black")
+
+
+def test_malformed_ids_are_rejected():
+    """Wrong lengths, bad characters and too many checkers raise ValueError"""
+    for text in ("4HPwATDgc/ABM", "4HPwATDgc/AB!A", "//////////////"):
+        with pytest.raises(ValueError):
+            board_from_position_id(text, "white")
+    with pytest.raises(ValueError):
+        decode_match_id("QYkqASAAIAA")
+
+
+def test_match_id_matches_gnubg():
+    """gnubg's manual example decodes to its match, score, cube and dice"""
+    info = decode_match_id("QYkqASAAIAAA")
+
+    assert info.match_length == 9
+    assert info.score == (2, 4)
+    assert info.cube == 2 and info.cube_owner == "white"
+    assert info.on_roll == "black" and info.dice == (5, 2)
+    assert match_id(info) == "QYkqASAAIAAA"
+    assert match_id(MatchInfo(on_roll="black", turn="black")) == "cAkAAAAAAAAA"
+
+
+def test_import_and_look_up_by_position_id(client):
+    """A game created from IDs reports them back and is found by its Position ID"""
+    response = client.post("/api/game/import", json={
+        "position_id": "4HPwATDgc/ABMA", "match_id": "cAkAAAAAAAAA",
+    })
+    assert response.status_code == 200
+    game = response.json()
+    assert game["position_id"] == "4HPwATDgc/ABMA"
+    assert game["match_id"] == "cAkAAAAAAAAA"
+    assert game["state"]["current_turn"] == "black"
+    assert game["state"]["points"]["19"] == {"count": 5, "color": "black"}
+
+    game_registry.flush()
+    found = client.get("/api/game/position-ids/4HPwATDgc/ABMA").json()
+    assert game["id"] in found
+
+    bad = client.post("/api/game/import", json={"position_id": "not a position"})
+    assert bad.status_code == 400
@@ -0,0 +1,74 @@
+import pytest
+
+from app.core.wire import PACKED
+from app.services.game_registry import game_registry
+from tests.test_game_api import create_game_with_roll
+from tests.test_ws import make_token
+
+
+def test_unchanged_game_is_not_modified(client):
+    """A poll with the current ETag gets an empty 304 until the game changes"""
+    game_id = create_game_with_roll(client, (3, 1))
+    first = client.get(f"/api/game/{game_id}")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "no-cache"
+
+    again = client.get(f"/api/game/{game_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    client.post(
+        f"/api/game/{game_id}/move", json={"from_point": 8, "to_point": 5, "color": "white"}
+    )
+    changed = client.get(f"/api/game/{game_id}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+
+def test_representations_have_their_own_etags(client):
+    """A JSON ETag does not validate the packed representation"""
+    game_id = create_game_with_roll(client, (3, 1))
+    etag = client.get(f"/api/game/{game_id}").headers["etag"]
+
+    packed = client.get(
+        f"/api/game/{game_id}", headers={"If-None-Match": etag, "Accept": PACKED}
+    )
+    assert packed.status_code == 200
+    assert packed.headers["etag"] != etag
+    assert client.get(
+        f"/api/game/{game_id}",
+        headers={"If-None-Match": packed.headers["etag"], "Accept": PACKED},
+    ).status_code == 304
+
+
+@pytest.fixture
+def sole_writer(tmp_path):
+    game_registry.acquire_writer_lock(str(tmp_path / "games.lock"))
+    yield
+    game_registry.release_writer_lock()
+
+
+def test_players_get_no_etag_without_the_writer_lock(client):
+    """A process that may not be the only writer cannot vouch for the player list"""
+    game_id = client.post("/api/game").json()["id"]
+    assert "etag" not in client.get(f"/api/game-users/{game_id}/players").headers
+
+
+def test_players_etag_changes_when_someone_joins(client, sole_writer):
+    """The players list revalidates until a seat changes"""
+    game_id = client.post("/api/game").json()["id"]
+    first = client.get(f"/api/game-users/{game_id}/players")
+    etag = first.headers["etag"]
+    assert first.json() == []
+    assert client.get(
+        f"/api/game-users/{game_id}/players", headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    client.post(
+        f"/api/game-users/{game_id}/join?color=white",
+        headers={"Authorization": f"Bearer {make_token()}"},
+    )
+    changed = client.get(f"/api/game-users/{game_id}/players", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert len(changed.json()) == 1
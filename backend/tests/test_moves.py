@@ -0,0 +1,77 @@
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BLACK_BAR, WHITE_BAR, WHITE_HOME, BoardState
+from app.core.moves import is_legal_step, legal_plays, remaining_dice
+
+
+def board_from_points(points, bar=None):
+    return BoardState.from_state({"points": points, "bar": bar or {}})
+
+
+def test_opening_roll_uses_both_dice():
+    """Every legal opening play uses both dice and equivalent orders are merged"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    legal = legal_plays(board, "white", (6, 5))
+
+    assert legal.max_moves == 2
+    assert all(len(play) == 2 for play in legal.plays.values())
+    # 24/18/13 and 24/19/13 reach the same position and appear once
+    running = board.move(24, 13, "white")
+    assert legal.is_legal_result(running)
+    assert len(legal.plays) == len(set(legal.plays))
+
+
+def test_doubles_play_four_moves():
+    """Doubles are played four times"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    legal = legal_plays(board, "white", (3, 3, 3, 3))
+
+    assert legal.max_moves == 4
+
+
+def test_must_play_larger_die_when_only_one_fits():
+    """If only one die can be played, the larger one is required"""
+    # White's last checker can move 6 or 5 but never both
+    board = board_from_points({
+        "20": {"color": "white", "count": 1},
+        "9": {"color": "black", "count": 2},
+    })
+    legal = legal_plays(board, "white", (6, 5))
+
+    assert legal.max_moves == 1
+    assert [play[0][2] for play in legal.plays.values()] == [6]
+
+
+def test_checkers_on_bar_enter_first():
+    """A checker on the bar must enter before anything else moves"""
+    board = BoardState.from_state({**INITIAL_POSITION, "bar": {"white": 1, "black": 0}})
+    legal = legal_plays(board, "white", (4, 2))
+
+    assert all(play[0][0] == WHITE_BAR for play in legal.plays.values())
+    assert not is_legal_step(board, "white", (4, 2), (13, 9, 4))
+
+
+def test_closed_board_blocks_entry():
+    """No legal play exists when every entry point is blocked"""
+    points = {str(p): {"color": "white", "count": 2} for p in range(1, 7)}
+    board = board_from_points(points, bar={"black": 1, "white": 0})
+
+    assert legal_plays(board, "black", (6, 5)).max_moves == 0
+    assert board.cells[BLACK_BAR] == 1
+
+
+def test_bear_off_with_higher_die_from_highest_point():
+    """A higher die bears off from the highest occupied point"""
+    board = board_from_points({
+        "3": {"color": "white", "count": 1},
+        "2": {"color": "white", "count": 1},
+    })
+
+    assert is_legal_step(board, "white", (6, 5), (3, WHITE_HOME, 6))
+    assert not is_legal_step(board, "white", (6, 5), (2, WHITE_HOME, 6))
+    assert legal_plays(board, "white", (6, 5)).max_moves == 2
+
+
+def test_remaining_dice_for_doubles():
+    """Used dice are removed one at a time from a doubles roll"""
+    assert remaining_dice({"values": [4, 4], "used_values": [4]}) == (4, 4, 4)
+    assert remaining_dice({"values": [6, 1], "used_values": [6]}) == (1,)
@@ -1,6 +1,9 @@
+import asyncio
+import sqlite3
 import pytest
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.testclient import TestClient
+from starlette.requests import Request
 from datetime import datetime
 import time
 
@@ -10,6 +13,8 @@ from app.core.test_config import (
     override_get_db,
     test_settings
 )
+from app.core.limiter import MemoryStore, RateLimiter, SQLiteStore, bearer_subject, parse_rate
+from app.core.security import create_access_token
 from app.main import create_app
 
 def setup_test_app():
@@ -77,15 +82,79 @@ def test_login_rate_limit():
         start_time = time.time()
         response = client.post("/api/auth/token", data=test_creds)
         elapsed = time.time() - start_time
-        
+
         print(f"Request {i+1}: Status {response.status_code}, Time: {elapsed:.2f}s")
         responses.append(response.status_code)
-        
+
         if response.status_code == 429:
             print("Rate limit exceeded as expected!")
             break
-            
+
         time.sleep(0.1)  # Small delay between requests
-    
+
     # Verify that we hit the rate limit
-    assert 429 in responses, "Rate limit was not triggered" 
\ No newline at end of file
+    assert 429 in responses, "Rate limit was not triggered"
+
+
+def test_parse_rate():
+    """Limits are written like slowapi's"""
+    assert parse_rate("5/minute") == (5, 60)
+    assert parse_rate("100 per 2 hours") == (100, 7200)
+    with pytest.raises(ValueError):
+        parse_rate("0/minute")
+
+
+def test_sqlite_store_is_shared_between_workers(tmp_path):
+    """Two stores on one file, as in two workers, count against the same limit"""
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteStore(path), SQLiteStore(path)
+    now = 1000.0
+    # 3 per 60 seconds: a full bucket of 3, then one request every 20 seconds
+    assert [store.hit("k", 20, 60, now) for store in (first, second, first)] == [0, 0, 0]
+    assert second.hit("k", 20, 60, now) == pytest.approx(20)
+    assert first.hit("other", 20, 60, now) == 0
+    assert first.hit("k", 20, 60, now + 20) == 0
+    assert second.hit("k", 20, 60, now + 20) == pytest.approx(20)
+
+
+def test_limits_are_per_scope_and_user():
+    """Each user of a route gets their own bucket, and the limiter counts outcomes"""
+    def request(user):
+        token = create_access_token({"sub": user})
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+        return Request({"type": "http", "headers": headers, "client": ("10.0.0.1", 1)})
+
+    limiter = RateLimiter(MemoryStore())
+    check = limiter.limit("1/minute", "move", key=bearer_subject)
+    asyncio.run(check(request("alice")))
+    asyncio.run(check(request("bob")))
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(check(request("alice")))
+    assert raised.value.status_code == 429
+    assert int(raised.value.headers["Retry-After"]) == 60
+    assert limiter.stats() == {
+        "backend": "memory",
+        "scopes": {"move": {"allowed": 2, "limited": 1, "busy": 0, "errors": 0}},
+    }
+
+
+def test_a_locked_store_fails_closed(tmp_path):
+    """Contention on the SQLite store turns requests away instead of letting them through"""
+    path = str(tmp_path / "limits.db")
+    limiter = RateLimiter(SQLiteStore(path, busy_timeout=0))
+    check = limiter.limit("5/minute", "token")
+    request = Request({"type": "http", "headers": [], "client": ("10.0.0.1", 1)})
+
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute("BEGIN EXCLUSIVE")
+    try:
+        with pytest.raises(HTTPException) as raised:
+            asyncio.run(check(request))
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert raised.value.status_code == 503
+    asyncio.run(check(request))
+    assert limiter.stats()["scopes"]["token"] == {
+        "allowed": 1, "limited": 0, "busy": 1, "errors": 0,
+    }
@@ -0,0 +1,26 @@
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BoardState
+from app.core.rollout import RolloutStats, rollout_chunk
+
+
+def test_rollout_is_reproducible_and_symmetric():
+    """Same seed, same answer; the opening position is close to even"""
+    key = BoardState.from_state(INITIAL_POSITION).key()
+
+    first = rollout_chunk(key, "white", 20, seed=7)
+    second = rollout_chunk(key, "white", 20, seed=7)
+
+    assert first == second
+    assert first.samples == 20
+    assert abs(first.mean) < 1.0
+
+
+def test_rollout_stats_combine():
+    """Chunks from different workers add up to the same statistics"""
+    a = RolloutStats(2, 1.0, 1.0)
+    b = RolloutStats(2, -1.0, 1.0)
+    combined = a + b
+
+    assert combined == RolloutStats(4, 0.0, 2.0)
+    assert combined.mean == 0.0
+    assert combined.std_error > 0
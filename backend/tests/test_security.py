@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from fastapi import HTTPException
+
+from app.core.security import PasswordHasher
+
+
+def test_hash_and_verify_off_the_event_loop():
+    """Hashes made in the pool verify, and the loop keeps running meanwhile"""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    async def main():
+        ticker = asyncio.create_task(tick())
+        hashed = await hasher.hash("Correct.horse1")
+        ok = await hasher.verify("Correct.horse1", hashed)
+        wrong = await hasher.verify("wrong", hashed)
+        ticker.cancel()
+        return ok, wrong
+
+    assert asyncio.run(main()) == (True, False)
+    assert ticks > 10
+    assert hasher.stats()["calls"] == 3
+
+
+def test_overload_is_rejected_with_503():
+    """Requests beyond the workers and queue fail fast instead of waiting"""
+    hasher = PasswordHasher(workers=1, max_queue=1)
+
+    async def main():
+        return await asyncio.gather(
+            *(hasher._run(time.sleep, 0.05) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    rejected = [r for r in results if isinstance(r, HTTPException)]
+    assert len(rejected) == 1
+    assert rejected[0].status_code == 503
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["max_queue_wait_ms"] >= 40
+    assert stats["queued"] == 0
+
+
+def test_cancelled_callers_keep_their_slot_until_bcrypt_finishes():
+    """A request that goes away does not free room while its hash still runs"""
+    hasher = PasswordHasher(workers=1, max_queue=0)
+
+    async def main():
+        running = asyncio.create_task(hasher._run(time.sleep, 0.1))
+        await asyncio.sleep(0.02)
+        running.cancel()
+        await asyncio.sleep(0)
+        try:
+            await hasher._run(time.sleep, 0)
+        except HTTPException as e:
+            busy = e.status_code
+        await asyncio.sleep(0.15)
+        await hasher._run(time.sleep, 0)
+        return busy
+
+    assert asyncio.run(main()) == 503
+    assert hasher.stats()["rejected"] == 1
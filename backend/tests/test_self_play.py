@@ -0,0 +1,55 @@
+from app.constants.game import INITIAL_POSITION
+from app.core.board import BoardState
+from app.core.moves import ROLLS, expand_dice
+from self_play import check_turn, checker_counts, oracle_plays, play_game, relative_position
+
+
+def test_self_play_games_finish_without_violations():
+    """Games between the built-in policies end cleanly through the engine"""
+    for seed in range(3):
+        game = play_game("greedy", "random", seed, record=True)
+
+        assert game["violations"] == []
+        assert game["winner"] in ("white", "black")
+        assert game["moves"] == sum(len(turn["moves"]) for turn in game["turns"])
+
+
+def test_checker_counts():
+    """Checkers on the bar and borne off are still counted"""
+    board = BoardState([2] + [0] * 23 + [-3, 1, 12, 10])
+    assert checker_counts(board) == (13, 15)
+
+
+def test_oracle_agrees_with_generator_on_opening_rolls():
+    """The rules oracle and the move generator allow the same opening plays"""
+    board = BoardState.from_state(INITIAL_POSITION)
+    for roll, _ in ROLLS:
+        for color in ("white", "black"):
+            assert check_turn(board, board, color, expand_dice(roll), ()) == [
+                "play does not reach a position the rules allow"
+            ]
+
+
+def test_oracle_requires_the_larger_die():
+    """When either die but not both can be played, only the larger one is legal"""
+    cells = [0] * 28
+    cells[1], cells[8], cells[26], cells[27] = -2, 1, 14, 13
+    board = BoardState(cells)
+    assert oracle_plays(board, "white", (5, 2)) == {
+        relative_position(board.move(8, 3, "white"), "white")
+    }
+    assert check_turn(board, board.move(8, 6, "white"), "white", (5, 2), ((8, 6, 2),)) == [
+        "play does not reach a position the rules allow"
+    ]
+
+
+def test_oracle_blocks_entry_from_the_bar():
+    """A checker on the bar must enter before anything else moves"""
+    cells = [0] * 28
+    cells[19], cells[20], cells[24], cells[25], cells[26] = -2, -2, 1, 1, 13
+    cells[27] = 11
+    board = BoardState(cells)
+    assert oracle_plays(board, "white", (5, 6)) == {relative_position(board, "white")}
+    assert check_turn(board, board.move(24, 19, "white"), "white", (5, 6), ((24, 19, 5),)) == [
+        "step 24->19 is illegal"
+    ]
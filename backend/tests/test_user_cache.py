@@ -0,0 +1,63 @@
+import asyncio
+
+from sqlalchemy import event
+
+from app.core.security import create_access_token
+from app.core.test_config import TestingSessionLocal
+from app.services.user_cache import user_cache
+from tests.test_ws import make_token
+
+
+def auth(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_cached_user_needs_no_query_and_can_still_be_changed(client):
+    """A cache hit serves the user without SQL, and joining a game still commits"""
+    token = make_token()
+    me = client.get("/api/auth/me", headers=auth(token)).json()
+
+    queries = []
+    engine = TestingSessionLocal.kw["bind"]
+
+    def count(*args):
+        queries.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/api/auth/me", headers=auth(token)).json()["id"] == me["id"]
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert not [sql for sql in queries if "FROM users" in sql]
+
+    game_id = client.post("/api/game").json()["id"]
+    assert client.post(
+        f"/api/game-users/{game_id}/join?color=black", headers=auth(token)
+    ).status_code == 200
+    # Joining invalidated the cached user, so the seat is seen at once
+    assert user_cache._users.get(me["id"]) is None
+    client.get("/api/auth/me", headers=auth(token))
+    assert user_cache._users.get(me["id"])["current_game_id"] == game_id
+
+
+def test_logout_forgets_the_token_and_user(client):
+    """Logging out drops the cached claims and user"""
+    token = make_token()
+    user_id = client.get("/api/auth/me", headers=auth(token)).json()["id"]
+    assert user_cache._users.get(user_id) is not None
+
+    client.post("/api/auth/logout", headers=auth(token))
+    assert user_cache._claims.get(token) is None
+    assert user_cache._users.get(user_id) is None
+
+
+def test_tokens_with_embedded_claims_skip_the_lookup():
+    """A token carrying the username is accepted without resolving the user"""
+    token = create_access_token({"sub": "no-such-user", "username": "ghost"})
+    plain = create_access_token({"sub": "no-such-user"})
+    db = TestingSessionLocal()
+    try:
+        assert asyncio.run(user_cache.authenticate(db, token))["username"] == "ghost"
+        assert asyncio.run(user_cache.authenticate(db, plain)) is None
+    finally:
+        db.close()
@@ -0,0 +1,48 @@
+import copy
+
+from app.constants.game import INITIAL_POSITION
+from app.core.wire import JSON, PACKED, negotiate, unpack_game
+from tests.test_game_api import create_game_with_roll
+
+
+def test_accept_header_negotiation():
+    """The most preferred offered type wins and anything else falls back to JSON"""
+    assert negotiate(None) == JSON
+    assert negotiate("text/html, */*") == JSON
+    assert negotiate(f"{PACKED}, {JSON};q=0.5") == PACKED
+    assert negotiate(f"{PACKED};q=0.2, {JSON}") == JSON
+    assert negotiate(f"{PACKED};q=0") == JSON
+
+
+def test_packed_game_decodes_to_the_json_state(client):
+    """The packed response carries the same state in a fraction of the bytes"""
+    game_id = create_game_with_roll(client, (3, 1))
+    client.post(
+        f"/api/game/{game_id}/move", json={"from_point": 8, "to_point": 5, "color": "white"}
+    )
+
+    as_json = client.get(f"/api/game/{game_id}")
+    packed = client.get(f"/api/game/{game_id}", headers={"Accept": PACKED})
+
+    assert packed.headers["content-type"] == PACKED
+    assert packed.headers["vary"] == "Accept"
+    game = unpack_game(packed.content)
+    assert game["id"] == game_id
+    assert game["version"] == as_json.json()["version"]
+    assert game["state"] == as_json.json()["state"]
+    assert len(packed.content) * 10 < len(as_json.content)
+
+
+def test_free_form_states_fall_back_to_json(client):
+    """A state without all 15 checkers per side cannot be packed and is sent as JSON"""
+    game_id = client.post("/api/game").json()["id"]
+    state = copy.deepcopy(INITIAL_POSITION)
+    state["points"] = {
+        "6": {"color": "white", "count": 1},
+        "19": {"color": "black", "count": 1},
+    }
+    state["home"] = {"white": 0, "black": 0}
+    response = client.put(f"/api/game/{game_id}/state", json=state, headers={"Accept": PACKED})
+
+    assert response.headers["content-type"] == JSON
+    assert response.json()["state"]["home"] == {"white": 0, "black": 0}
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from app.core.security import create_access_token
+from app.core.test_config import TestingSessionLocal
+from app.models.user import User
+from app.services.game_updates import GameUpdates, InProcessBackend, batch_frame
+from tests.test_game_api import create_game_with_roll
+
+
+def make_token():
+    db = TestingSessionLocal()
+    name = f"ws-{uuid.uuid4().hex[:8]}"
+    user = User(username=name, email=f"{name}@example.com", hashed_password="!")
+    db.add(user)
+    db.commit()
+    token = create_access_token({"sub": user.id})
+    db.close()
+    return token
+
+
+def test_snapshot_then_deltas(client):
+    """Subscribers get the game on connect and every change after it"""
+    game_id = create_game_with_roll(client, (3, 1))
+
+    with client.websocket_connect(f"/ws/game/{game_id}?token={make_token()}") as ws:
+        snapshot = ws.receive_json()
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["game"]["state"]["dice_state"]["values"] == [3, 1]
+
+        client.post(f"/api/game/{game_id}/turn", json={
+            "color": "white",
+            "moves": [{"from_point": 8, "to_point": 5}, {"from_point": 6, "to_point": 5}],
+        })
+        delta = ws.receive_json()
+
+    assert delta["type"] == "events"
+    assert delta["version"] == snapshot["version"] + 3
+    assert [event["type"] for event in delta["events"]] == ["move", "move", "turn_end"]
+
+
+def test_connection_requires_a_valid_token(client):
+    """Anonymous or forged tokens are refused before the socket opens"""
+    game_id = client.post("/api/game").json()["id"]
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect(f"/ws/game/{game_id}?token=forged") as ws:
+            ws.receive_json()
+
+
+def test_every_subscriber_gets_the_same_frame():
+    """An update is serialized once however many clients watch the game"""
+    updates = GameUpdates(InProcessBackend())
+
+    async def main():
+        subscriptions = [updates.subscribe("game") for _ in range(3)]
+        updates.publish_events("game", 1, [{"type": "roll", "dice": [3, 1]}])
+        return [await subscription.next_batch() for subscription in subscriptions]
+
+    batches = asyncio.run(main())
+    frames = [batch[0][1] for overflowed, batch in batches]
+    assert all(frame is frames[0] for frame in frames)
+    assert json.loads(frames[0])["version"] == 1
+
+
+def test_bursts_are_coalesced_and_overflow_drops_to_a_snapshot():
+    """A slow subscriber gets one batch, and a fresh snapshot once it falls too far behind"""
+    updates = GameUpdates(InProcessBackend(), max_pending=4)
+
+    async def main():
+        subscription = updates.subscribe("game")
+        for version in range(1, 4):
+            updates.publish_events("game", version, [{"type": "turn_end", "next": "black"}])
+        await asyncio.sleep(0)
+        burst = await subscription.next_batch()
+        for version in range(4, 10):
+            updates.publish_events("game", version, [{"type": "turn_end", "next": "white"}])
+        await asyncio.sleep(0)
+        return burst, await subscription.next_batch()
+
+    (overflowed, batch), (overflowed_after, backlog) = asyncio.run(main())
+    assert not overflowed
+    assert [version for version, _ in batch] == [1, 2, 3]
+    frame = json.loads(batch_frame([frame for _, frame in batch]))
+    assert [message["version"] for message in frame["messages"]] == [1, 2, 3]
+    assert overflowed_after
+    assert len(backlog) < 4
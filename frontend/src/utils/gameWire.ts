@@ -0,0 +1,75 @@
+import { PlayerColor, PointState } from '../store/types';
+
+// Decoder for the packed game representation served when a request sends
+// `Accept: application/x-backgammon-game` (see backend/app/core/wire.py).
+export const PACKED_GAME_TYPE = 'application/x-backgammon-game';
+
+const PACKED_FORMAT = 1;
+const HEADER_SIZE = 9;
+const KEY_SIZE = 10;
+const CHECKERS = 15;
+const COLORS: PlayerColor[] = ['white', 'black'];
+
+export interface PackedGame {
+  id: string;
+  version: number;
+  state: {
+    points: { [key: string]: PointState };
+    bar: { white: number; black: number };
+    home: { white: number; black: number };
+    current_turn: PlayerColor;
+    dice_state: { values: [number, number] | null; used_values: number[] };
+  };
+}
+
+// Board point of entry `index` (0 = ace point, 24 = bar) of a side's key
+const pointFor = (color: PlayerColor, index: number): number =>
+  color === 'white' ? index + 1 : 24 - index;
+
+export const decodePackedGame = (buffer: ArrayBuffer): PackedGame => {
+  const view = new DataView(buffer);
+  const bytes = new Uint8Array(buffer);
+  if (view.getUint8(0) !== PACKED_FORMAT) {
+    throw new Error(`Unknown packed game format ${view.getUint8(0)}`);
+  }
+  const color = COLORS[view.getUint8(1)];
+  const dice: [number, number] = [view.getUint8(2), view.getUint8(3)];
+  const used = view.getUint8(4);
+  const version = view.getUint32(5, true);
+  const usedValues = Array.from(bytes.subarray(HEADER_SIZE, HEADER_SIZE + used));
+  const keyStart = HEADER_SIZE + used;
+  const key = bytes.subarray(keyStart, keyStart + KEY_SIZE);
+  const id = new TextDecoder().decode(bytes.subarray(keyStart + KEY_SIZE));
+
+  const points: { [key: string]: PointState } = {};
+  const bar = { white: 0, black: 0 };
+  const home = { white: 0, black: 0 };
+  let bit = 0;
+  const nextBit = () => (key[bit >> 3] >> (bit++ & 7)) & 1;
+  // The opponent of the player on roll comes first in the key
+  for (const side of [COLORS[1 - COLORS.indexOf(color)], color]) {
+    let total = 0;
+    for (let index = 0; index < 25; index++) {
+      let count = 0;
+      while (nextBit()) count++;
+      total += count;
+      if (!count) continue;
+      if (index === 24) bar[side] = count;
+      else points[String(pointFor(side, index))] = { color: side, count };
+    }
+    // The server only packs states where each side has all 15 checkers
+    home[side] = CHECKERS - total;
+  }
+
+  return {
+    id,
+    version,
+    state: {
+      points,
+      bar,
+      home,
+      current_turn: color,
+      dice_state: { values: dice[0] ? dice : null, used_values: usedValues },
+    },
+  };
+};